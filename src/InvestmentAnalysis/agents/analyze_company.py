@@ -15,17 +15,21 @@ Author is not liable for any damages arising from direct/indirect use of this co
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import streamlit as st
 import os, sys
 from dotenv import load_dotenv, find_dotenv
 import pathlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Optional
 
-# for supported LLMs
-from openai import OpenAI
-from groq import Groq
-from anthropic import Anthropic
-import google.generativeai as genai
+# provider SDKs (openai, groq, anthropic & google.generativeai) are imported
+# on demand by their ProviderBackend (see below) - each costs 100s of ms to import
+import httpx
+from agno.utils.log import logger
 
 # load env variables from .env file
 _ = load_dotenv(find_dotenv())
@@ -42,101 +46,360 @@ PROVIDER_AND_MODEL = {
     "Anthropic": "claude-3-5-sonnet-20241022",
     "Gemini": "gemini-1.5-flash",
 }
-MODEL_NAME = "unk"  # initial value, gets set when get_chat_model() is called
 
+# max. concurrent connections each provider's (pooled) HTTP client keeps open
+MAX_CONNECTIONS_PER_PROVIDER = 20
 
-def get_chat_model(provider: str):
+
+@dataclass(frozen=True)
+class ChatModel:
+    """
+    handle to a provider's chat client - the model id travels with the client,
+    so concurrent sessions using different providers never mix up model names
+    """
+
+    provider: str
+    model_name: str
+    client: Any
+
+
+# one ChatModel per provider, shared across threads & sessions
+_chat_models: Dict[str, ChatModel] = {}
+_chat_models_lock = threading.Lock()
+
+
+def _pooled_http_client() -> httpx.Client:
+    """HTTP client (thread-safe) with a keep-alive connection pool, shared by all users of a provider"""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_PROVIDER,
+            max_keepalive_connections=MAX_CONNECTIONS_PER_PROVIDER,
+        ),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+
+
+# ------------------------------------------------------------------------------
+# Provider backends: a plugin per provider (keyed by PROVIDER_AND_MODEL names)
+# that knows how to create its chat client & make a completion. Backends import
+# their SDK only when called, so a run only pays for the provider it uses.
+# ------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ProviderBackend:
+    """
+    how to talk to a provider
+        create_client: callable(model_name) -> chat client
+        completion: callable(ChatModel, prompt) -> text of the completion
+    """
+
+    create_client: Callable[[str], Any]
+    completion: Callable[[ChatModel, str], str]
+
+
+_provider_backends: Dict[str, ProviderBackend] = {}
+
+
+def register_provider(provider: str, model_name: str, backend: ProviderBackend):
+    """
+    registers (or replaces) the backend & default model of provider. Registered
+    providers are offered in the UI (see PROVIDER_AND_MODEL)
+    """
+    with _chat_models_lock:
+        PROVIDER_AND_MODEL[provider] = model_name
+        _provider_backends[provider] = backend
+        # clients created with the old backend are stale
+        _chat_models.pop(provider, None)
+
+
+def get_provider_backend(provider: str) -> ProviderBackend:
+    backend = _provider_backends.get(provider)
+    if backend is None:
+        raise ValueError(f"{provider} is not a supported LLM!")
+    return backend
+
+
+def _openai_client(model_name: str):
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"), http_client=_pooled_http_client()
+    )
+
+
+def _groq_client(model_name: str):
+    from groq import Groq
+
+    return Groq(api_key=os.environ.get("GROQ_API_KEY"), http_client=_pooled_http_client())
+
+
+def _anthropic_client(model_name: str):
+    from anthropic import Anthropic
+
+    return Anthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        http_client=_pooled_http_client(),
+    )
+
+
+def _gemini_client(model_name: str):
+    import google.generativeai as genai
+
+    # google.generativeai manages its own (gRPC) transport
+    genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+    return genai.GenerativeModel(model_name)
+
+
+def _openai_completion(chat_model: ChatModel, prompt: str) -> str:
+    # OpenAI & Groq use the same API
+    completion = chat_model.client.chat.completions.create(
+        model=chat_model.model_name,
+        messages=[
+            {"role": "system", "content": SYS_PROMPT},
+            {
+                "role": "user",
+                "content": prompt,
+            },
+        ],
+        temperature=0,
+    )
+    return completion.choices[0].message.content
+
+
+def _anthropic_completion(chat_model: ChatModel, prompt: str) -> str:
+    completion = chat_model.client.messages.create(
+        model=chat_model.model_name,
+        max_tokens=2048,
+        temperature=0,
+        system=SYS_PROMPT,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt,
+                    }
+                ],
+            }
+        ],
+    )
+    return completion.content[0].text
+
+
+def _gemini_completion(chat_model: ChatModel, prompt: str) -> str:
+    import google.generativeai as genai
+
+    # Gemini does not have concept of System prompt
+    # so we concatenate SYS_PROMPT with our prompt and pass
+    # the concatenation as our overall prompt
+    chat_prompt = SYS_PROMPT + "\n\n" + prompt
+    completion = chat_model.client.generate_content(
+        chat_prompt,
+        generation_config=genai.GenerationConfig(
+            max_output_tokens=2048,
+            temperature=0,
+        ),
+    )
+    return completion.text
+
+
+# backends of the providers in PROVIDER_AND_MODEL
+_provider_backends.update(
+    {
+        "OpenAI": ProviderBackend(_openai_client, _openai_completion),
+        "Groq": ProviderBackend(_groq_client, _openai_completion),
+        "Anthropic": ProviderBackend(_anthropic_client, _anthropic_completion),
+        "Gemini": ProviderBackend(_gemini_client, _gemini_completion),
+    }
+)
+
+
+def _create_chat_model(provider: str) -> ChatModel:
+    """creates the chat client for provider (see get_chat_model)"""
+    model_name = PROVIDER_AND_MODEL[provider]
+    client = get_provider_backend(provider).create_client(model_name)
+    return ChatModel(provider=provider, model_name=model_name, client=client)
+
+
+def get_chat_model(provider: str) -> ChatModel:
     """create an instance of the LLM (chat client) depending on the provider
-        chosen. Value of provider comes from dropdown displayed on UI
+        chosen. Value of provider comes from dropdown displayed on UI.
+        Clients are created once per provider and re-used across calls (and threads),
+        so all requests to a provider share one pool of HTTP connections.
     Params:
         provider: string [one of OpenAI, Groq etc - see PROVIDER_AND_MODEL.keys()]
     Returns:
-        instance of appropriate Chat client for respective provider
+        ChatModel handle with provider, model name & chat client for respective provider
     """
-    global PROVIDER_AND_MODEL, MODEL_NAME
     assert (
         provider in PROVIDER_AND_MODEL.keys()
     ), f"FATAL: {provider} is not a supported model!"
 
-    MODEL_NAME = PROVIDER_AND_MODEL[provider]
+    chat_model = _chat_models.get(provider)
+    if chat_model is None:
+        with _chat_models_lock:
+            # another thread may have created it while we waited for the lock
+            chat_model = _chat_models.get(provider)
+            if chat_model is None:
+                chat_model = _create_chat_model(provider)
+                _chat_models[provider] = chat_model
+    return chat_model
+
 
-    if provider == "OpenAI":
-        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    elif provider == "Groq":
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-    elif provider == "Anthropic":
-        client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-    elif provider == "Gemini":
-        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-        client = genai.GenerativeModel(MODEL_NAME)
+def close_chat_models():
+    """closes the HTTP connection pools of all clients created by get_chat_model()"""
+    with _chat_models_lock:
+        for chat_model in _chat_models.values():
+            close = getattr(chat_model.client, "close", None)
+            if close is not None:
+                close()
+        _chat_models.clear()
 
-    return client
 
+# ------------------------------------------------------------------------------
+# Hedged requests: if the primary provider is slower than usual (i.e. hasn't
+# responded within a percentile of its observed latencies), the same prompt is
+# sent to a secondary provider & whichever responds first wins.
+# ------------------------------------------------------------------------------
 
-def get_model_completion(chat_client, prompt: str) -> str:
+# number of most recent latencies per model used for percentiles
+LATENCY_WINDOW = 100
+
+_latencies: Dict[str, Deque[float]] = {}
+_latencies_lock = threading.Lock()
+hedging_stats = {"requests": 0, "hedged": 0, "secondary_wins": 0}
+
+# runs primary & secondary requests of hedged completions
+_hedging_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+@dataclass(frozen=True)
+class HedgingPolicy:
+    """
+    when (and where) to send a hedged request
+        secondary: ChatModel to send the hedged request to
+        percentile: hedge when primary hasn't responded within this percentile
+            of its observed latencies (e.g. 95 = slower than 95% of past requests)
+        min_samples: latencies to observe before percentile is trusted
+        initial_delay: seconds to wait before hedging until min_samples are observed
+    """
+
+    secondary: ChatModel
+    percentile: float = 95.0
+    min_samples: int = 10
+    initial_delay: float = 15.0
+
+    def hedge_delay(self, primary: ChatModel) -> float:
+        """seconds to wait on primary before sending the hedged request"""
+        delay = latency_percentile(primary, self.percentile, self.min_samples)
+        return self.initial_delay if delay is None else delay
+
+
+def _latency_key(chat_model: ChatModel) -> str:
+    return f"{chat_model.provider}/{chat_model.model_name}"
+
+
+def record_latency(chat_model: ChatModel, seconds: float):
+    """records latency of a completed request to chat_model"""
+    with _latencies_lock:
+        latencies = _latencies.setdefault(
+            _latency_key(chat_model), deque(maxlen=LATENCY_WINDOW)
+        )
+        latencies.append(seconds)
+
+
+def latency_percentile(
+    chat_model: ChatModel, percentile: float, min_samples: int = 1
+) -> Optional[float]:
+    """percentile of observed latencies of chat_model (None if < min_samples observed)"""
+    with _latencies_lock:
+        latencies = list(_latencies.get(_latency_key(chat_model), []))
+    if len(latencies) < max(min_samples, 1):
+        return None
+    return float(np.percentile(latencies, percentile))
+
+
+def _timed_completion(chat_model: ChatModel, prompt: str) -> str:
+    start = time.perf_counter()
+    completion = _model_completion(chat_model, prompt)
+    record_latency(chat_model, time.perf_counter() - start)
+    return completion
+
+
+def _hedged_completion(
+    chat_model: ChatModel, prompt: str, hedging_policy: HedgingPolicy
+) -> str:
+    """
+    sends prompt to chat_model & if it doesn't respond within hedging_policy.hedge_delay()
+    (or fails), to hedging_policy.secondary as well. The first successful response wins.
+    Losing requests are cancelled if not yet started, else their response is discarded
+    (a blocking HTTP request cannot be interrupted mid-flight)
+    """
+    primary = _hedging_executor.submit(_timed_completion, chat_model, prompt)
+    done, _ = wait([primary], timeout=hedging_policy.hedge_delay(chat_model))
+    if done and primary.exception() is None:
+        return primary.result()
+
+    logger.info(
+        f"Hedging: {_latency_key(chat_model)} slow or failed, "
+        f"also asking {_latency_key(hedging_policy.secondary)}"
+    )
+    secondary = _hedging_executor.submit(
+        _timed_completion, hedging_policy.secondary, prompt
+    )
+    with _latencies_lock:
+        hedging_stats["hedged"] += 1
+
+    pending = {secondary} if done else {primary, secondary}
+    errors = [primary.exception()] if done else []
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for winner in done:
+            if winner.exception() is not None:
+                errors.append(winner.exception())
+                continue
+            for loser in pending:
+                loser.cancel()
+            if winner is secondary:
+                with _latencies_lock:
+                    hedging_stats["secondary_wins"] += 1
+            return winner.result()
+    raise errors[-1]
+
+
+def get_model_completion(
+    chat_model: ChatModel,
+    prompt: str,
+    hedging_policy: Optional[HedgingPolicy] = None,
+) -> str:
     """
     gets the chat model to make a completion for prompt provided.
     This function handles the API variations across all the supported models
 
     Params:
-        chat_client - instance of chat client created previously
+        chat_model - ChatModel handle returned by get_chat_model()
         prompt (str) - the prompt for which you want a completion (response)
             from instance of chat client
+        hedging_policy (HedgingPolicy) [optional] - hedge slow responses of chat_model
+            by sending prompt to a secondary model too (see HedgingPolicy)
     Returns:
         Text (or Markdown) response from the chat client (Gemini usually returns
         markdown, rest of models return plain text)
     """
-    global MODEL_NAME, SYS_PROMPT
-
-    if chat_client.__class__.__name__ in ["OpenAI", "Groq"]:
-        # these use the same API
-        completion = chat_client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": SYS_PROMPT},
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
-            temperature=0,
-        )
-        return completion.choices[0].message.content
-    elif chat_client.__class__.__name__ in ["Anthropic"]:
-        completion = chat_client.messages.create(
-            model=MODEL_NAME,
-            max_tokens=2048,
-            temperature=0,
-            system=SYS_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt,
-                        }
-                    ],
-                }
-            ],
-        )
-        return completion.content[0].text
-    elif chat_client.__class__.__name__ in ["GenerativeModel"]:
-        # Google Gemini
-        # Gemini does not have concept of System prompt
-        # so we concatenate SYS_PROMPT with our prompt and pass
-        # the concatenation as our overall prompt
-        chat_prompt = SYS_PROMPT + "\n\n" + prompt
-        completion = chat_client.generate_content(
-            chat_prompt,
-            generation_config=genai.GenerationConfig(
-                max_output_tokens=2048,
-                temperature=0,
-            ),
-        )
-        return completion.text
-    else:
-        raise ValueError(f"{chat_client.__class__.__name__} is not a supported LLM!")
+    with _latencies_lock:
+        hedging_stats["requests"] += 1
+    if hedging_policy is None or _latency_key(hedging_policy.secondary) == _latency_key(
+        chat_model
+    ):
+        return _timed_completion(chat_model, prompt)
+    return _hedged_completion(chat_model, prompt, hedging_policy)
+
+
+def _model_completion(chat_model: ChatModel, prompt: str) -> str:
+    """makes the completion request to chat_model (see get_model_completion)"""
+    return get_provider_backend(chat_model.provider).completion(chat_model, prompt)
 
 
 def is_valid_ticker(symbol: str) -> bool:
@@ -182,14 +445,19 @@ def fetch_data(symbol: str):
     return ticker, financials, balance_sheet, cash_flow
 
 
-def get_peer_companies(chat_client, ticker: yf.Ticker) -> dict:
+def get_peer_companies(
+    chat_model: ChatModel,
+    ticker: yf.Ticker,
+    hedging_policy: Optional[HedgingPolicy] = None,
+) -> dict:
     """
         Get top 5 peer companies of ticker, which operate in the same industry
         as ticker and whose stocks trade on the same primary stock exchange as ticker
         This is an LLM assisted function - the LLM fetches this data
     Params:
-        chat_client: instance of LLM we are using
+        chat_model: ChatModel handle of the LLM we are using
         ticker(str): valid ticker symbol of company (as used by Yahoo Finance!). E.g. "AAPL", "PERSISTENT.NS"
+        hedging_policy (HedgingPolicy) [optional]: hedge slow LLM responses (see get_model_completion)
     Returns:
         A Python dict object, with 5 entries, each with ticker symbol as key and company name as value
         For example:
@@ -205,7 +473,7 @@ def get_peer_companies(chat_client, ticker: yf.Ticker) -> dict:
     Return the response as a string formatted as a Python dict with no surrounding text or markdown.
     """
 
-    if chat_client.__class__.__name__ in ["GenerativeModel"]:
+    if chat_model.provider in ["Gemini"]:
         # Google Gemini generates un-necessary markdown in it's response
         # hoping this additional prompt will omit that
         peer_cos_prompt += (
@@ -213,7 +481,7 @@ def get_peer_companies(chat_client, ticker: yf.Ticker) -> dict:
             + "NOTE: Do not generate any markdown text in your response. Return just plan text"
         )
 
-    completion = get_model_completion(chat_client, peer_cos_prompt)
+    completion = get_model_completion(chat_model, peer_cos_prompt, hedging_policy)
 
     # Extract the response
     # peers = response.choices[0].text.strip()
@@ -385,14 +653,21 @@ def compare_with_peers(symbol: str, peers: dict) -> pd.DataFrame:
 
 
 # Function to get recommendation using OpenAI API
-def get_recommendation(chat_client, symbol: str, report: str, peers=None) -> str:
+def get_recommendation(
+    chat_model: ChatModel,
+    symbol: str,
+    report: str,
+    peers=None,
+    hedging_policy: Optional[HedgingPolicy] = None,
+) -> str:
     """
         Gets recommendation from LLM based on financial performance, ratios and peer-comparison
     Params:
-        chat_client: instance of LLM to use
+        chat_model: ChatModel handle of the LLM to use
         symbol (str): valid ticker symbol (as used by Yahoo Finance!)
         report (str): string representation of Financial performance of company
         peers (dict) [optional]: dict of top 5 peers
+        hedging_policy (HedgingPolicy) [optional]: hedge slow LLM responses (see get_model_completion)
     Returns:
         Recommendation from LLM as a string (could contain Markdown, especially if LLM is Gemini!)
     """
@@ -405,13 +680,52 @@ def get_recommendation(chat_client, symbol: str, report: str, peers=None) -> str
         reco_prompt += f"Next, give a commentary and your analysis of how {symbol} has fared viz-a-viz peers {peers}\n"
 
     reco_prompt += f"Finally, What is your recommendation on this company's long-term investment potential?"
-    completion = get_model_completion(chat_client, reco_prompt)
+    completion = get_model_completion(chat_model, reco_prompt, hedging_policy)
 
     return completion
 
 
+def save_to_analytics_store(
+    symbol: str,
+    ticker,
+    financials: pd.DataFrame,
+    balance_sheet: pd.DataFrame,
+    cash_flow: pd.DataFrame,
+    ratios: pd.DataFrame,
+    peers: dict,
+    provider: str,
+    report_path: pathlib.Path,
+):
+    """
+    saves statements (as returned by fetch_data), ratios (from calculate_ratios), peers &
+    report metadata of symbol to the analytics store (see utils/analytics_store.py)
+    """
+    from utils.analytics_store import get_analytics_store
+
+    try:
+        store = get_analytics_store()
+        store.save_company(symbol, ticker.info)
+        # fetch_data() transposed the statements to periods as rows
+        store.save_statement(symbol, "financials", financials.transpose())
+        store.save_statement(symbol, "balance_sheet", balance_sheet.transpose())
+        store.save_statement(symbol, "cash_flow", cash_flow.transpose())
+        store.save_ratios(symbol, "analyze_company", ratios)
+        store.save_analysis(
+            symbol,
+            "analyze_company",
+            provider=provider,
+            peers=list(peers.keys()) if peers else None,
+            report_path=report_path,
+        )
+    except Exception as e:
+        print(f"Unable to save {symbol} to analytics store: {e}")
+
+
 # Main application
 def main():
+    import streamlit as st
+    from utils.report_builder import MarkdownFileSink, ReportBuilder, StreamlitSink
+
     st.title("Financial Analysis of Company")
 
     # create a 2 x 2 layout
@@ -429,6 +743,12 @@ def main():
         # Input company symbol
         symbol = st.text_input("Enter the Company Ticker (e.g AAPL, PERSISTENT.NS):")
 
+    # optionally, hedge slow responses from provider with another provider
+    hedge_provider = st.selectbox(
+        "Hedge slow LLM responses with (optional)",
+        ["None"] + list(PROVIDER_AND_MODEL.keys()),
+    )
+
     if provider and symbol:
         # provider selected & symbol entered
 
@@ -442,6 +762,10 @@ def main():
         # create our chat model
         client = get_chat_model(provider)
         print(f"You have chosen {provider} LLM")
+        hedging_policy = None
+        if hedge_provider not in ["None", provider]:
+            hedging_policy = HedgingPolicy(secondary=get_chat_model(hedge_provider))
+            print(f"Slow responses from {provider} will be hedged with {hedge_provider}")
 
         this_time = datetime.now().strftime("%Y%m%d-%H%M%S")
         markdown_file_dir = pathlib.Path(__file__).parent / "reports"
@@ -454,92 +778,34 @@ def main():
         print(f"Report will be generated in : {markdown_file_path}")
         # sys.exit(-1)
 
-        with open(str(markdown_file_path), "w", encoding="utf-8") as repo_file:
+        # the report is built once - each section is streamed to the markdown file &
+        # shown in the app as it is added, and rendered to markdown once for the LLM prompt
+        with ReportBuilder(MarkdownFileSink(markdown_file_path), StreamlitSink(st)) as report:
             ticker, financials, balance_sheet, cash_flow = fetch_data(symbol)
-            report = ""
-            NL2 = "\n\n"
-            repo_file.write(
-                f"# Financial Report, Analysis and AI Recommendation for {symbol}{NL2}"
+            report.text(
+                f"# Financial Report, Analysis and AI Recommendation for {symbol}",
+                in_prompt=False,
+                in_ui=False,
             )
-
-            basic_info = f"#### Basic Info for {symbol}"
-            st.markdown(basic_info)
-            report += basic_info + NL2
-            repo_file.write(basic_info + NL2)
-
-            company_name = f"**Company Name:** {ticker.info['longName']}"
-            st.markdown(company_name)
-            report += company_name + NL2
-            repo_file.write(company_name + NL2)
-
-            business_summary = f"**Business Summary:**"
-            st.markdown(business_summary)
-            report += business_summary + NL2
-            repo_file.write(business_summary + NL2)
-
-            long_business_summary = f"{ticker.info['longBusinessSummary']}"
-            st.markdown(long_business_summary)
-            report += long_business_summary + NL2
-            repo_file.write(long_business_summary + NL2)
-
-            peers = get_peer_companies(client, ticker)
-            top5_peer_cos = f"**Peers (top {len(peers)})**"
-            st.markdown(top5_peer_cos)
-            report += top5_peer_cos + NL2
-            repo_file.write(top5_peer_cos + NL2)
-
-            # st.markdown(f"```python\n{peers}\n```")
-            peers_md = "| Symbol | Company Name|\n"
-            peers_md += "|--------|-------------|\n"
-            for key, value in peers.items():
-                peers_md += f"|{key}|{value}|\n"
-                st.markdown(f"- {value} ({key})")
-            # for sym, descr in peers.items():
-            #     st.markdown(f"- {descr} ({sym})")
-            report += peers_md + NL2
-            repo_file.write(peers_md + NL2)
-
-            financials_title = f"#### Financials"
-            st.markdown(financials_title)
-            report += financials_title + NL2
-            repo_file.write(financials_title + NL2)
-
-            st.dataframe(financials)
-            fin_str = financials.to_markdown()
-            report += fin_str + NL2
-            repo_file.write(fin_str + NL2)
-
-            balance_sheet_title = f"#### Balance Sheet"
-            st.markdown(balance_sheet_title)
-            report += balance_sheet_title + NL2
-            repo_file.write(balance_sheet_title + NL2)
-
-            st.dataframe(balance_sheet)
-            bal_str = balance_sheet.to_markdown()
-            report += bal_str + NL2
-            repo_file.write(bal_str + NL2)
-
-            cash_flow_title = f"#### Cash Flows"
-            st.markdown(cash_flow_title)
-            report += cash_flow_title + NL2
-            repo_file.write(cash_flow_title + NL2)
-
-            st.dataframe(cash_flow)
-            cash_str = cash_flow.to_markdown()
-            report += cash_str + NL2
-            repo_file.write(cash_str + NL2)
+            report.text(f"#### Basic Info for {symbol}")
+            report.text(f"**Company Name:** {ticker.info['longName']}")
+            report.text(f"**Business Summary:**")
+            report.text(f"{ticker.info['longBusinessSummary']}")
+
+            peers = get_peer_companies(client, ticker, hedging_policy)
+            report.text(f"**Peers (top {len(peers)})**")
+            report.key_values(peers, headers=("Symbol", "Company Name"))
+
+            report.text(f"#### Financials")
+            report.table(financials)
+            report.text(f"#### Balance Sheet")
+            report.table(balance_sheet)
+            report.text(f"#### Cash Flows")
+            report.table(cash_flow)
 
             ratios = calculate_ratios(ticker, financials, balance_sheet, cash_flow)
-
-            markdown_title = f"### Financial Ratios for {symbol}"
-            st.markdown(markdown_title)
-            report += markdown_title + NL2
-            repo_file.write(markdown_title + NL2)
-
-            st.dataframe(ratios)
-            ratios_str = ratios.to_markdown()
-            report += ratios_str + NL2
-            repo_file.write(ratios_str + NL2)
+            report.text(f"### Financial Ratios for {symbol}")
+            report.table(ratios)
 
             if peers:
                 # create dataframe of symbol ratios
@@ -550,27 +816,25 @@ def main():
                 # peer_comparison[symbol] = ratios.mean().T
                 comparison_df = pd.concat([symbol_df, peers_df], axis=1)
 
-                peer_comparison_title = "### Peer Comparison"
-                st.markdown(peer_comparison_title)
-                report += peer_comparison_title + NL2
-                repo_file.write(peer_comparison_title + NL2)
-
-                st.dataframe(comparison_df)
-                comparison_str = comparison_df.to_markdown()
-                report += comparison_str + NL2
-                repo_file.write(comparison_str + NL2)
-
-                # get recommendation from LLM
-                recommendation_title = "### AI Recommendation"
-                st.write(recommendation_title)
-                repo_file.write(recommendation_title + NL2)
-
-                recommendation = get_recommendation(client, symbol, report, peers)
-                st.write(recommendation)
-                repo_file.write(recommendation)
-
-                repo_file.flush()
+                report.text("### Peer Comparison")
+                report.table(comparison_df)
+
+                # get recommendation from LLM, for the report so far
+                prompt_report = report.to_markdown(prompt_only=True)
+                report.text("### AI Recommendation", in_prompt=False)
+                recommendation = get_recommendation(
+                    client, symbol, prompt_report, peers, hedging_policy
+                )
+                report.text(recommendation, in_prompt=False)
+
+        # save what we downloaded & computed, for historical & cross-company queries
+        save_to_analytics_store(
+            symbol, ticker, financials, balance_sheet, cash_flow, ratios, peers, provider,
+            markdown_file_path,
+        )
 
 
 if __name__ == "__main__":
+    # run as a script (streamlit run agents/analyze_company.py), utils/ is in the parent folder
+    sys.path.append(str(pathlib.Path(__file__).parent.parent))
     main()
\ No newline at end of file
@@ -13,69 +13,56 @@ At no point is this code/to be used as a replacement for sound
 financial investment advise from a Financial expert.
 """
 
-import os
-from dotenv import load_dotenv
 from textwrap import dedent
-import yaml
-import pathlib
-import streamlit as st
 
-from agno.agent import Agent
-from agno.models.google import Gemini
-import google.generativeai as genai
+from agents.registry import get_agent
+from utils.llm import get_gemini_llm
+from utils.prompts import load_prompts_from_config
 
-from agents.financial_analysis_agent import financial_analysis_agent
-from agents.peer_comparison_agent import peers_comparison_agent
-from agents.sentiment_analysis_agent import sentiment_analysis_agent
+# prompts are externalized to config/investment_analysis_prompts.yaml
+PROMPTS_FILE = "investment_analysis_prompts.yaml"
 
-from utils.llm import google_gemini_llm
 
+def create_investment_analysis_agent():
+    """
+    builds the agent - use agents.registry.get_agent("investment_analysis") to get the
+    shared (process-wide) instance
+    """
+    from agno.agent import Agent
 
-# Load environment variables and configure Gemini
-if os.environ.get("STREAMLIT_CLOUD"):
-    # when deploying to streamlit, read from st.secrets
-    os.environ["GOOGLE_API_KEY"] = st.secrets("GOOGLE_API_KEY")
-else:
-    # running locally - load from .env file
-    load_dotenv()
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    prompts = load_prompts_from_config(PROMPTS_FILE)["prompts"]
 
-config_file_path = (
-    pathlib.Path(__file__).parent.parent / "config/investment_analysis_prompts.yaml"
-)
-assert (
-    config_file_path.exists()
-), f"FATAL ERROR: configuration file {config_file_path} does not exist!"
-
-# load prompts from config/prompts.yaml
-# externalizing the prompts from code.
-config = None
-with open(str(config_file_path), "r") as f:
-    config = yaml.safe_load(f)
-
-if config is None:
-    raise RuntimeError(
-        f"FATAL ERROR: unable to read from configuration file at {config_file_path}"
+    agent = Agent(
+        name="Investment Analysis Agent",
+        # no output token limit for our agents
+        model=get_gemini_llm(max_output_tokens=None),
+        team=[
+            get_agent("financial_analysis"),
+            get_agent("peer_comparison"),
+            get_agent("sentiment_analysis"),
+        ],
+        # goal=dedent(
+        #     """
+        #     Based on the output from financial analysis, peers comparison and sentiment analysis
+        #     come up with an overall recommendation for the long term investment potential
+        #     of a company to potential investors.
+        #     """
+        # ),
+        goal=dedent(prompts["goal"]),
+        description=dedent(prompts["system_prompt"]),
+        instructions=dedent(prompts["investment_analysis_instructions"]),
+        expected_output=dedent(prompts["expected_output_format"]),
+        markdown=True,
+        show_tool_calls=True,
+        debug_mode=True,
+        # run metrics are reported per prompts file (see utils/run_metrics.py)
+        extra_data={"prompts_file": PROMPTS_FILE},
     )
+    return agent
 
 
-investment_analysis_agent = Agent(
-    name="Investment Analysis Agent",
-    model=Gemini(id="gemini-2.0-flash", temperature=0.0),
-    # model=google_gemini_llm,
-    team=[financial_analysis_agent, peers_comparison_agent, sentiment_analysis_agent],
-    # goal=dedent(
-    #     """
-    #     Based on the output from financial analysis, peers comparison and sentiment analysis
-    #     come up with an overall recommendation for the long term investment potential
-    #     of a company to potential investors.
-    #     """
-    # ),
-    goal=dedent(config["prompts"]["goal"]),
-    description=dedent(config["prompts"]["system_prompt"]),
-    instructions=dedent(config["prompts"]["investment_analysis_instructions"]),
-    expected_output=dedent(config["prompts"]["expected_output_format"]),
-    markdown=True,
-    show_tool_calls=True,
-    debug_mode=True,
-)
+def __getattr__(name: str):
+    # investment_analysis_agent used to be built at import time, now it is built on first use
+    if name == "investment_analysis_agent":
+        return get_agent("investment_analysis")
+    raise AttributeError(f"module {__name__} has no attribute {name}")
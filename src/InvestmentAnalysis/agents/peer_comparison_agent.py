@@ -14,71 +14,58 @@ Code is meant to be used for educational purposes only!
   advise from an experienced financial advisor.
 """
 
-import os
-from dotenv import load_dotenv
 from textwrap import dedent
-import yaml
-import pathlib
-import streamlit as st
 
-from agno.agent import Agent
-from agno.models.google import Gemini
-import google.generativeai as genai
+from agents.registry import get_agent
+from utils.llm import get_gemini_llm
+from utils.prompts import load_prompts_from_config
 
-from tools.financial_analysis_tools import FinancialAnalysisTools
-from tools.peer_comparison_tools import PeerComparisonTools
+# prompts are externalized to config/peer_comparison_prompts.yaml
+PROMPTS_FILE = "peer_comparison_prompts.yaml"
 
-from utils.llm import google_gemini_llm
 
-# Load environment variables and configure Gemini
-if os.environ.get("STREAMLIT_CLOUD"):
-    # when deploying to streamlit, read from st.secrets
-    os.environ["GOOGLE_API_KEY"] = st.secrets("GOOGLE_API_KEY")
-else:
-    # running locally - load from .env file
-    load_dotenv()
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+def create_peers_comparison_agent():
+    """
+    builds the agent - use agents.registry.get_agent("peer_comparison") to get the
+    shared (process-wide) instance
+    """
+    from agno.agent import Agent
+    from tools.financial_analysis_tools import FinancialAnalysisTools
+    from tools.peer_comparison_tools import PeerComparisonTools
 
-config_file_path = (
-    pathlib.Path(__file__).parent.parent / "config/peer_comparison_prompts.yaml"
-)
-assert (
-    config_file_path.exists()
-), f"FATAL ERROR: configuration file {config_file_path} does not exist!"
+    prompts = load_prompts_from_config(PROMPTS_FILE)["prompts"]
 
-# load prompts from config/prompts.yaml
-# externalizing the prompts from code.
-config = None
-with open(str(config_file_path), "r") as f:
-    config = yaml.safe_load(f)
-
-if config is None:
-    raise RuntimeError(
-        f"FATAL ERROR: unable to read from configuration file at {config_file_path}"
+    agent = Agent(
+        name="Peers Comparison Agent",
+        # no output token limit for our agents
+        model=get_gemini_llm(max_output_tokens=None),
+        tools=[
+            # use just the company info tool from Financial Analysis toolkit
+            FinancialAnalysisTools(liquidity_ratios=False, company_info=True),
+            PeerComparisonTools(),
+        ],
+        # goal=dedent(
+        #     """
+        #     Compare the latest financial performance of the company with its peers as
+        #     well as the industry benchmarks and come up with a comparison analysis of
+        #     how the company stands viz-a-viz its competitors and within the industry.
+        #     """
+        # ),
+        goal=dedent(prompts["goal"]),
+        description=dedent(prompts["system_prompt"]),
+        instructions=dedent(prompts["peer_comparison_instructions"]),
+        expected_output=dedent(prompts["expected_output_format"]),
+        markdown=True,
+        show_tool_calls=True,
+        debug_mode=True,
+        # run metrics are reported per prompts file (see utils/run_metrics.py)
+        extra_data={"prompts_file": PROMPTS_FILE},
     )
+    return agent
 
 
-peers_comparison_agent = Agent(
-    name="Peers Comparison Agent",
-    model=Gemini(id="gemini-2.0-flash", temperature=0.0),
-    # model=google_gemini_llm,
-    tools=[
-        # use just the company info tool from Financial Analysis toolkit
-        FinancialAnalysisTools(liquidity_ratios=False, company_info=True),
-        PeerComparisonTools(),
-    ],
-    # goal=dedent(
-    #     """
-    #     Compare the latest financial performance of the company with its peers as
-    #     well as the industry benchmarks and come up with a comparison analysis of
-    #     how the company stands viz-a-viz its competitors and within the industry.
-    #     """
-    # ),
-    goal=dedent(config["prompts"]["goal"]),
-    description=dedent(config["prompts"]["system_prompt"]),
-    instructions=dedent(config["prompts"]["peer_comparison_instructions"]),
-    expected_output=dedent(config["prompts"]["expected_output_format"]),
-    markdown=True,
-    show_tool_calls=True,
-    debug_mode=True,
-)
+def __getattr__(name: str):
+    # peers_comparison_agent used to be built at import time, now it is built on first use
+    if name == "peers_comparison_agent":
+        return get_agent("peer_comparison")
+    raise AttributeError(f"module {__name__} has no attribute {name}")
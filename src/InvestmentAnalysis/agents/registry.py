@@ -0,0 +1,64 @@
+"""
+registry.py - process-wide registry of our agents. Agents (with their models,
+    toolkits & prompts) are expensive to build and pull in heavy imports (agno,
+    google-genai, yfinance...), so each agent is built on first use by its factory
+    function and then shared by all callers.
+
+    Usage:
+        from agents.registry import get_agent
+        agent = get_agent("investment_analysis")
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import importlib
+import threading
+from typing import Any, Dict
+
+# agent name -> "module:factory function" (modules are only imported when needed)
+AGENT_FACTORIES: Dict[str, str] = {
+    "financial_analysis": "agents.financial_analysis_agent:create_financial_analysis_agent",
+    "peer_comparison": "agents.peer_comparison_agent:create_peers_comparison_agent",
+    "sentiment_analysis": "agents.sentiment_analysis_agent:create_sentiment_analysis_agent",
+    "investment_analysis": "agents.investment_analysis_agent:create_investment_analysis_agent",
+}
+
+_agents: Dict[str, Any] = {}
+# re-entrant, as building the investment analysis agent builds its team members
+_agents_lock = threading.RLock()
+
+
+def register_agent(name: str, factory: str):
+    """
+    registers (or replaces) the factory of an agent
+    Params:
+        name: name used with get_agent()
+        factory: "module:function" - function is called with no args & returns an Agent
+    """
+    with _agents_lock:
+        AGENT_FACTORIES[name] = factory
+        _agents.pop(name, None)
+
+
+def get_agent(name: str):
+    """returns the shared instance of agent name, building it on first use"""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+
+    with _agents_lock:
+        # double-checked, another thread may have built it while we waited
+        agent = _agents.get(name)
+        if agent is None:
+            if name not in AGENT_FACTORIES:
+                raise ValueError(
+                    f"FATAL ERROR: unknown agent {name}. Use one of {list(AGENT_FACTORIES.keys())}"
+                )
+            module_name, function_name = AGENT_FACTORIES[name].split(":")
+            factory = getattr(importlib.import_module(module_name), function_name)
+            agent = factory()
+            _agents[name] = agent
+    return agent
@@ -13,70 +13,53 @@ At no point is this code/to be used as a replacement for sound
 financial investment advise from a Financial expert.
 """
 
-import os
-from dotenv import load_dotenv
 from textwrap import dedent
-import yaml
-import pathlib
-import streamlit as st
 
-from agno.agent import Agent
-from agno.utils.log import logger
-from agno.models.google import Gemini
-import google.generativeai as genai
+from agents.registry import get_agent
+from utils.llm import get_gemini_llm
+from utils.prompts import load_prompts_from_config
 
-from tools.sentiment_analysis_tools import SentimentAnalysisTools
-from utils.llm import google_gemini_llm
+# prompts are externalized to config/sentiment_analysis_prompts.yaml
+PROMPTS_FILE = "sentiment_analysis_prompts.yaml"
 
-# Load environment variables and configure Gemini
-if os.environ.get("STREAMLIT_CLOUD"):
-    # when deploying to streamlit, read from st.secrets
-    logger.debug(
-        "Detected that I am running in Streamlit cloud. Fetching API key from st.secrets()"
-    )
-    os.environ["GOOGLE_API_KEY"] = st.secrets("GOOGLE_API_KEY")
-else:
-    # running locally - load from .env file
-    logger.debug("Detected stand-alone app. Fetching API key from .env file")
-    load_dotenv()
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
-config_file_path = (
-    pathlib.Path(__file__).parent.parent / "config/sentiment_analysis_prompts.yaml"
-)
-assert (
-    config_file_path.exists()
-), f"FATAL ERROR: configuration file {config_file_path} does not exist!"
+def create_sentiment_analysis_agent():
+    """
+    builds the agent - use agents.registry.get_agent("sentiment_analysis") to get the
+    shared (process-wide) instance
+    """
+    from agno.agent import Agent
+    from tools.sentiment_analysis_tools import SentimentAnalysisTools
 
-# load prompts from config/prompts.yaml
-# externalizing the prompts from code.
-config = None
-with open(str(config_file_path), "r") as f:
-    config = yaml.safe_load(f)
+    prompts = load_prompts_from_config(PROMPTS_FILE)["prompts"]
 
-if config is None:
-    raise RuntimeError(
-        f"FATAL ERROR: unable to read from configuration file at {config_file_path}"
+    agent = Agent(
+        name="Sentiment Analysis Agent",
+        # no output token limit for our agents
+        model=get_gemini_llm(max_output_tokens=None),
+        tools=[SentimentAnalysisTools()],
+        # goal=dedent(
+        #     """
+        #     Analyse latest company market news and determine the the overall market sentiment,
+        #     which will serve as an input for a recommendation of the long term investment potential
+        #     of the company.
+        # """
+        # ),
+        goal=dedent(prompts["goal"]),
+        description=dedent(prompts["system_prompt"]),
+        instructions=dedent(prompts["sentiment_analysis_prompt"]),
+        expected_output=dedent(prompts["expected_output_format"]),
+        markdown=True,
+        show_tool_calls=True,
+        debug_mode=True,
+        # run metrics are reported per prompts file (see utils/run_metrics.py)
+        extra_data={"prompts_file": PROMPTS_FILE},
     )
+    return agent
 
 
-sentiment_analysis_agent = Agent(
-    name="Sentiment Analysis Agent",
-    model=Gemini(id="gemini-2.0-flash", temperature=0.0),
-    # model=google_gemini_llm,
-    tools=[SentimentAnalysisTools()],
-    # goal=dedent(
-    #     """
-    #     Analyse latest company market news and determine the the overall market sentiment,
-    #     which will serve as an input for a recommendation of the long term investment potential
-    #     of the company.
-    # """
-    # ),
-    goal=dedent(config["prompts"]["goal"]),
-    description=dedent(config["prompts"]["system_prompt"]),
-    instructions=dedent(config["prompts"]["sentiment_analysis_prompt"]),
-    expected_output=dedent(config["prompts"]["expected_output_format"]),
-    markdown=True,
-    show_tool_calls=True,
-    debug_mode=True,
-)
+def __getattr__(name: str):
+    # sentiment_analysis_agent used to be built at import time, now it is built on first use
+    if name == "sentiment_analysis_agent":
+        return get_agent("sentiment_analysis")
+    raise AttributeError(f"module {__name__} has no attribute {name}")
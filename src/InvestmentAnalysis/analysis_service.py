@@ -0,0 +1,348 @@
+"""
+analysis_service.py - a lightweight local HTTP service, so several front ends & batch
+    jobs can share one warm process (agents, imports & caches) instead of each holding
+    their own agents in-process.
+
+    Endpoints:
+        POST /analyze/{symbol}[?force=1]  queues an investment analysis, returns 202 with
+                                          the job id (poll GET /jobs/{id} for the result).
+                                          An analysis of a symbol already queued or running
+                                          is not queued again - its job is returned instead.
+        GET  /jobs/{id}                   status (queued, running, completed or failed) of a
+                                          job, with its result once completed
+        GET  /ratios/{symbol}             ratio tables of symbol
+        GET  /peers/{symbol}[?symbols=A,B] peer comparison table of symbol (peers default to
+                                          the ones picked in the last analysis of symbol)
+        GET  /health                      queue depth & jobs running
+    GET /ratios & /peers accept ?format=json (default), csv, tsv or markdown (tables as text).
+
+    All requests are served by a shared pool of worker threads fed by a bounded queue.
+    When the queue is full, requests are rejected with 503 & a Retry-After header
+    (backpressure), rather than piling up. GET /ratios & /peers wait for their job
+    (up to --wait seconds, else 202 with the job id, like POST /analyze).
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python analysis_service.py --port 8080 --workers 4 --queue-size 32
+        curl -X POST localhost:8080/analyze/TCS.NS
+        curl localhost:8080/jobs/<job id>
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import json
+import time
+import uuid
+import queue
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from agno.utils.log import logger
+
+from investment_analysis_batch import run_investment_analysis
+from utils.analysis_cache import AnalysisCache
+from utils.tracing import Trace
+from utils.network_accounting import NetworkAccount
+
+# finished jobs kept for polling
+MAX_FINISHED_JOBS = 1000
+RATIO_TABLES = {
+    "liquidity": "calculate_liquidity_ratios",
+    "profitability": "calculate_profitability_ratios",
+    "efficiency": "calculate_efficiency_ratios",
+    "valuation": "calculate_valuation_ratios",
+    "leverage": "calculate_leverage_ratios",
+    "performance_and_growth": "calculate_performance_and_growth_metrics",
+}
+
+
+class QueueFullError(Exception):
+    """raised when the request queue is full (HTTP 503)"""
+
+
+class AnalysisService:
+    """
+    shared worker pool & bounded job queue behind the HTTP endpoints
+        workers: worker threads (max. concurrent jobs)
+        queue_size: max. jobs waiting for a worker
+        analysis_cache: past analyses, re-used when their inputs are unchanged
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 32,
+        analysis_cache: Optional[AnalysisCache] = None,
+    ):
+        self.analysis_cache = analysis_cache or AnalysisCache()
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=queue_size)
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        # (kind, symbol) -> id of queued/running job, to dedupe analyses
+        self._active: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._running = 0
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"service-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self, kind: str, symbol: str, body: Callable[[], Any], dedupe: bool = False
+    ) -> dict:
+        """
+        queues body() as a job, returns the job (a dict)
+        raises QueueFullError if the queue is full
+        """
+        with self._lock:
+            if dedupe and (kind, symbol) in self._active:
+                return self._jobs[self._active[(kind, symbol)]]
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "symbol": symbol,
+                "status": "queued",
+                "submitted": time.time(),
+                "done": threading.Event(),
+                "body": body,
+            }
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"{self._queue.maxsize} jobs are already waiting")
+            self._jobs[job["id"]] = job
+            if dedupe:
+                self._active[(kind, symbol)] = job["id"]
+            self._evict_finished_jobs()
+        return job
+
+    def _evict_finished_jobs(self):
+        finished = [j for j in self._jobs.values() if j["done"].is_set()]
+        for job in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job["id"]]
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                job["status"], job["started"] = "running", time.time()
+                self._running += 1
+            # jobs are read by the HTTP threads, so they're only changed under the lock
+            updates = {}
+            try:
+                updates = {"result": job["body"](), "status": "completed"}
+            except Exception as e:
+                logger.warning(f"{job['kind']} job for {job['symbol']} failed: {e}")
+                updates = {"status": "failed", "error": str(e), "error_type": type(e).__name__}
+            finally:
+                with self._lock:
+                    job.update(updates, finished=time.time())
+                    self._running -= 1
+                    if self._active.get((job["kind"], job["symbol"])) == job["id"]:
+                        del self._active[(job["kind"], job["symbol"])]
+                job["done"].set()
+
+    def job(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def public(self, job_id: str) -> Optional[dict]:
+        """snapshot of a job as returned to clients (None if unknown)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k not in ("done", "body")}
+
+    def health(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "running": self._running,
+            "workers": len(self._workers),
+        }
+
+    # -------------------------------------------------------------------------
+    # job bodies
+    # -------------------------------------------------------------------------
+
+    def analyze(self, symbol: str, force: bool = False) -> dict:
+        with Trace("analysis", symbol=symbol) as trace, NetworkAccount(symbol=symbol) as network:
+            result = self.analysis_cache.analyze(
+                symbol, lambda: run_investment_analysis(symbol), force=force
+            )
+        return {
+            "trace_id": trace.trace_id,
+            "network": network.totals(),
+            "analysis": result.analysis,
+            "cached": result.cached,
+            "changed_inputs": result.changed_inputs,
+            "peers": result.peers,
+            "created": result.created,
+        }
+
+    def ratios(self, symbol: str, output_format: str) -> Any:
+        from tools import ratios
+
+        tables = {name: getattr(ratios, f)(symbol) for name, f in RATIO_TABLES.items()}
+        return {name: serialize_table(df, output_format) for name, df in tables.items()}
+
+    def peers(self, symbol: str, peers: Optional[list], output_format: str) -> Any:
+        from tools.peer_comparison_tools import PeerComparisonTools
+
+        if not peers:
+            latest = self.analysis_cache.latest(symbol)
+            if latest is None or not latest.peers:
+                raise LookupError(
+                    f"no peers known for {symbol} - analyze it first or pass ?symbols=..."
+                )
+            peers = latest.peers
+        symbols = [symbol] + [p for p in peers if p != symbol]
+        df = PeerComparisonTools().calculate_peer_comparison(symbols)
+        return serialize_table(df, output_format)
+
+
+def serialize_table(df: pd.DataFrame, output_format: str) -> Any:
+    """DataFrame as JSON-able dict (rows keyed by index) or csv/markdown text"""
+    from tools.formatting import format_table
+
+    if output_format == "json":
+        df = df.set_axis([str(i)[:10] if hasattr(i, "year") else str(i) for i in df.index])
+        return json.loads(df.to_json(orient="index"))
+    return format_table(df, output_format)
+
+
+def make_handler(service: AnalysisService, wait_seconds: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, payload: Any, status: int = 200, headers: Optional[dict] = None):
+            is_text = isinstance(payload, str)
+            data = (payload if is_text else json.dumps(payload, default=str)).encode("utf-8")
+            self.send_response(status)
+            content_type = "text/plain; charset=utf-8" if is_text else "application/json"
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str, headers: Optional[dict] = None):
+            self._send({"error": message}, status, headers)
+
+        def _accepted(self, job: dict):
+            self._send(
+                {"id": job["id"], "status": job["status"], "status_url": f"/jobs/{job['id']}"},
+                202,
+                {"Location": f"/jobs/{job['id']}"},
+            )
+
+        def _submit(self, kind: str, symbol: str, body: Callable[[], Any], dedupe: bool = False):
+            try:
+                return service.submit(kind, symbol, body, dedupe)
+            except QueueFullError as e:
+                self._error(503, f"server busy, {e}", {"Retry-After": "5"})
+                return None
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "analyze":
+                return self._error(404, f"unknown path {url.path}")
+            symbol = parts[1].upper()
+            force = parse_qs(url.query).get("force", ["0"])[0] in ("1", "true")
+            job = self._submit(
+                "analyze", symbol, lambda: service.analyze(symbol, force), dedupe=not force
+            )
+            if job is not None:
+                self._accepted(job)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+
+            if parts == ["health"]:
+                return self._send(service.health())
+            if len(parts) != 2:
+                return self._error(404, f"unknown path {url.path}")
+
+            if parts[0] == "jobs":
+                job = service.public(parts[1])
+                if job is None:
+                    return self._error(404, f"unknown job {parts[1]}")
+                return self._send(job)
+
+            symbol = parts[1].upper()
+            output_format = params.get("format", ["json"])[0]
+            if output_format not in ("json", "csv", "tsv", "markdown"):
+                return self._error(400, f"unsupported format {output_format}")
+            if parts[0] == "ratios":
+                job = self._submit(
+                    "ratios", symbol, lambda: service.ratios(symbol, output_format)
+                )
+            elif parts[0] == "peers":
+                peers = [
+                    p.strip().upper() for p in params.get("symbols", [""])[0].split(",") if p.strip()
+                ]
+                job = self._submit(
+                    "peers", symbol, lambda: service.peers(symbol, peers, output_format)
+                )
+            else:
+                return self._error(404, f"unknown path {url.path}")
+            if job is None:
+                return
+
+            if not job["done"].wait(wait_seconds):
+                return self._accepted(job)
+            if job["status"] == "failed":
+                status = 404 if job["error_type"] == "LookupError" else 500
+                return self._error(status, job["error"])
+            self._send(job["result"])
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} - {format % args}")
+
+    return Handler
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 4,
+    queue_size: int = 32,
+    wait_seconds: float = 60.0,
+    analysis_cache: Optional[AnalysisCache] = None,
+) -> ThreadingHTTPServer:
+    service = AnalysisService(workers, queue_size, analysis_cache)
+    server = ThreadingHTTPServer((host, port), make_handler(service, wait_seconds))
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP investment analysis service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="concurrent jobs")
+    parser.add_argument("--queue-size", type=int, default=32, help="max. waiting jobs")
+    parser.add_argument(
+        "--wait", type=float, default=60.0, help="seconds GET /ratios & /peers wait for results"
+    )
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers, args.queue_size, args.wait)
+    print(f"Analysis service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,167 @@
+"""
+arrow_benchmark.py - time & peak memory per symbol of the ratio tables of a large panel
+    of (synthetic fixture) companies, computed two ways:
+        - pandas: the calculate_X functions of tools/ratios.py, symbol by symbol
+        - arrow: tools/arrow_ratios.py - statements fetched once per symbol into one Arrow
+          panel, all ratios computed over it, then each table converted for presentation
+    Both end with format_table() of every ratio table (what the tools return to the LLM).
+    Each mode runs in a fresh Python process, so peak memory isn't shared between them:
+        - python peak: tracemalloc peak (Python objects & NumPy/pandas buffers), in a
+          second (untimed) run
+        - arrow peak: high-water mark of Arrow's memory pool (not seen by tracemalloc)
+        - rss growth: growth of the max. resident set size during the timed run
+    Fixtures are generated before measuring. With --check, the arrow ratios are compared
+    with the pandas ones for every symbol & table first.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.arrow_benchmark --symbols 1000 --check
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import subprocess
+import tracemalloc
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.fixtures import use_fixtures
+from tools import ratios
+from tools.arrow_ratios import (
+    RATIO_CATEGORIES,
+    calculate_ratio_table,
+    ratio_frame,
+    statement_panel,
+    symbol_rows,
+)
+from tools.formatting import format_table
+
+MODES = ["pandas", "arrow"]
+# category of tools/arrow_ratios.py -> calculate_X function in tools/ratios.py
+PANDAS_FUNCTIONS = {
+    category: f"calculate_{category}_ratios" for category in RATIO_CATEGORIES
+} | {"performance_and_growth": "calculate_performance_and_growth_metrics"}
+
+
+def panel_symbols(count: int) -> List[str]:
+    return [f"PANEL{i:04d}.NS" for i in range(count)]
+
+
+def run_pandas(symbols: List[str]) -> int:
+    """ratio tables of tools/ratios.py (formatted), returns the number of tables"""
+    tables = 0
+    for symbol in symbols:
+        for function in PANDAS_FUNCTIONS.values():
+            try:
+                format_table(getattr(ratios, function)(symbol))
+                tables += 1
+            except Exception:
+                # e.g. no inventory - the tool would return an error text
+                continue
+    return tables
+
+
+def run_arrow(symbols: List[str]) -> int:
+    """ratio tables of tools/arrow_ratios.py (formatted), returns the number of tables"""
+    panel = statement_panel(symbols)
+    ratio_table = calculate_ratio_table(panel)
+    rows = symbol_rows(ratio_table)
+    tables = 0
+    for symbol in rows:
+        for category in RATIO_CATEGORIES:
+            format_table(ratio_frame(ratio_table, symbol, category, rows, panel))
+            tables += 1
+    return tables
+
+
+def check(symbols: List[str]) -> int:
+    """compares the arrow ratios with the pandas ones, returns the number of mismatches"""
+    ratio_table = calculate_ratio_table(statement_panel(symbols))
+    rows = symbol_rows(ratio_table)
+    mismatches = 0
+    for symbol in symbols:
+        for category, function in PANDAS_FUNCTIONS.items():
+            expected = getattr(ratios, function)(symbol)
+            actual = ratio_frame(ratio_table, symbol, category, rows)
+            expected = expected.reindex(index=actual.index, columns=actual.columns)
+            if not np.allclose(
+                expected.to_numpy(dtype=np.float64), actual.to_numpy(dtype=np.float64), equal_nan=True
+            ):
+                print(f"MISMATCH {symbol} {category}", file=sys.stderr)
+                mismatches += 1
+    return mismatches
+
+
+def measure_mode(mode: str, count: int) -> dict:
+    """runs mode over count symbols (in this process) - see module docstring"""
+    symbols = panel_symbols(count)
+    run = run_pandas if mode == "pandas" else run_arrow
+    with use_fixtures():
+        # generate the fixtures (& warm up imports) before measuring
+        run(symbols[:2])
+        for symbol in symbols:
+            ratios.yf.Ticker(symbol)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        tables = run(symbols)
+        seconds = time.perf_counter() - start
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+        tracemalloc.start()
+        run(symbols)
+        python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "mode": mode,
+        "symbols": count,
+        "tables": tables,
+        "seconds": seconds,
+        "ms/symbol": 1000 * seconds / count,
+        "python peak (MB)": python_peak / 2**20,
+        "arrow peak (MB)": pa.default_memory_pool().max_memory() / 2**20,
+        # ru_maxrss is in KB on Linux
+        "rss growth (MB)": rss_growth / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ratio tables: pandas vs. Arrow data path")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--mode", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--check", action="store_true", help="compare arrow & pandas ratios first")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # our tools log every call
+    logging.getLogger("agno").disabled = True
+
+    if args.child:
+        print(json.dumps(measure_mode(args.mode[0], args.symbols)))
+        sys.exit(0)
+
+    if args.check:
+        with use_fixtures():
+            mismatches = check(panel_symbols(min(args.symbols, 100)))
+        print(f"Checked {min(args.symbols, 100)} symbols: {mismatches} mismatched tables")
+        if mismatches:
+            sys.exit(1)
+
+    results = []
+    for mode in args.mode:
+        command = [sys.executable, "-m", "benchmarks.arrow_benchmark", "--child"]
+        command += ["--mode", mode, "--symbols", str(args.symbols)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{mode:8s} {results[-1]['ms/symbol']:8.2f} ms/symbol", flush=True)
+    print(pd.DataFrame(results).round(2).to_markdown(index=False))
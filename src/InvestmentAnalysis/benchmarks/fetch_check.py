@@ -0,0 +1,63 @@
+"""
+fetch_check.py - checks how often our tools read each yf.Ticker attribute per symbol
+    (every read is a request to Yahoo! Finance), using fixture tickers, which count their
+    reads (see benchmarks/fixtures.py). Exits with 1 if a tool reads any attribute more
+    (or less) often than EXPECTED_FETCHES says.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.fetch_check --symbols 5
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import sys
+import logging
+import argparse
+from typing import Callable, Dict, List
+
+from benchmarks.fixtures import use_fixtures
+from tools.peer_comparison_tools import FETCH_PLAN, PeerComparisonTools
+
+# tool -> yf.Ticker attribute -> reads per symbol (attributes not listed: none)
+EXPECTED_FETCHES: Dict[str, Dict[str, int]] = {
+    "peer_comparison": {**{statement: 1 for statement in FETCH_PLAN}, "info": 1},
+}
+
+
+def tool_runs() -> Dict[str, Callable[[List[str]], object]]:
+    """tool -> function running it for a list of symbols"""
+    peers = PeerComparisonTools()
+    return {"peer_comparison": peers.get_peer_comparison_and_industry_benchmarks}
+
+
+def check_fetches(symbols: List[str]) -> int:
+    """runs each tool of EXPECTED_FETCHES over symbols, returns the number of mismatches"""
+    mismatches = 0
+    with use_fixtures() as fixtures:
+        for tool, run in tool_runs().items():
+            for ticker in fixtures.values():
+                ticker.calls.clear()
+            run(symbols)
+            for symbol in symbols:
+                calls = dict(fixtures[symbol].calls)
+                if calls != EXPECTED_FETCHES[tool]:
+                    print(f"MISMATCH {tool} {symbol}: {calls}", file=sys.stderr)
+                    mismatches += 1
+            print(f"{tool}: {dict(fixtures[symbols[0]].calls)} per symbol")
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check yf.Ticker reads per symbol of our tools")
+    parser.add_argument("--symbols", type=int, default=5)
+    args = parser.parse_args()
+
+    # our tools log every call
+    logging.getLogger("agno").disabled = True
+
+    mismatches = check_fetches([f"PEER{i:03d}.NS" for i in range(args.symbols)])
+    print(f"{mismatches} mismatched symbols")
+    sys.exit(1 if mismatches else 0)
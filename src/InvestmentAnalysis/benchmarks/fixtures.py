@@ -0,0 +1,344 @@
+"""
+fixtures.py - recorded (or synthetic) Yahoo! Finance data for offline benchmarks.
+    A fixture is a folder per symbol holding the annual statements (as CSV),
+    ticker.info & news (as JSON) and daily price history (as CSV), i.e. everything
+    our tools read from a yf.Ticker. Replaying fixtures with `use_fixtures()`
+    makes benchmark runs repeatable and independent of Yahoo! Finance.
+
+    Record fixtures (needs network access to Yahoo! Finance):
+        python -m benchmarks.fixtures AAPL MSFT TCS.NS INFY.NS
+
+    When no recording exists for a symbol, a synthetic (but realistically shaped)
+    fixture is generated, seeded by the symbol, so runs are still deterministic.
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import json
+import pathlib
+import zlib
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures"
+
+# statements we record, yf.Ticker attribute -> file name
+STATEMENTS = {
+    "balance_sheet": "balance_sheet.csv",
+    "financials": "financials.csv",
+    "income_stmt": "income_stmt.csv",
+    "cash_flow": "cash_flow.csv",
+}
+
+
+class FixtureTicker:
+    """
+    stand-in for yf.Ticker, serving data from a fixture instead of Yahoo! Finance - reads
+    are counted per attribute in .calls (each would be a request to Yahoo! Finance)
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        statements: Dict[str, pd.DataFrame],
+        info: dict,
+        news: List[dict],
+        history: pd.DataFrame,
+    ):
+        self.ticker = symbol
+        self._statements = statements
+        self._info = info
+        self._news = news
+        self._history = history
+        self.calls: Counter = Counter()
+
+    @property
+    def info(self) -> dict:
+        self.calls["info"] += 1
+        return self._info
+
+    @property
+    def balance_sheet(self) -> pd.DataFrame:
+        self.calls["balance_sheet"] += 1
+        return self._statements["balance_sheet"].copy()
+
+    @property
+    def financials(self) -> pd.DataFrame:
+        self.calls["financials"] += 1
+        return self._statements["financials"].copy()
+
+    @property
+    def income_stmt(self) -> pd.DataFrame:
+        self.calls["income_stmt"] += 1
+        return self._statements["income_stmt"].copy()
+
+    @property
+    def cash_flow(self) -> pd.DataFrame:
+        self.calls["cash_flow"] += 1
+        return self._statements["cash_flow"].copy()
+
+    # yfinance aliases
+    balancesheet = balance_sheet
+    incomestmt = income_stmt
+    cashflow = cash_flow
+
+    @property
+    def news(self) -> List[dict]:
+        self.calls["news"] += 1
+        return self._news
+
+    def get_news(self, count: int = 10, **kwargs) -> List[dict]:
+        self.calls["news"] += 1
+        return self._news[:count]
+
+    def history(self, period: str = "1mo", **kwargs) -> pd.DataFrame:
+        self.calls["history"] += 1
+        if period == "max":
+            return self._history.copy()
+        lookback = {"d": 1, "mo": 21, "y": 252}
+        for unit, bars in lookback.items():
+            if period.endswith(unit) and period[: -len(unit)].isdigit():
+                return self._history.tail(int(period[: -len(unit)]) * bars).copy()
+        return self._history.copy()
+
+
+def record_fixture(symbol: str, fixtures_dir: pathlib.Path = FIXTURES_DIR) -> pathlib.Path:
+    """
+    downloads everything our tools read for symbol from Yahoo! Finance and saves it
+    Returns:
+        path of the fixture folder
+    """
+    ticker = yfinance.Ticker(symbol)
+    fixture_dir = fixtures_dir / symbol
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+
+    for attr, file_name in STATEMENTS.items():
+        getattr(ticker, attr).to_csv(fixture_dir / file_name)
+    with open(fixture_dir / "info.json", "w", encoding="utf-8") as f:
+        json.dump(ticker.info, f, indent=2, default=str)
+    with open(fixture_dir / "news.json", "w", encoding="utf-8") as f:
+        json.dump(ticker.get_news(count=25), f, indent=2, default=str)
+    ticker.history(period="10y").to_csv(fixture_dir / "history.csv")
+    return fixture_dir
+
+
+def load_fixture(
+    symbol: str, fixtures_dir: pathlib.Path = FIXTURES_DIR
+) -> Optional[FixtureTicker]:
+    """loads a recorded fixture for symbol, returns None if it was never recorded"""
+    fixture_dir = fixtures_dir / symbol
+    if not fixture_dir.exists():
+        return None
+
+    statements = {}
+    for attr, file_name in STATEMENTS.items():
+        statement = pd.read_csv(fixture_dir / file_name, index_col=0)
+        statement.columns = pd.to_datetime(statement.columns)
+        statements[attr] = statement
+    with open(fixture_dir / "info.json", "r", encoding="utf-8") as f:
+        info = json.load(f)
+    with open(fixture_dir / "news.json", "r", encoding="utf-8") as f:
+        news = json.load(f)
+    history = pd.read_csv(fixture_dir / "history.csv", index_col=0)
+    history.index = pd.to_datetime(history.index, utc=True)
+    return FixtureTicker(symbol, statements, info, news, history)
+
+
+@lru_cache(maxsize=8)
+def _trading_days(history_days: int) -> pd.DatetimeIndex:
+    # bdate_range is slow (~50ms) & the same for every symbol (DatetimeIndex is immutable)
+    return pd.bdate_range(end="2024-12-31", periods=history_days, tz="UTC")
+
+
+_POSITIVE_WORDS = ["strong", "record", "beats", "upgrade", "growth", "excellent"]
+_NEGATIVE_WORDS = ["weak", "misses", "downgrade", "decline", "lawsuit", "poor"]
+
+
+def synthetic_fixture(
+    symbol: str, years: int = 4, news_count: int = 25, history_days: int = 2520
+) -> FixtureTicker:
+    """
+    generates a deterministic (seeded by symbol) fixture with the same line items,
+    info fields and news layout as Yahoo! Finance returns.
+    """
+    rng = np.random.default_rng(zlib.crc32(symbol.encode("utf-8")))
+    # yfinance returns statements with the most recent year first
+    periods = pd.DatetimeIndex(
+        [pd.Timestamp(year=2024 - i, month=3, day=31) for i in range(years)]
+    )
+    growth = np.cumprod(rng.uniform(0.9, 1.2, years))[::-1]
+    revenue = rng.uniform(1e9, 5e11) * growth
+    cost_of_revenue = revenue * rng.uniform(0.4, 0.7)
+    operating_income = revenue * rng.uniform(0.05, 0.3, years)
+    ebit = operating_income * rng.uniform(0.95, 1.05, years)
+    interest_expense = ebit * rng.uniform(0.01, 0.1, years)
+    net_income = ebit * rng.uniform(0.6, 0.8, years)
+    total_assets = revenue * rng.uniform(0.6, 1.5)
+    current_assets = total_assets * rng.uniform(0.3, 0.6, years)
+    current_liabilities = current_assets / rng.uniform(1.0, 3.0, years)
+    equity = total_assets * rng.uniform(0.4, 0.7, years)
+    shares = np.full(years, np.round(rng.uniform(1e8, 5e9)))
+
+    balance_sheet = {
+        "Current Assets": current_assets,
+        "Current Liabilities": current_liabilities,
+        "Cash And Cash Equivalents": current_assets * rng.uniform(0.1, 0.4, years),
+        "Total Assets": total_assets,
+        "Stockholders Equity": equity,
+        "Total Debt": equity * rng.uniform(0.05, 1.5, years),
+        "Ordinary Shares Number": shares,
+        "Common Stock": shares * rng.uniform(1, 10),
+    }
+    if rng.random() < 0.5:
+        # some companies do not report inventory
+        balance_sheet["Inventory"] = current_assets * rng.uniform(0.05, 0.3, years)
+    income_stmt = {
+        "Total Revenue": revenue,
+        "Cost Of Revenue": cost_of_revenue,
+        "Operating Income": operating_income,
+        "EBIT": ebit,
+        "Interest Expense": interest_expense,
+        "Net Income": net_income,
+    }
+    operating_cash_flow = net_income * rng.uniform(0.9, 1.4, years)
+    capital_expenditure = -operating_cash_flow * rng.uniform(0.1, 0.5, years)
+    cash_flow = {
+        "Operating Cash Flow": operating_cash_flow,
+        "Capital Expenditure": capital_expenditure,
+        "Free Cash Flow": operating_cash_flow + capital_expenditure,
+    }
+
+    def statement(line_items: Dict[str, np.ndarray]) -> pd.DataFrame:
+        return pd.DataFrame(line_items, index=periods).transpose()
+
+    statements = {
+        "balance_sheet": statement(balance_sheet),
+        "financials": statement(income_stmt),
+        "income_stmt": statement(income_stmt),
+        "cash_flow": statement(cash_flow),
+    }
+
+    dates = _trading_days(history_days)
+    close = rng.uniform(20, 2000) * np.exp(
+        np.cumsum(rng.normal(0.0003, 0.018, history_days))
+    )
+    high = close * (1 + np.abs(rng.normal(0, 0.01, history_days)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, history_days)))
+    history = pd.DataFrame(
+        {
+            "Open": (high + low) / 2,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": rng.integers(1e5, 5e7, history_days),
+        },
+        index=dates,
+    )
+
+    name = f"{symbol.split('.')[0].title()} Industries Ltd"
+    summary = (
+        f"{name} designs, manufactures and sells products and services across "
+        f"multiple business segments worldwide. The company was founded in "
+        f"{rng.integers(1900, 2000)} and is headquartered in Springfield."
+    )
+    market_cap = float(net_income[0] * rng.uniform(10, 40))
+    info = {
+        "symbol": symbol,
+        "shortName": name,
+        "longName": name,
+        "longBusinessSummary": summary,
+        "currency": "USD",
+        "regularMarketPrice": float(close[-1]),
+        "currentPrice": float(close[-1]),
+        "marketCap": market_cap,
+        "enterpriseValue": market_cap * rng.uniform(0.9, 1.1),
+        "sector": "Technology",
+        "industry": "Information Technology Services",
+        "industryDisp": "Information Technology Services",
+        "address1": "1 Main Street",
+        "city": "Springfield",
+        "state": "IL",
+        "zip": "62701",
+        "country": "United States",
+        "trailingEps": float(net_income[0] / shares[0]),
+        "trailingPE": float(close[-1] / (net_income[0] / shares[0])),
+        "fiftyTwoWeekLow": float(close[-252:].min()),
+        "fiftyTwoWeekHigh": float(close[-252:].max()),
+        "fiftyDayAverage": float(close[-50:].mean()),
+        "twoHundredDayAverage": float(close[-200:].mean()),
+        "website": f"https://www.{symbol.split('.')[0].lower()}.com",
+        "recommendationKey": "buy",
+        "numberOfAnalystOpinions": int(rng.integers(5, 40)),
+        "fullTimeEmployees": int(rng.integers(1_000, 500_000)),
+        "totalCash": float(balance_sheet["Cash And Cash Equivalents"][0]),
+        "freeCashflow": float(cash_flow["Free Cash Flow"][0]),
+        "operatingCashflow": float(operating_cash_flow[0]),
+        "ebitda": float(ebit[0] * 1.1),
+        "revenueGrowth": float(revenue[0] / revenue[1] - 1) if years > 1 else 0.0,
+        "grossMargins": float(1 - cost_of_revenue[0] / revenue[0]),
+        "ebitdaMargins": float(ebit[0] * 1.1 / revenue[0]),
+    }
+
+    news = []
+    for i in range(news_count):
+        word = rng.choice(_POSITIVE_WORDS if rng.random() < 0.6 else _NEGATIVE_WORDS)
+        news.append(
+            {
+                "id": f"{symbol}-{i}",
+                "content": {
+                    "title": f"{name} reports {word} quarter ({i})",
+                    "summary": f"Analysts see {word} results for {name} as the market reacts "
+                    f"to its latest earnings and guidance.",
+                    "clickThroughUrl": {"url": f"https://finance.example.com/{symbol}/{i}"},
+                },
+            }
+        )
+
+    return FixtureTicker(symbol, statements, info, news, history)
+
+
+def fixture_ticker(symbol: str, fixtures_dir: pathlib.Path = FIXTURES_DIR) -> FixtureTicker:
+    """recorded fixture for symbol if there is one, a synthetic one otherwise"""
+    return load_fixture(symbol, fixtures_dir) or synthetic_fixture(symbol)
+
+
+@contextmanager
+def use_fixtures(fixtures_dir: pathlib.Path = FIXTURES_DIR):
+    """
+    replaces yfinance.Ticker with fixture tickers within the with block, so all our
+    tools (which call yf.Ticker(symbol)) read fixtures instead of Yahoo! Finance.
+    Fixtures are loaded once per symbol and shared within the block.
+    """
+    cache: Dict[str, FixtureTicker] = {}
+
+    def make_ticker(symbol: str, *args, **kwargs) -> FixtureTicker:
+        if symbol not in cache:
+            cache[symbol] = fixture_ticker(symbol, fixtures_dir)
+        return cache[symbol]
+
+    original = yfinance.Ticker
+    yfinance.Ticker = make_ticker
+    try:
+        yield cache
+    finally:
+        yfinance.Ticker = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Yahoo! Finance fixtures")
+    parser.add_argument("symbols", nargs="+", help="symbols to record (as on Yahoo! Finance)")
+    parser.add_argument("--fixtures-dir", type=pathlib.Path, default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    for symbol in args.symbols:
+        print(f"Recorded {symbol} -> {record_fixture(symbol.upper(), args.fixtures_dir)}")
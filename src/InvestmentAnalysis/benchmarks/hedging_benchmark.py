@@ -0,0 +1,101 @@
+"""
+hedging_benchmark.py - measures tail latency of get_model_completion() with & without
+    a HedgingPolicy, against local stand-in LLM endpoints (see mock_llm.py):
+    the primary endpoint usually responds fast, but stalls on some requests, the
+    secondary endpoint is a little slower but consistent.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.hedging_benchmark --requests 200 --stall-probability 0.1
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from openai import OpenAI
+
+from agents import analyze_company
+from agents.analyze_company import ChatModel, HedgingPolicy, get_model_completion
+from benchmarks.mock_llm import MockLLMServer
+
+
+def run_requests(
+    primary: ChatModel, hedging_policy, requests: int, concurrency: int
+) -> np.ndarray:
+    """latencies (seconds) of requests completions made with concurrency threads"""
+
+    def timed_request(i: int) -> float:
+        start = time.perf_counter()
+        get_model_completion(primary, f"prompt {i}", hedging_policy)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return np.array(list(executor.map(timed_request, range(requests))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail latency with & without hedging")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stall-probability", type=float, default=0.1)
+    parser.add_argument("--stall-seconds", type=float, default=3.0)
+    parser.add_argument("--percentile", type=float, default=90.0)
+    args = parser.parse_args()
+
+    # random.Random (unlike numpy Generators) is safe to share across server threads
+    rng = random.Random(42)
+    primary_server = MockLLMServer(
+        latency=lambda: (
+            args.stall_seconds
+            if rng.random() < args.stall_probability
+            else rng.lognormvariate(np.log(0.1), 0.3)
+        )
+    ).start()
+    secondary_server = MockLLMServer(
+        latency=lambda: rng.lognormvariate(np.log(0.2), 0.2)
+    ).start()
+
+    primary = ChatModel(
+        "OpenAI", "mock-primary", OpenAI(base_url=primary_server.base_url, api_key="mock")
+    )
+    secondary = ChatModel(
+        "OpenAI",
+        "mock-secondary",
+        OpenAI(base_url=secondary_server.base_url, api_key="mock"),
+    )
+    policy = HedgingPolicy(secondary=secondary, percentile=args.percentile, initial_delay=0.5)
+
+    results = {}
+    results["no hedging"] = run_requests(primary, None, args.requests, args.concurrency)
+    analyze_company.hedging_stats.update(requests=0, hedged=0, secondary_wins=0)
+    results[f"hedged @ p{args.percentile:g}"] = run_requests(
+        primary, policy, args.requests, args.concurrency
+    )
+
+    df = pd.DataFrame(
+        {
+            name: {
+                "p50 (s)": np.percentile(latencies, 50),
+                "p95 (s)": np.percentile(latencies, 95),
+                "p99 (s)": np.percentile(latencies, 99),
+                "max (s)": latencies.max(),
+            }
+            for name, latencies in results.items()
+        }
+    ).transpose()
+    print(df.round(3).to_markdown())
+    print(f"Hedging stats: {analyze_company.hedging_stats}")
+    print(
+        f"Requests served - primary: {primary_server.requests}, secondary: {secondary_server.requests}"
+    )
+
+    primary_server.stop()
+    secondary_server.stop()
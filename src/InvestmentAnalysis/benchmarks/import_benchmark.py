@@ -0,0 +1,99 @@
+"""
+import_benchmark.py - measures cold-start time of our entry points, each in a fresh
+    Python process (median of --repeat runs):
+        - agents: import of agents.investment_analysis_agent
+        - console: investment_analysis_console.py up to its first prompt (we answer "quit")
+        - streamlit: first render of investment_analysis_streamlit.py (with streamlit's AppTest)
+    With --importtime, also lists the modules with the largest cumulative import time
+    (python -X importtime) for the console entry point.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.import_benchmark --repeat 5
+    To compare with another version of the code, check it out to a separate folder
+    (e.g. git worktree add /tmp/baseline <commit>) and pass its src folder:
+        python -m benchmarks.import_benchmark --src /tmp/baseline/src/InvestmentAnalysis
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import sys
+import time
+import pathlib
+import argparse
+import subprocess
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = pathlib.Path(__file__).parent.parent
+
+ENTRY_POINTS = {
+    "agents": ["-c", "import agents.investment_analysis_agent"],
+    "console": ["investment_analysis_console.py"],
+    "streamlit": [
+        "-c",
+        "from streamlit.testing.v1 import AppTest; "
+        "AppTest.from_file('investment_analysis_streamlit.py', default_timeout=120).run()",
+    ],
+}
+
+
+def run_entry_point(args: List[str], src_dir: pathlib.Path, importtime: bool = False):
+    """runs python with args in src_dir, returns (seconds, stderr)"""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    start = time.perf_counter()
+    result = subprocess.run(
+        command,
+        cwd=src_dir,
+        input="quit\n",
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"FATAL ERROR: {' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def slowest_imports(stderr: str, top: int) -> pd.DataFrame:
+    """top modules by cumulative import time, from python -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # import time:  self [us] | cumulative | imported package
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((module.strip(), int(self_us) / 1e3, int(cumulative_us) / 1e3))
+    df = pd.DataFrame(rows, columns=["module", "self (ms)", "cumulative (ms)"])
+    return df.sort_values("cumulative (ms)", ascending=False).head(top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start time of our entry points")
+    parser.add_argument("--src", type=pathlib.Path, default=SRC_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--entry-points", nargs="+", default=list(ENTRY_POINTS.keys()), choices=ENTRY_POINTS
+    )
+    parser.add_argument("--importtime", type=int, default=0, help="list top N slowest imports")
+    args = parser.parse_args()
+
+    # warm the OS file cache & .pyc files, so runs are comparable
+    run_entry_point(ENTRY_POINTS[args.entry_points[0]], args.src)
+
+    results = {}
+    for name in args.entry_points:
+        timings = [run_entry_point(ENTRY_POINTS[name], args.src)[0] for _ in range(args.repeat)]
+        results[name] = {"median (s)": np.median(timings), "min (s)": np.min(timings)}
+    print(f"Cold-start times for {args.src}")
+    print(pd.DataFrame(results).transpose().round(3).to_markdown())
+
+    if args.importtime:
+        _, stderr = run_entry_point(ENTRY_POINTS["console"], args.src, importtime=True)
+        print(slowest_imports(stderr, args.importtime).round(1).to_markdown(index=False))
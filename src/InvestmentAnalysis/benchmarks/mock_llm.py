@@ -0,0 +1,630 @@
+"""
+mock_llm.py - a local stand-in for LLM provider endpoints, so our pipeline can be
+    exercised & benchmarked offline, without remote model latency & variance.
+    Speaks the APIs our code uses:
+        - OpenAI/Groq chat completions: POST .../chat/completions (incl. stream=true)
+        - Anthropic messages: POST .../v1/messages
+        - Gemini generateContent: POST .../models/{model}:generateContent and
+          :streamGenerateContent?alt=sse (google-genai, used by agno's Gemini model &
+          google-generativeai with transport="rest", used by analyze_company)
+
+    Responses are scripted (see ScriptedResponder): when a request declares tools and
+    has no tool results yet, the mock calls every declared tool (with arguments derived
+    from the tool's JSON schema), otherwise it returns a templated markdown answer.
+    Response latencies are drawn from configurable distributions (see latency_distribution).
+
+    Usage (in code):
+        server = MockLLMServer(latency="lognormal:0.5,0.3").start()
+        client = OpenAI(base_url=server.base_url, api_key="mock")
+        use_mock_gemini(server, investment_analysis_agent)   # agno agents (& their team)
+        ...
+        server.stop()
+
+    Or stand-alone (e.g. for the Streamlit app, with OPENAI_BASE_URL etc. pointing at it):
+        python -m benchmarks.mock_llm --port 8765 --latency uniform:0.2,1.0
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+# ------------------------------------------------------------------------------
+# latency distributions
+# ------------------------------------------------------------------------------
+
+
+def latency_distribution(spec: Union[str, float, Callable[[], float]]) -> Callable[[], float]:
+    """
+    creates a sampler of latencies (in seconds) from spec, which can be
+        - a callable returning seconds, or a number (fixed latency)
+        - "fixed:0.5"
+        - "uniform:low,high"
+        - "normal:mean,stddev" (negative samples are clipped to 0)
+        - "lognormal:median,sigma" (realistic, right skewed LLM latencies)
+        - "pareto:minimum,alpha" (heavy tailed)
+        - any of the above followed by "+stall:probability,seconds", to add occasional stalls
+            e.g. "lognormal:0.5,0.3+stall:0.05,10"
+    """
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+
+    # random.Random is safe to share across the server's request threads
+    rng = random.Random(spec)
+    base, _, stall = spec.partition("+stall:")
+    kind, _, params = base.partition(":")
+    args = [float(p) for p in params.split(",") if p.strip()] if params else []
+
+    samplers = {
+        "fixed": lambda: args[0],
+        "uniform": lambda: rng.uniform(args[0], args[1]),
+        "normal": lambda: max(rng.gauss(args[0], args[1]), 0.0),
+        "lognormal": lambda: args[0] * rng.lognormvariate(0.0, args[1]),
+        "pareto": lambda: args[0] * rng.paretovariate(args[1]),
+    }
+    if kind not in samplers:
+        try:
+            return latency_distribution(float(kind))
+        except ValueError:
+            raise ValueError(f"FATAL ERROR: unsupported latency distribution {spec}")
+    sampler = samplers[kind]
+    if not stall:
+        return sampler
+
+    stall_probability, stall_seconds = (float(p) for p in stall.split(","))
+    return lambda: stall_seconds if rng.random() < stall_probability else sampler()
+
+
+# ------------------------------------------------------------------------------
+# scripted responses
+# ------------------------------------------------------------------------------
+
+
+@dataclass
+class MockRequest:
+    """provider-neutral view of an LLM request"""
+
+    api: str  # openai, anthropic or gemini
+    model: str
+    prompt: str  # all system & user text, concatenated
+    tools: List[Dict[str, Any]] = field(default_factory=list)  # {"name", "parameters"}
+    tool_results: int = 0  # number of tool results already in the conversation
+    stream: bool = False
+
+
+@dataclass
+class MockReply:
+    text: str = ""
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+
+
+DEFAULT_TEMPLATE = """#### Analysis for {symbol}
+
+**Recommendation:** Hold
+
+This is a mock analysis by {model}, generated from a prompt of {prompt_chars} characters
+and {tool_results} tool results.
+
+{filler}
+"""
+
+_FILLER_WORDS = (
+    "revenue margins liquidity leverage valuation growth peers sentiment cash flow "
+    "profitability efficiency outlook risk dividend earnings guidance"
+).split()
+
+_SYMBOL_PATTERN = re.compile(r"\b(?:for|of)\s+([A-Z][A-Z0-9&\-]*(?:\.[A-Z]{1,3})?)\b")
+
+
+class ScriptedResponder:
+    """
+    default mock LLM behaviour - calls every declared tool once, then answers with template
+        template: str.format template, fields: symbol, model, api, prompt_chars, tool_results, filler
+        filler_words: number of filler words in the answer (to simulate output size)
+        tool_args: per tool name, arguments to use instead of schema-derived ones
+        peers: symbols passed to tools taking a list of symbols (symbol itself is first)
+        call_tools: set False to always answer with text
+    """
+
+    def __init__(
+        self,
+        template: str = DEFAULT_TEMPLATE,
+        filler_words: int = 150,
+        tool_args: Optional[Dict[str, Dict[str, Any]]] = None,
+        peers: Optional[List[str]] = None,
+        call_tools: bool = True,
+    ):
+        self.template = template
+        self.filler_words = filler_words
+        self.tool_args = tool_args or {}
+        self.peers = peers if peers is not None else ["PEER1", "PEER2", "PEER3"]
+        self.call_tools = call_tools
+
+    @staticmethod
+    def symbol_in(prompt: str) -> str:
+        # the user's message (with the symbol) comes after the system prompt
+        matches = _SYMBOL_PATTERN.findall(prompt)
+        return matches[-1] if matches else "AAPL"
+
+    def tool_call_args(self, tool: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+        """arguments for tool derived from its JSON schema"""
+        if tool["name"] in self.tool_args:
+            return self.tool_args[tool["name"]]
+        args = {}
+        schema = tool.get("parameters") or {}
+        for name, prop in (schema.get("properties") or {}).items():
+            kind = str(prop.get("type", "string")).lower()
+            if kind == "array":
+                args[name] = [symbol] + self.peers
+            elif kind in ("integer", "number"):
+                args[name] = 1
+            elif kind == "boolean":
+                args[name] = True
+            elif name == "symbol":
+                args[name] = symbol
+            else:
+                args[name] = f"{name.replace('_', ' ')} for {symbol}"
+        return args
+
+    def __call__(self, request: MockRequest) -> MockReply:
+        symbol = self.symbol_in(request.prompt)
+        if self.call_tools and request.tools and request.tool_results == 0:
+            return MockReply(
+                tool_calls=[
+                    (tool["name"], self.tool_call_args(tool, symbol)) for tool in request.tools
+                ]
+            )
+        filler = " ".join(
+            _FILLER_WORDS[i % len(_FILLER_WORDS)] for i in range(self.filler_words)
+        )
+        return MockReply(
+            text=self.template.format(
+                symbol=symbol,
+                model=request.model,
+                api=request.api,
+                prompt_chars=len(request.prompt),
+                tool_results=request.tool_results,
+                filler=filler,
+            )
+        )
+
+
+# ------------------------------------------------------------------------------
+# provider API (de)serialization
+# ------------------------------------------------------------------------------
+
+
+def _text_of(content: Any) -> str:
+    """text of an OpenAI/Anthropic message content (string or list of blocks)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block.get("text", "") for block in content if isinstance(block, dict)
+        )
+    return ""
+
+
+def _count_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def parse_openai(body: dict) -> MockRequest:
+    messages = body.get("messages", [])
+    return MockRequest(
+        api="openai",
+        model=body.get("model", "mock"),
+        prompt="\n".join(
+            _text_of(m.get("content")) for m in messages if m.get("role") in ("system", "user")
+        ),
+        tools=[
+            {"name": t["function"]["name"], "parameters": t["function"].get("parameters")}
+            for t in body.get("tools") or []
+        ],
+        tool_results=sum(1 for m in messages if m.get("role") == "tool"),
+        stream=bool(body.get("stream")),
+    )
+
+
+def parse_anthropic(body: dict) -> MockRequest:
+    messages = body.get("messages", [])
+    tool_results = sum(
+        1
+        for m in messages
+        if isinstance(m.get("content"), list)
+        for block in m["content"]
+        if isinstance(block, dict) and block.get("type") == "tool_result"
+    )
+    return MockRequest(
+        api="anthropic",
+        model=body.get("model", "mock"),
+        prompt="\n".join(
+            [_text_of(body.get("system", ""))]
+            + [_text_of(m.get("content")) for m in messages if m.get("role") == "user"]
+        ),
+        tools=[
+            {"name": t["name"], "parameters": t.get("input_schema")}
+            for t in body.get("tools") or []
+        ],
+        tool_results=tool_results,
+        stream=bool(body.get("stream")),
+    )
+
+
+def parse_gemini(body: dict, model: str, stream: bool) -> MockRequest:
+    # google-genai sends camelCase keys, be lenient & accept snake_case too
+    contents = body.get("contents", [])
+    system = body.get("systemInstruction") or body.get("system_instruction") or {}
+    texts = [p.get("text", "") for p in system.get("parts", [])]
+    tool_results = 0
+    for content in contents:
+        for part in content.get("parts", []):
+            if "functionResponse" in part or "function_response" in part:
+                tool_results += 1
+            elif content.get("role", "user") == "user":
+                texts.append(part.get("text", ""))
+    tools = []
+    for tool in body.get("tools") or []:
+        for declaration in (
+            tool.get("functionDeclarations") or tool.get("function_declarations") or []
+        ):
+            tools.append(
+                {"name": declaration["name"], "parameters": declaration.get("parameters")}
+            )
+    return MockRequest(
+        api="gemini",
+        model=model,
+        prompt="\n".join(texts),
+        tools=tools,
+        tool_results=tool_results,
+        stream=stream,
+    )
+
+
+def openai_response(request: MockRequest, reply: MockReply, request_id: int) -> dict:
+    message: Dict[str, Any] = {"role": "assistant", "content": reply.text or None}
+    if reply.tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{request_id}_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+            for i, (name, args) in enumerate(reply.tool_calls)
+        ]
+    prompt_tokens, completion_tokens = _count_tokens(request.prompt), _count_tokens(reply.text)
+    return {
+        "id": f"chatcmpl-mock-{request_id}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if reply.tool_calls else "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def openai_stream_chunks(request: MockRequest, reply: MockReply, request_id: int, chunks: List[str]):
+    """chat.completion.chunk payloads for a streamed reply"""
+
+    def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+        return {
+            "id": f"chatcmpl-mock-{request_id}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    for text in chunks:
+        yield chunk({"content": text})
+    if reply.tool_calls:
+        yield chunk(
+            {
+                "tool_calls": [
+                    {
+                        "index": i,
+                        "id": f"call_{request_id}_{i}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(args)},
+                    }
+                    for i, (name, args) in enumerate(reply.tool_calls)
+                ]
+            }
+        )
+    yield chunk({}, "tool_calls" if reply.tool_calls else "stop")
+
+
+def anthropic_response(request: MockRequest, reply: MockReply, request_id: int) -> dict:
+    content: List[Dict[str, Any]] = []
+    if reply.text:
+        content.append({"type": "text", "text": reply.text})
+    content.extend(
+        {"type": "tool_use", "id": f"toolu_{request_id}_{i}", "name": name, "input": args}
+        for i, (name, args) in enumerate(reply.tool_calls)
+    )
+    return {
+        "id": f"msg_mock_{request_id}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.model,
+        "content": content,
+        "stop_reason": "tool_use" if reply.tool_calls else "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": _count_tokens(request.prompt),
+            "output_tokens": _count_tokens(reply.text),
+        },
+    }
+
+
+def gemini_response(request: MockRequest, reply: MockReply, text: Optional[str] = None) -> dict:
+    """generateContent response - text overrides reply.text (used for stream chunks)"""
+    text = reply.text if text is None else text
+    parts: List[Dict[str, Any]] = [{"text": text}] if text else []
+    parts.extend({"functionCall": {"name": name, "args": args}} for name, args in reply.tool_calls)
+    prompt_tokens, output_tokens = _count_tokens(request.prompt), _count_tokens(text)
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": parts},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+        "modelVersion": request.model,
+    }
+
+
+# ------------------------------------------------------------------------------
+# the server
+# ------------------------------------------------------------------------------
+
+
+class MockLLMServer:
+    """
+    local stand-in LLM server (see module docstring)
+        latency: time to first byte - a latency_distribution() spec or callable
+        token_latency: delay between streamed chunks - a latency_distribution() spec
+        responder: callable(MockRequest) -> MockReply (defaults to ScriptedResponder())
+        chunk_words: words per streamed chunk
+    """
+
+    def __init__(
+        self,
+        latency: Union[str, float, Callable[[], float]] = 0.0,
+        token_latency: Union[str, float, Callable[[], float]] = 0.0,
+        responder: Optional[Callable[[MockRequest], MockReply]] = None,
+        chunk_words: int = 8,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency_distribution(latency)
+        self.token_latency = latency_distribution(token_latency)
+        self.responder = responder or ScriptedResponder()
+        self.chunk_words = chunk_words
+        self.requests = 0
+        self.requests_by_api: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def root_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """base_url for OpenAI & Groq clients"""
+        return f"{self.root_url}/v1"
+
+    def _count(self, api: str) -> int:
+        with self._lock:
+            self.requests += 1
+            self.requests_by_api[api] = self.requests_by_api.get(api, 0) + 1
+            return self.requests
+
+    def _chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        return [
+            " ".join(words[i : i + self.chunk_words]) + " "
+            for i in range(0, len(words), self.chunk_words)
+        ] if text else []
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                path = urlparse(self.path).path
+
+                if path.endswith("/chat/completions"):
+                    request = parse_openai(body)
+                elif path.endswith("/messages"):
+                    request = parse_anthropic(body)
+                elif ":generateContent" in path or ":streamGenerateContent" in path:
+                    model = path.rsplit("/models/", 1)[-1].split(":")[0]
+                    request = parse_gemini(body, model, ":streamGenerateContent" in path)
+                else:
+                    self._send_json({"error": {"message": f"unknown path {path}"}}, 404)
+                    return
+
+                request_id = server._count(request.api)
+                reply = server.responder(request)
+                time.sleep(max(server.latency(), 0.0))
+
+                if not request.stream:
+                    if request.api == "openai":
+                        self._send_json(openai_response(request, reply, request_id))
+                    elif request.api == "anthropic":
+                        self._send_json(anthropic_response(request, reply, request_id))
+                    else:
+                        self._send_json(gemini_response(request, reply))
+                    return
+
+                chunks = server._chunks(reply.text)
+                if request.api == "openai":
+                    events = openai_stream_chunks(request, reply, request_id, chunks)
+                    self._send_sse(events, done_marker=True)
+                elif request.api == "gemini":
+                    events = [
+                        gemini_response(request, MockReply(text=chunk), chunk)
+                        for chunk in chunks
+                    ]
+                    # function calls & final usage go with the last chunk
+                    events.append(gemini_response(request, MockReply(tool_calls=reply.tool_calls), ""))
+                    self._send_sse(events)
+                else:
+                    self._send_json(
+                        {"error": {"message": "streaming is not supported for anthropic"}},
+                        400,
+                    )
+
+            def _send_json(self, payload: dict, status: int = 200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_sse(self, events, done_marker: bool = False):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                first = True
+                for event in events:
+                    if not first:
+                        time.sleep(max(server.token_latency(), 0.0))
+                    first = False
+                    self._write_chunk(f"data: {json.dumps(event)}\r\n\r\n")
+                if done_marker:
+                    self._write_chunk("data: [DONE]\r\n\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, text: str):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                # keep benchmark output clean
+                pass
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# ------------------------------------------------------------------------------
+# pointing our LLM clients at the mock
+# ------------------------------------------------------------------------------
+
+
+def use_mock_gemini(server: MockLLMServer, *agents):
+    """
+    points the (agno) Gemini models of agents, and of their team members, at server
+    """
+    for agent in agents:
+        model = agent.model
+        model.api_key = model.api_key or "mock"
+        model.client_params = {
+            **(model.client_params or {}),
+            "http_options": {"base_url": server.root_url},
+        }
+        model.client = None  # re-created with client_params on next request
+        use_mock_gemini(server, *(agent.team or []))
+
+
+def mock_chat_model(provider: str, server: MockLLMServer):
+    """ChatModel (see agents/analyze_company.py) for provider that talks to server"""
+    from agents.analyze_company import PROVIDER_AND_MODEL, ChatModel
+
+    model_name = PROVIDER_AND_MODEL[provider]
+    if provider == "OpenAI":
+        from openai import OpenAI
+
+        client = OpenAI(base_url=server.base_url, api_key="mock")
+    elif provider == "Groq":
+        from groq import Groq
+
+        client = Groq(base_url=server.root_url, api_key="mock")
+    elif provider == "Anthropic":
+        from anthropic import Anthropic
+
+        client = Anthropic(base_url=server.root_url, api_key="mock")
+    elif provider == "Gemini":
+        import google.generativeai as genai
+
+        genai.configure(
+            api_key="mock", transport="rest", client_options={"api_endpoint": server.root_url}
+        )
+        client = genai.GenerativeModel(model_name)
+    else:
+        raise ValueError(f"{provider} is not a supported LLM!")
+    return ChatModel(provider=provider, model_name=model_name, client=client)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0", help="e.g. lognormal:0.5,0.3+stall:0.05,10")
+    parser.add_argument("--token-latency", default="0")
+    parser.add_argument("--filler-words", type=int, default=150)
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        responder=ScriptedResponder(filler_words=args.filler_words),
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Mock LLM listening on {server.root_url} (OpenAI base_url: {server.base_url})")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
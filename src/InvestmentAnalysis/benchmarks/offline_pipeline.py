@@ -0,0 +1,122 @@
+"""
+offline_pipeline.py - runs complete investment analyses (coordinator agent + financial,
+    peer comparison & sentiment analysis agents, with real tool calls) offline:
+    Yahoo! Finance data comes from fixtures (see fixtures.py) and all LLM calls go to
+    a local mock LLM (see mock_llm.py). Since LLM latency is known (and configurable),
+    this isolates the overhead of our own pipeline - agno orchestration, tool calls,
+    ratio calculations & prompt serialization - and shows how it behaves under load.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.offline_pipeline --analyses 20 --concurrency 4
+        python -m benchmarks.offline_pipeline --latency lognormal:0.8,0.4 --concurrency 8
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import time
+import pathlib
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# agents read GOOGLE_API_KEY at import time - the mock accepts anything
+os.environ.setdefault("GOOGLE_API_KEY", "mock")
+
+from benchmarks.fixtures import FIXTURES_DIR, use_fixtures
+from benchmarks.mock_llm import MockLLMServer, ScriptedResponder, use_mock_gemini
+from agents.registry import get_agent
+
+DEFAULT_SYMBOLS = ["TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS"]
+
+
+def run_analysis(symbol: str, server: MockLLMServer) -> dict:
+    """runs one complete analysis on a private copy of the agent team"""
+    agent = get_agent("investment_analysis").deep_copy()
+    agent.debug_mode = False
+    for member in agent.team or []:
+        member.debug_mode = False
+    use_mock_gemini(server, agent)
+
+    requests_before = server.requests
+    start = time.perf_counter()
+    response = agent.run(f"Analyse the investment potential of {symbol}")
+    elapsed = time.perf_counter() - start
+    return {
+        "symbol": symbol,
+        "seconds": elapsed,
+        "chars": len(response.content or ""),
+        # approximate under concurrency, requests of other analyses interleave
+        "llm_requests": server.requests - requests_before,
+    }
+
+
+def run_benchmark(
+    symbols: List[str],
+    analyses: int,
+    concurrency: int,
+    latency: str,
+    fixtures_dir: pathlib.Path,
+) -> pd.DataFrame:
+    server = MockLLMServer(latency=latency, responder=ScriptedResponder()).start()
+    try:
+        with use_fixtures(fixtures_dir):
+            # warm-up: imports, fixture generation & agno's lazy initialization
+            run_analysis(symbols[0], server)
+            requests_before = server.requests
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(
+                    executor.map(
+                        lambda i: run_analysis(symbols[i % len(symbols)], server),
+                        range(analyses),
+                    )
+                )
+            wall_time = time.perf_counter() - start
+            total_requests = server.requests - requests_before
+    finally:
+        server.stop()
+
+    df = pd.DataFrame(results)
+    print(
+        f"{analyses} analyses in {wall_time:.2f}s with concurrency {concurrency} "
+        f"({analyses / wall_time:.2f} analyses/s), {total_requests} LLM requests"
+    )
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end analysis benchmark")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--analyses", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--latency", default="0", help="mock LLM latency, e.g. fixed:0.5 or lognormal:0.8,0.4"
+    )
+    parser.add_argument("--fixtures-dir", type=pathlib.Path, default=FIXTURES_DIR)
+    parser.add_argument("--verbose", action="store_true", help="show agno's logs")
+    args = parser.parse_args()
+
+    # agno logs every tool call & response (& agent.run() resets its log level)
+    logging.getLogger("agno").disabled = not args.verbose
+
+    df = run_benchmark(
+        args.symbols, args.analyses, args.concurrency, args.latency, args.fixtures_dir
+    )
+    latencies = df["seconds"].to_numpy()
+    summary = pd.Series(
+        {
+            "p50 (s)": np.percentile(latencies, 50),
+            "p95 (s)": np.percentile(latencies, 95),
+            "max (s)": latencies.max(),
+            "LLM requests/analysis": df["llm_requests"].mean(),
+        }
+    )
+    print(summary.round(3).to_markdown())
@@ -0,0 +1,86 @@
+"""
+peer_universe_benchmark.py - time of the peer comparison of a universe of (synthetic
+    fixture) companies, computed:
+        - per company: PeerComparisonTools.calculate_peer_comparison
+        - universe: tools/peer_universe.compare_universe - the statement panel is fetched
+          once beforehand (timed separately as "fetch"), so this is the CPU bound part only
+    Fixtures are generated before measuring. With --check, the universe table is compared
+    with the per-company one first.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.peer_universe_benchmark --symbols 5000 --check
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import sys
+import time
+import logging
+import argparse
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import use_fixtures
+from tools.arrow_ratios import statement_panel
+from tools.peer_comparison_tools import PeerComparisonTools
+from tools.peer_universe import compare_universe
+
+
+def universe_symbols(count: int) -> List[str]:
+    return [f"UNIVERSE{i:05d}.NS" for i in range(count)]
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peer comparison: per company vs. universe")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--per-company", type=int, default=500, help="companies timed per company")
+    parser.add_argument("--check", action="store_true", help="compare with PeerComparisonTools first")
+    args = parser.parse_args()
+
+    # our tools log every call
+    logging.getLogger("agno").disabled = True
+
+    symbols = universe_symbols(args.symbols)
+    tools = PeerComparisonTools()
+    results = []
+    with use_fixtures():
+        seconds = timed(statement_panel, symbols)
+        print(f"Generated {args.symbols} fixtures in {seconds:.1f}s", flush=True)
+
+        if args.check:
+            sample = symbols[: min(args.symbols, 200)]
+            expected = tools.calculate_peer_comparison(sample)
+            actual = compare_universe(sample)
+            same = np.allclose(
+                expected.to_numpy(dtype=np.float64), actual.to_numpy(dtype=np.float64), equal_nan=True
+            )
+            print(f"Checked {len(sample)} companies: {'OK' if same else 'MISMATCH'}")
+            if not same:
+                sys.exit(1)
+
+        sample = symbols[: min(args.symbols, args.per_company)]
+        seconds = timed(tools.calculate_peer_comparison, sample)
+        results.append({"mode": "per company", "ms/company": 1000 * seconds / len(sample)})
+
+        start = time.perf_counter()
+        panel = statement_panel(symbols)
+        seconds = time.perf_counter() - start
+        results.append({"mode": "fetch", "ms/company": 1000 * seconds / len(symbols)})
+
+        seconds = min(timed(compare_universe, symbols, panel=panel) for _ in range(3))
+        results.append({"mode": "universe", "ms/company": 1000 * seconds / len(symbols)})
+
+    df = pd.DataFrame(results)
+    df["speedup"] = df["ms/company"].iloc[0] / df["ms/company"]
+    print(df.round(4).to_markdown(index=False))
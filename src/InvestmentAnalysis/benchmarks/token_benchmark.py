@@ -0,0 +1,104 @@
+"""
+token_benchmark.py - compares the number of LLM input tokens produced by each of our
+    Toolkit functions in the verbose (markdown) encoding versus the compact encodings
+    (see tools/formatting.py), on recorded (or synthetic) fixtures.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.token_benchmark
+        python -m benchmarks.token_benchmark --symbols TCS.NS INFY.NS WIPRO.NS --formats csv tsv
+
+    Tokens are counted with tiktoken (o200k_base) if installed, else estimated as
+    ~4 characters per token. Gemini's tokenizer differs, but relative savings hold.
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import json
+import pathlib
+import argparse
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _encoding = None
+
+from benchmarks.fixtures import FIXTURES_DIR, use_fixtures
+from tools.financial_analysis_tools import FinancialAnalysisTools
+from tools.peer_comparison_tools import PeerComparisonTools
+from tools.sentiment_analysis_tools import SentimentAnalysisTools
+
+DEFAULT_SYMBOLS = ["TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS", "TECHM.NS", "PERSISTENT.NS"]
+
+
+def count_tokens(text: str) -> int:
+    """number of tokens in text (estimated if tiktoken is not installed)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def tool_outputs(symbols: List[str], output_format: str) -> Dict[str, List[str]]:
+    """runs every Toolkit function for all symbols, returns outputs keyed by tool name"""
+    tools: Dict[str, Callable] = {}
+    for toolkit in (
+        FinancialAnalysisTools(enable_all=True, output_format=output_format),
+        SentimentAnalysisTools(output_format=output_format),
+    ):
+        tools.update({name: f.entrypoint for name, f in toolkit.functions.items()})
+
+    outputs = {name: [tool(symbol) for symbol in symbols] for name, tool in tools.items()}
+    peers = PeerComparisonTools(output_format=output_format)
+    outputs["get_peer_comparison_and_industry_benchmarks"] = [
+        peers.get_peer_comparison_and_industry_benchmarks(symbols)
+    ]
+    return outputs
+
+
+def run_benchmark(
+    symbols: List[str], formats: List[str], fixtures_dir: pathlib.Path
+) -> pd.DataFrame:
+    """
+    Returns:
+        DataFrame with tools as rows and token counts (summed over symbols) per
+        encoding as columns, with % savings of every compact encoding vs markdown
+    """
+    results = {}
+    with use_fixtures(fixtures_dir):
+        for output_format in ["markdown"] + formats:
+            outputs = tool_outputs(symbols, output_format)
+            results[output_format] = {
+                name: sum(count_tokens(text) for text in texts)
+                for name, texts in outputs.items()
+            }
+
+    df = pd.DataFrame(results)
+    df.loc["TOTAL"] = df.sum()
+    for output_format in formats:
+        df[f"{output_format} savings (%)"] = (
+            (1.0 - df[output_format] / df["markdown"]) * 100.0
+        ).round(1)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token counts of tool outputs per encoding")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--formats", nargs="+", default=["csv", "tsv"])
+    parser.add_argument("--fixtures-dir", type=pathlib.Path, default=FIXTURES_DIR)
+    parser.add_argument("--json", type=pathlib.Path, help="also save results to this JSON file")
+    args = parser.parse_args()
+
+    df = run_benchmark(args.symbols, args.formats, args.fixtures_dir)
+    print(f"Tokenizer: {'tiktoken o200k_base' if _encoding else '~4 chars/token estimate'}")
+    print(df.to_markdown())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(df.to_dict(orient="index"), f, indent=2)
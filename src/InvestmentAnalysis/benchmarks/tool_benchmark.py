@@ -0,0 +1,338 @@
+"""
+tool_benchmark.py - timing & memory benchmarks of our tools on frozen fixtures (see
+    fixtures.py), in the style of pytest-benchmark:
+        - ratios: every function of tools/ratios.py
+        - peers: PeerComparisonTools.get_peer_comparison_and_industry_benchmarks
+          for 5, 50 & 500 symbols
+        - sentiment: SentimentAnalysisTools.analyze_market_sentiment scoring 25, 1,000
+          & 10,000 headlines
+        - indicators: technical indicators (tools/indicators.py) of 10 years of daily bars
+          for 1, 50 & 500 symbols, and the incremental update of 500 symbols by one bar
+    Each benchmark is warmed up once (which also loads its fixtures, so fixture generation
+    isn't timed), then run for at least --min-rounds rounds and until --max-time seconds
+    have passed. Peak memory is measured with tracemalloc in a separate (untimed) run.
+
+    Results are saved as JSON (benchmark stats plus the machine & git commit), so runs
+    of different commits can be compared - benchmarks whose median time or peak memory
+    grew by more than --threshold % are reported as regressions.
+
+    Run from the src/InvestmentAnalysis folder:
+        python -m benchmarks.tool_benchmark --save
+        python -m benchmarks.tool_benchmark --group peers --compare last
+        python -m benchmarks.tool_benchmark --compare benchmarks/results/<file>.json
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import sys
+import json
+import time
+import inspect
+import logging
+import pathlib
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import pandas as pd
+import yfinance
+
+from benchmarks.fixtures import FIXTURES_DIR, synthetic_fixture, use_fixtures
+from tools import ratios
+from tools.indicators import compute_indicators, stack_histories
+from tools.peer_comparison_tools import PeerComparisonTools
+from tools.sentiment_analysis_tools import SentimentAnalysisTools
+
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+GROUPS = ["ratios", "peers", "sentiment", "indicators"]
+RATIO_SYMBOLS = ["TCS.NS", "INFY.NS", "WIPRO.NS"]
+PEER_COUNTS = [5, 50, 500]
+HEADLINE_COUNTS = [25, 1_000, 10_000]
+INDICATOR_COUNTS = [1, 50, 500]
+# peak memory of small benchmarks varies by a few KB between runs - smaller changes
+# are never reported as regressions
+MIN_MEMORY_CHANGE = 64 * 1024
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    group: str
+    func: Callable[[], object]
+    params: dict = field(default_factory=dict)
+
+
+def ratio_cases() -> List[BenchmarkCase]:
+    """every function defined in tools/ratios.py, for each of RATIO_SYMBOLS per round"""
+    cases = []
+    for name, function in inspect.getmembers(ratios, inspect.isfunction):
+        if function.__module__ != ratios.__name__:
+            # imported, e.g. format_table
+            continue
+        run = lambda function=function: [function(symbol) for symbol in RATIO_SYMBOLS]
+        cases.append(BenchmarkCase(name, "ratios", run, {"symbols": len(RATIO_SYMBOLS)}))
+    return cases
+
+
+def peer_cases() -> List[BenchmarkCase]:
+    tools = PeerComparisonTools(output_format="csv")
+    cases = []
+    for count in PEER_COUNTS:
+        symbols = [f"PEER{i:03d}.NS" for i in range(count)]
+        run = lambda symbols=symbols: tools.get_peer_comparison_and_industry_benchmarks(symbols)
+        cases.append(
+            BenchmarkCase(f"peer_comparison[{count}]", "peers", run, {"symbols": count})
+        )
+    return cases
+
+
+def sentiment_cases(fixtures: Dict[str, object]) -> List[BenchmarkCase]:
+    """
+    Params:
+        fixtures: fixture tickers by symbol (as yielded by use_fixtures) - gets a synthetic
+            fixture with the number of headlines of each case
+    """
+    cases = []
+    for count in HEADLINE_COUNTS:
+        symbol = f"NEWS{count}.NS"
+        fixtures[symbol] = synthetic_fixture(symbol, news_count=count)
+        tools = SentimentAnalysisTools(output_format="csv", news_count=count)
+        run = lambda tools=tools, symbol=symbol: tools.analyze_market_sentiment(symbol)
+        cases.append(
+            BenchmarkCase(f"market_sentiment[{count}]", "sentiment", run, {"headlines": count})
+        )
+    return cases
+
+
+def indicator_cases() -> List[BenchmarkCase]:
+    """indicators of the (10 year) synthetic price history of INDICATOR_COUNTS symbols"""
+    histories = {
+        f"TECH{i:03d}.NS": synthetic_fixture(f"TECH{i:03d}.NS").history(period="max")
+        for i in range(max(INDICATOR_COUNTS))
+    }
+    _, close, high, low = stack_histories(histories)
+    cases = []
+    for count in INDICATOR_COUNTS:
+        run = lambda count=count: compute_indicators(close[:, :count], high[:, :count], low[:, :count])
+        params = {"symbols": count, "bars": len(close)}
+        cases.append(BenchmarkCase(f"indicators[{count}]", "indicators", run, params))
+    # state after all but the last bar, updated with the last one
+    _, state = compute_indicators(close[:-1], high[:-1], low[:-1])
+    run = lambda: compute_indicators(close[-1:], high[-1:], low[-1:], state)
+    params = {"symbols": close.shape[1], "bars": 1}
+    cases.append(BenchmarkCase(f"indicators_update[{close.shape[1]}]", "indicators", run, params))
+    return cases
+
+
+def measure(case: BenchmarkCase, min_rounds: int = 3, max_time: float = 1.0) -> dict:
+    """
+    times case.func (after a warm-up run) & measures its peak memory
+    Returns:
+        benchmark result: name, group, params, stats (seconds) & memory (bytes)
+    """
+    result = case.func()
+    if isinstance(result, str) and result.startswith("Error"):
+        # tools return errors as text
+        raise RuntimeError(f"FATAL ERROR: benchmark {case.name} failed: {result[:200]}")
+
+    times = []
+    start = time.perf_counter()
+    while len(times) < min_rounds or time.perf_counter() - start < max_time:
+        round_start = time.perf_counter()
+        case.func()
+        times.append(time.perf_counter() - round_start)
+
+    tracemalloc.start()
+    try:
+        case.func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    quartiles = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    return {
+        "name": case.name,
+        "group": case.group,
+        "params": case.params,
+        "stats": {
+            "min": min(times),
+            "max": max(times),
+            "mean": statistics.fmean(times),
+            "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "median": statistics.median(times),
+            "iqr": quartiles[2] - quartiles[0],
+            "rounds": len(times),
+            "ops": 1.0 / statistics.fmean(times),
+        },
+        "memory": {"peak": peak},
+    }
+
+
+def commit_info() -> dict:
+    """git commit of the working tree (empty if git isn't available)"""
+    cwd = pathlib.Path(__file__).parent
+    git = lambda *args: subprocess.run(
+        ["git", *args], capture_output=True, text=True, check=True, cwd=cwd
+    ).stdout.strip()
+    try:
+        return {
+            "id": git("rev-parse", "HEAD"),
+            "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        }
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+
+def run_benchmarks(
+    groups: List[str],
+    min_rounds: int = 3,
+    max_time: float = 1.0,
+    fixtures_dir: pathlib.Path = FIXTURES_DIR,
+) -> dict:
+    """runs the benchmarks of groups, returns the results (as saved to JSON)"""
+    benchmarks = []
+    with use_fixtures(fixtures_dir) as fixtures:
+        cases = []
+        if "ratios" in groups:
+            cases += ratio_cases()
+        if "peers" in groups:
+            cases += peer_cases()
+        if "sentiment" in groups:
+            cases += sentiment_cases(fixtures)
+        if "indicators" in groups:
+            cases += indicator_cases()
+        for case in cases:
+            result = measure(case, min_rounds, max_time)
+            print(
+                f"{case.group:10s} {case.name:45s} median {result['stats']['median'] * 1000:10.2f} ms "
+                f"({result['stats']['rounds']} rounds), peak {result['memory']['peak'] / 2**20:7.2f} MB",
+                flush=True,
+            )
+            benchmarks.append(result)
+
+    return {
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "pandas": pd.__version__,
+            "yfinance": yfinance.__version__,
+        },
+        "commit_info": commit_info(),
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+        "benchmarks": benchmarks,
+    }
+
+
+def save_results(results: dict, results_dir: pathlib.Path = RESULTS_DIR) -> pathlib.Path:
+    """saves results as <results dir>/<timestamp>_<commit>.json"""
+    results_dir.mkdir(parents=True, exist_ok=True)
+    stamp = results["datetime"].replace(":", "").replace("-", "")
+    commit = results["commit_info"].get("id", "nocommit")[:8]
+    dirty = "-dirty" if results["commit_info"].get("dirty") else ""
+    path = results_dir / f"{stamp}_{commit}{dirty}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path: str, results_dir: pathlib.Path = RESULTS_DIR) -> dict:
+    """loads saved results - path "last" is the latest file in results_dir"""
+    if path == "last":
+        saved = sorted(results_dir.glob("*.json"))
+        if not saved:
+            raise RuntimeError(f"FATAL ERROR: no saved results in {results_dir}")
+        path = saved[-1]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def results_table(results: dict) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "group": b["group"],
+                "benchmark": b["name"],
+                "rounds": b["stats"]["rounds"],
+                "min (ms)": b["stats"]["min"] * 1000,
+                "median (ms)": b["stats"]["median"] * 1000,
+                "mean (ms)": b["stats"]["mean"] * 1000,
+                "stddev (ms)": b["stats"]["stddev"] * 1000,
+                "ops/s": b["stats"]["ops"],
+                "peak memory (MB)": b["memory"]["peak"] / 2**20,
+            }
+            for b in results["benchmarks"]
+        ]
+    )
+
+
+def compare_results(results: dict, baseline: dict, threshold: float = 10.0) -> pd.DataFrame:
+    """
+    change (%) of the median time & peak memory of every benchmark vs. baseline
+    Params:
+        threshold: % increase reported as a regression (memory: if also > MIN_MEMORY_CHANGE)
+    """
+    before = {b["name"]: b for b in baseline["benchmarks"]}
+    rows = []
+    for b in results["benchmarks"]:
+        if b["name"] not in before:
+            continue
+        old = before[b["name"]]
+        time_change = 100.0 * (b["stats"]["median"] / old["stats"]["median"] - 1.0)
+        memory_change = 100.0 * (b["memory"]["peak"] / max(old["memory"]["peak"], 1) - 1.0)
+        memory_grew = b["memory"]["peak"] - old["memory"]["peak"] > MIN_MEMORY_CHANGE
+        rows.append(
+            {
+                "benchmark": b["name"],
+                "median (ms)": b["stats"]["median"] * 1000,
+                "baseline (ms)": old["stats"]["median"] * 1000,
+                "time change (%)": time_change,
+                "memory change (%)": memory_change,
+                "regression": time_change > threshold or (memory_change > threshold and memory_grew),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timing & memory benchmarks of our tools")
+    parser.add_argument("--group", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument(
+        "--max-time", type=float, default=1.0, help="seconds to keep repeating a benchmark"
+    )
+    parser.add_argument("--fixtures-dir", type=pathlib.Path, default=FIXTURES_DIR)
+    parser.add_argument("--save", action="store_true", help=f"save results to {RESULTS_DIR}")
+    parser.add_argument("--json", type=pathlib.Path, help="save results to this JSON file")
+    parser.add_argument("--compare", help="results JSON file to compare with (or last)")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="%% slower/bigger reported as a regression"
+    )
+    args = parser.parse_args()
+
+    # our tools log every call
+    logging.getLogger("agno").disabled = True
+
+    # load the baseline first, so --save --compare last compares with the previous run
+    baseline = load_results(args.compare) if args.compare else None
+    results = run_benchmarks(args.group, args.min_rounds, args.max_time, args.fixtures_dir)
+    print(results_table(results).round(3).to_markdown(index=False))
+    if args.save:
+        print(f"Saved results to {save_results(results)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        comparison = compare_results(results, baseline, args.threshold)
+        print(f"\nCompared with {baseline['commit_info'].get('id', '?')[:8]} ({baseline['datetime']}):")
+        print(comparison.round(1).to_markdown(index=False))
+        sys.exit(1 if comparison["regression"].any() else 0)
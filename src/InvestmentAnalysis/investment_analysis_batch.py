@@ -0,0 +1,325 @@
+"""
+investment_analysis_batch.py - non-interactive (batch) investment analysis of a whole
+    watchlist. Symbols are read from a file (or stdin), one per line (# starts a comment),
+    and analyzed by a pool of worker threads, each with its own copy of the agent team.
+    Writes one markdown report per symbol and a summary index (index.md & index.json)
+    to the output folder. Runs are resumable: symbols already analyzed (as recorded in
+    index.json) are skipped, unless --force is used.
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python investment_analysis_batch.py watchlist.txt --workers 8
+        cat watchlist.txt | python investment_analysis_batch.py - --output-dir reports/nightly
+        python investment_analysis_batch.py watchlist.txt --profile  (see utils/profiling.py)
+        python investment_analysis_batch.py watchlist.txt --max-yahoo-calls 60 --over-budget fail
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import sys
+import json
+import time
+import pathlib
+import argparse
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from rich.console import Console
+
+from agno.utils.log import logger
+
+from agents.registry import get_agent
+from utils.analysis_cache import AnalysisCache, peers_used
+from utils.tracing import Trace
+from utils.profiling import profile_analysis
+from utils.network_accounting import BUDGET_MODES, NetworkAccount, NetworkBudgetExceeded
+from utils.run_metrics import record_run_metrics
+
+DEFAULT_OUTPUT_DIR = pathlib.Path(__file__).parent / "reports" / "batch"
+
+console = Console()
+
+
+def read_symbols(lines: Iterable[str]) -> List[str]:
+    """symbols (upper case, de-duplicated, in order) from lines of a watchlist"""
+    symbols = []
+    for line in lines:
+        symbol = line.split("#", 1)[0].strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+class BatchIndex:
+    """
+    summary index of a batch run - index.json (for resuming) & index.md (for humans),
+    both re-written after every completed symbol (thread-safe)
+    """
+
+    def __init__(self, output_dir: pathlib.Path):
+        self.output_dir = output_dir
+        self.json_path = output_dir / "index.json"
+        self.entries: Dict[str, dict] = {}
+        # symbols that failed in this run (entries also hold earlier runs)
+        self.failed: List[str] = []
+        if self.json_path.exists():
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self._lock = threading.Lock()
+
+    def completed(self, symbol: str) -> bool:
+        entry = self.entries.get(symbol)
+        return (
+            entry is not None
+            and entry["status"] in ("completed", "cached")
+            and (self.output_dir / entry["report"]).exists()
+        )
+
+    def update(self, symbol: str, entry: dict):
+        with self._lock:
+            self.entries[symbol] = entry
+            if entry["status"] == "failed":
+                self.failed.append(symbol)
+            tmp_path = self.json_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            tmp_path.replace(self.json_path)
+            self._write_markdown()
+
+    def _write_markdown(self):
+        lines = [
+            "# Investment Analysis - Batch Summary",
+            "",
+            f"Updated: {datetime.now().isoformat(timespec='seconds')}",
+            "",
+            "| Symbol | Status | Time (s) | Yahoo calls | Analyzed at | Report / Error |",
+            "|:-------|:-------|---------:|------------:|:------------|:---------------|",
+        ]
+        for symbol in sorted(self.entries):
+            entry = self.entries[symbol]
+            details = (
+                f"[{entry['report']}]({entry['report']})"
+                if entry["status"] != "failed"
+                else entry.get("error", "").replace("|", "/").replace("\n", " ")[:200]
+            )
+            lines.append(
+                f"| {symbol} | {entry['status']} | {entry.get('seconds', 0):.1f} "
+                f"| {entry.get('network', {}).get('calls', '')} "
+                f"| {entry.get('analyzed_at', '')} | {details} |"
+            )
+        with open(self.output_dir / "index.md", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def create_worker_agent(agent=None):
+    """
+    copy of the shared investment analysis agent (& team) for a worker thread - agents
+    keep per-run state, so concurrent analyses can't share one
+    Params:
+        agent: agent to copy (default: get_agent("investment_analysis"))
+    """
+    agent = (agent or get_agent("investment_analysis")).deep_copy()
+    # debug output of concurrent runs would be interleaved & unreadable
+    for team_agent in [agent] + (agent.team or []):
+        team_agent.debug_mode = False
+    return agent
+
+
+def run_investment_analysis(
+    symbol: str, create_agent: Optional[Callable] = None
+) -> Tuple[str, Optional[List[str]]]:
+    """
+    runs the investment analysis of symbol on a new worker agent (see create_worker_agent)
+    Returns:
+        (analysis, peers used for peer comparison) - as expected by AnalysisCache.analyze()
+    """
+    agent = (create_agent or create_worker_agent)()
+    response = agent.run(f"Generate investment analysis for {symbol}", markdown=True)
+    try:
+        record_run_metrics(agent, symbol)
+    except Exception as e:
+        logger.warning(f"Unable to record run metrics of {symbol}: {e}")
+    return response.content, peers_used(agent)
+
+
+def analyze_symbol(
+    symbol: str,
+    output_dir: pathlib.Path,
+    analysis_cache: Optional[AnalysisCache] = None,
+    create_agent: Optional[Callable] = None,
+    retries: int = 1,
+    profile: bool = False,
+    network_budget: Optional[dict] = None,
+) -> dict:
+    """
+    analyzes symbol & writes its report
+    Params:
+        symbol: valid ticker symbol (as used by Yahoo Finance!)
+        output_dir: folder for the report
+        analysis_cache: re-use past analyses with unchanged inputs (None = always analyze)
+        create_agent: returns the agent to use (default: create_worker_agent)
+        retries: times to retry a failed analysis (with exponential backoff)
+        profile: profile the analysis (see utils/profiling.py)
+        network_budget: max_calls, max_bytes & mode of the Yahoo! Finance requests of
+            each attempt (see utils/network_accounting.py)
+    Returns:
+        index entry for symbol (with the network calls of the last attempt)
+    """
+    run_analysis = functools.partial(run_investment_analysis, symbol, create_agent)
+
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        # built in the try (e.g. a bad budget from the env fails the symbol, not the batch)
+        network = None
+        try:
+            # spans of each attempt are exported to the trace dir (see utils/tracing.py)
+            profiling = profile_analysis(symbol) if profile else nullcontext()
+            network = NetworkAccount(symbol=symbol, attempt=attempt, **(network_budget or {}))
+            with profiling, Trace("analysis", symbol=symbol, attempt=attempt), network:
+                if analysis_cache is not None:
+                    result = analysis_cache.analyze(symbol, run_analysis)
+                    analysis, status = result.analysis, "cached" if result.cached else "completed"
+                else:
+                    analysis, _ = run_analysis()
+                    status = "completed"
+            break
+        except Exception as e:
+            # a retry would make the same requests, over budget again
+            if attempt == retries or isinstance(e, NetworkBudgetExceeded):
+                return {
+                    "status": "failed",
+                    "error": str(e),
+                    "seconds": time.perf_counter() - start,
+                    "network": network.totals() if network is not None else {},
+                    "analyzed_at": datetime.now().isoformat(timespec="seconds"),
+                }
+            time.sleep(2**attempt)
+
+    report = f"{symbol}.md"
+    with open(output_dir / report, "w", encoding="utf-8") as f:
+        f.write(f"# Investment Analysis - {symbol}\n\n{analysis}\n")
+    return {
+        "status": status,
+        "report": report,
+        "seconds": time.perf_counter() - start,
+        "network": network.totals(),
+        "analyzed_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def run_batch(
+    symbols: List[str],
+    output_dir: pathlib.Path = DEFAULT_OUTPUT_DIR,
+    workers: int = 4,
+    force: bool = False,
+    use_cache: bool = True,
+    create_agent: Optional[Callable] = None,
+    retries: int = 1,
+    profile: bool = False,
+    network_budget: Optional[dict] = None,
+) -> BatchIndex:
+    """analyzes symbols with a pool of workers threads (see module docstring)"""
+    if profile and workers > 1:
+        # one analysis can be profiled at a time (see utils/profiling.py)
+        console.print("[yellow]Profiling analyses, using 1 worker")
+        workers = 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index = BatchIndex(output_dir)
+    pending = [s for s in symbols if force or not index.completed(s)]
+    if len(pending) < len(symbols):
+        console.print(
+            f"[yellow]Skipping {len(symbols) - len(pending)} symbols analyzed in an earlier run"
+        )
+    analysis_cache = AnalysisCache() if use_cache else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as executor:
+        futures = {
+            executor.submit(
+                analyze_symbol,
+                symbol,
+                output_dir,
+                analysis_cache,
+                create_agent,
+                retries,
+                profile,
+                network_budget,
+            ): symbol
+            for symbol in pending
+        }
+        for i, future in enumerate(as_completed(futures), start=1):
+            symbol = futures[future]
+            entry = future.result()
+            index.update(symbol, entry)
+            color = "red" if entry["status"] == "failed" else "green"
+            console.print(
+                f"[{color}][{i}/{len(pending)}] {symbol}: {entry['status']} "
+                f"in {entry['seconds']:.1f}s"
+            )
+
+    console.print(
+        f"Analyzed {len(pending)} symbols in {time.perf_counter() - start:.1f}s "
+        f"with {workers} workers ({len(index.failed)} failed). Summary: {output_dir / 'index.md'}"
+    )
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch investment analysis of a watchlist")
+    parser.add_argument(
+        "watchlist", help="file with one symbol per line, or - to read from stdin"
+    )
+    parser.add_argument("--output-dir", type=pathlib.Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=4, help="concurrent analyses")
+    parser.add_argument("--retries", type=int, default=1, help="retries of failed analyses")
+    parser.add_argument("--force", action="store_true", help="re-analyze completed symbols")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always run the LLM, even if inputs are unchanged since the last analysis",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile each analysis (hot functions, flamegraph stacks & peak memory)",
+    )
+    parser.add_argument(
+        "--max-yahoo-calls", type=int, help="Yahoo! Finance requests allowed per analysis"
+    )
+    parser.add_argument(
+        "--max-yahoo-bytes", type=int, help="Yahoo! Finance bytes allowed per analysis"
+    )
+    parser.add_argument(
+        "--over-budget",
+        choices=BUDGET_MODES,
+        help="fail the analysis or serve requests from earlier responses, once over budget",
+    )
+    args = parser.parse_args()
+
+    if args.watchlist == "-":
+        symbols = read_symbols(sys.stdin)
+    else:
+        with open(args.watchlist, "r", encoding="utf-8") as f:
+            symbols = read_symbols(f)
+
+    index = run_batch(
+        symbols,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        force=args.force,
+        use_cache=not args.no_cache,
+        retries=args.retries,
+        profile=args.profile,
+        network_budget={
+            "max_calls": args.max_yahoo_calls,
+            "max_bytes": args.max_yahoo_bytes,
+            "mode": args.over_budget,
+        },
+    )
+    sys.exit(1 if index.failed else 0)
@@ -12,18 +12,54 @@ Code is meant for illustration purposes ONLY. Use at your own risk!
 Author is not liable for any damages arising from direct/indirect use of this code.
 """
 
+import argparse
+from contextlib import nullcontext
+
 from rich.console import Console
+from rich.markdown import Markdown
 import yfinance as yf
 from textwrap import dedent
 
 from agno.utils.log import logger
 
-from agents.investment_analysis_agent import investment_analysis_agent
+from agents.registry import get_agent
+from utils.analysis_cache import AnalysisCache, peers_used
+from utils.tracing import Trace
+from utils.profiling import profile_analysis
+from utils.network_accounting import NetworkAccount
+from utils.run_metrics import record_run_metrics
+
+# past analyses, re-used when none of their inputs have changed
+analysis_cache = AnalysisCache()
 
 
 def generate_investment_analysis(symbol: str):
+    try:
+        check = analysis_cache.check(symbol)
+    except Exception as e:
+        logger.warning(f"Unable to fingerprint inputs of {symbol} ({e}), not caching")
+        check = None
+
+    if check is not None and check.hit is not None:
+        console.print(
+            f"[yellow]No inputs changed since the analysis of {check.hit.created}, "
+            f"re-using it (delete {analysis_cache.cache_dir} to force a new analysis)"
+        )
+        console.print(Markdown(check.hit.analysis))
+        return
+    if check is not None and check.previous is not None:
+        console.print(f"[yellow]Inputs changed since last analysis: {', '.join(check.changed_inputs)}")
+
     prompt = f"Generate investment analysis for {symbol}"
-    return investment_analysis_agent.print_response(prompt, stream=True)
+    # the agent team is built on first use (and reused for later symbols)
+    agent = get_agent("investment_analysis")
+    agent.print_response(prompt, stream=True)
+    try:
+        record_run_metrics(agent, symbol)
+    except Exception as e:
+        logger.warning(f"Unable to record run metrics of {symbol}: {e}")
+    if check is not None and agent.run_response.content:
+        analysis_cache.store(check, agent.run_response.content, peers_used(agent))
 
 
 def is_valid_stock_symbol(symbol: str) -> bool:
@@ -47,6 +83,14 @@ def is_valid_stock_symbol(symbol: str) -> bool:
 
 console = Console()
 
+parser = argparse.ArgumentParser(description="Investment analysis of companies (console)")
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="profile each analysis (hot functions, flamegraph stacks & peak memory)",
+)
+args = parser.parse_args()
+
 # try for various companies (some sample tickers below)
 # refer to the Yahoo! Finance website for ticker symbols
 # -- on NY Stock Exchange (NYSE)
@@ -73,4 +117,19 @@ while True:
         console.print(f"[red]{stock_symbol} does not appear to be a valid symbol!")
         continue
 
-    generate_investment_analysis(stock_symbol.upper())
+    # spans (yfinance fetches, tool calls, agent runs & LLM calls) are exported to the
+    # trace dir - see utils/tracing.py
+    # --profile: see utils/profiling.py for the outputs
+    profiling = profile_analysis(stock_symbol) if args.profile else nullcontext()
+    with profiling as profile, Trace("analysis", symbol=stock_symbol.upper()), NetworkAccount(
+        symbol=stock_symbol.upper()
+    ) as network:
+        generate_investment_analysis(stock_symbol.upper())
+    totals = network.totals()
+    console.print(
+        f"[yellow]Yahoo! Finance: {totals['calls']} calls ({totals['redundant']} redundant), "
+        f"{totals['bytes'] / 1024:.0f} KB in {totals['seconds']:.1f}s"
+    )
+    if profile is not None:
+        console.print(f"[yellow]{profile.summary()}")
+        console.print(profile.top_functions.head(10).round(3).to_string(index=False))
@@ -12,14 +12,29 @@ Code is meant for illustration purposes ONLY. Use at your own risk!
 Author is not liable for any damages arising from direct/indirect use of this code.
 """
 
+import time
 import numpy as np
 import streamlit as st
 import yfinance as yf
-from typing import Iterator
+from typing import Dict, Optional
 
-from agno.agent import RunResponse
 from agno.utils.log import logger
-from agents.investment_analysis_agent import investment_analysis_agent
+from agents.registry import get_agent
+from utils.analysis_cache import AnalysisCache, fingerprint_inputs
+from utils.analysis_jobs import AnalysisJob, AnalysisJobRunner
+from utils.tracing import Trace
+from utils.profiling import ProfileReport
+from investment_analysis_batch import create_worker_agent
+
+# streamlit re-runs this script on every interaction - downloads & agents are cached
+# (per server process, so shared by all sessions) for these many seconds
+TICKER_INFO_TTL = 24 * 3600
+# inputs of an analysis include the latest news, so re-check them more often
+ANALYSIS_INPUTS_TTL = 15 * 60
+# analyses run concurrently (across all sessions), others wait in the queue
+ANALYSIS_WORKERS = 2
+# seconds between refreshes of the progress of running analyses
+JOB_POLL_SECONDS = 1.0
 
 # Page configuration
 st.set_page_config(
@@ -52,6 +67,33 @@ if "analysis_generated" not in st.session_state:
     st.session_state.analysis_generated = False
 
 
+@st.cache_resource
+def get_investment_analysis_agent():
+    """the investment analysis agent team - built on first use & shared by all sessions"""
+    return get_agent("investment_analysis")
+
+
+@st.cache_data(ttl=ANALYSIS_INPUTS_TTL, show_spinner=False)
+def cached_fingerprint_inputs(symbol: str, peers=None) -> Dict[str, str]:
+    """fingerprint_inputs (statements, peers, trading day, news & prompts) of symbol, cached"""
+    return fingerprint_inputs(symbol, peers)
+
+
+@st.cache_resource
+def get_analysis_cache() -> AnalysisCache:
+    """
+    past analyses, re-used when none of their inputs have changed - with cached inputs, a
+    symbol analyzed in any session is shown instantly in all other sessions
+    """
+    return AnalysisCache(fingerprint_inputs=cached_fingerprint_inputs)
+
+
+@st.cache_data(ttl=TICKER_INFO_TTL, show_spinner=False)
+def get_company_name(symbol: str) -> Optional[str]:
+    return yf.Ticker(symbol).info.get("longName")
+
+
+@st.cache_data(ttl=TICKER_INFO_TTL, show_spinner=False)
 def is_valid_stock_symbol(symbol: str) -> bool:
     # try:
     #     ticker = yf.Ticker(symbol.upper())
@@ -71,12 +113,114 @@ def is_valid_stock_symbol(symbol: str) -> bool:
     return True
 
 
-def generate_investment_analysis(symbol: str, agent):
-    prompt = f"Generate investment analysis for {symbol}"
-    # return agent.print_response(prompt, stream=True)
-    response: RunResponse = agent.run(prompt, markdown=True)
-    return response.content, response.metrics
-    # response_stream : Iterator[RunResponse] = agent.run(prompt, markdown=True, stream=True)
+STAGE_LABELS = {
+    "financial": "Financial analysis",
+    "peers": "Peer comparison",
+    "sentiment": "Sentiment analysis",
+    "synthesis": "Investment recommendation",
+}
+STATUS_ICONS = {
+    "pending": "⏸️",
+    "running": "⏳",
+    "completed": "✅",
+    "skipped": "⏭️",
+    "failed": "❌",
+}
+
+
+@st.cache_resource
+def get_job_runner() -> AnalysisJobRunner:
+    """runs analyses in the background - one pool of workers shared by all sessions"""
+    # each job runs on its own copy of the (cached) agent team
+    agent = get_investment_analysis_agent()
+    return AnalysisJobRunner(
+        workers=ANALYSIS_WORKERS,
+        analysis_cache=get_analysis_cache(),
+        create_agent=lambda: create_worker_agent(agent),
+    )
+
+
+def render_stages(job: AnalysisJob) -> str:
+    """markdown list of the stages of job, with timings of completed stages"""
+    lines = []
+    for name, stage in job.stages.items():
+        if stage.seconds is not None:
+            elapsed = f" ({stage.seconds:.1f}s)"
+        elif stage.status == "running":
+            elapsed = f" ({time.time() - stage.started:.0f}s so far)"
+        else:
+            elapsed = ""
+        lines.append(f"- {STATUS_ICONS[stage.status]} {STAGE_LABELS[name]}{elapsed}")
+    return "\n".join(lines)
+
+
+def show_waterfall(trace: Trace):
+    """timeline of the spans of an analysis (yfinance fetches, tool calls, agent runs, LLM calls)"""
+    import altair as alt
+
+    df = trace.waterfall()
+    if df.empty:
+        return
+    df["end"] = df["start"] + df["seconds"]
+    # indent nested spans, number them to keep the rows in start order
+    df["span"] = [
+        f"{i:03d} {'  ' * depth}{name}" for i, (depth, name) in enumerate(zip(df["depth"], df["name"]))
+    ]
+    chart = (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X("start:Q", title="seconds"),
+            x2="end:Q",
+            y=alt.Y("span:N", sort=None, title=None, axis=alt.Axis(labelLimit=400)),
+            color="kind:N",
+            tooltip=["name", "kind", alt.Tooltip("seconds:Q", format=".3f"),
+                     alt.Tooltip("self_seconds:Q", format=".3f")],
+        )
+        .properties(height=max(18 * len(df), 120))
+    )
+    st.altair_chart(chart, use_container_width=True)
+    by_kind = df[df["kind"] != "analysis"].groupby("kind")["self_seconds"].sum().round(3)
+    st.markdown(
+        "**Self time by kind**: "
+        + " | ".join(f"{kind}: {seconds:.2f}s" for kind, seconds in by_kind.items())
+    )
+
+
+def show_profile(profile: ProfileReport):
+    """hot functions & peak memory of a profiled analysis, with its stacks for a flamegraph"""
+    st.markdown(f"**{profile.summary()}**")
+    st.dataframe(profile.top_functions.round(4), hide_index=True)
+    stacks = profile.output_dir / "stacks.folded"
+    if stacks.exists():
+        st.download_button(
+            "Download stacks (flamegraph.pl / speedscope)",
+            stacks.read_bytes(),
+            file_name=f"{profile.name}.folded",
+        )
+    if profile.top_allocations:
+        st.markdown("**Top allocation sites**")
+        st.code("\n".join(profile.top_allocations), language=None)
+
+
+def show_metrics(metrics: dict, time_to_first_token: Optional[float] = None):
+    """displays token counts & times taken by all agents (+ time-to-first-token when streaming)"""
+    # metrics is a dict like this
+    # metrics = {
+    #   "input_tokens":[input tokens per agent],
+    #   "output_tokens":[input tokens per agent],
+    #   "total_tokens":[input tokens + output tokens per agent],
+    #   "time":[total time per agent],
+    #   }
+    input_tokens = np.array(metrics.get("input_tokens", [0])).sum()
+    output_tokens = np.array(metrics.get("output_tokens", [0])).sum()
+    total_tokens = np.array(metrics.get("total_tokens", [0])).sum()
+    total_time = np.array(metrics.get("time", [0.0])).sum()
+    # st.markdown(f"**Metrics**: {metrics}")
+    metrics_md = f"**Token Count** -> Input: {input_tokens:5d} - Output: {output_tokens:5d} - Total: {total_tokens:5d} | **Time Taken**: {total_time:2f}s"
+    if time_to_first_token is not None:
+        metrics_md += f" | **Time to First Token**: {time_to_first_token:.2f}s"
+    st.markdown(metrics_md)
 
 
 # Main UI
@@ -116,8 +260,22 @@ with st.container():
     with col2:
         col2.markdown(f"<div style='height: 28px;'></div>", unsafe_allow_html=True)
         analyze_button = st.button("Analyze", type="primary")
+    reuse_analysis = st.toggle(
+        "Re-use the previous analysis if none of its inputs (financials, news, peers, prompts) changed",
+        value=True,
+        key="reuse_analysis",
+    )
+    profile_job = st.toggle(
+        "Debug: profile the analysis (hot functions, flamegraph stacks & peak memory)",
+        value=False,
+        key="profile_analysis",
+    )
+
+# Analysis section - analyses run as background jobs, so several symbols can be
+# queued & the page stays responsive while they run
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
 
-# Analysis section
 if analyze_button and stock_symbol:
     # check if user has entered a valid stock symbol
     if not is_valid_stock_symbol(stock_symbol):
@@ -129,41 +287,79 @@ if analyze_button and stock_symbol:
         )
         st.stop()
 
-    try:
-        stock_symbol = stock_symbol.upper()
-        company_name = yf.Ticker(stock_symbol).info.get("longName")
-        with st.spinner(
-            f"Generating investment analysis for {company_name} ({stock_symbol})..."
-        ):
-            analysis, metrics = generate_investment_analysis(
-                stock_symbol, investment_analysis_agent
-            )
+    job = get_job_runner().submit(stock_symbol, reuse=reuse_analysis, profile=profile_job)
+    if job.id not in st.session_state.job_ids:
+        # latest first
+        st.session_state.job_ids.insert(0, job.id)
+    st.session_state.analysis_generated = True
 
-        st.success("Analysis completed!")
-
-        # Display analysis in an expandable container
-        with st.expander("View Detailed Analysis", expanded=True):
-            # metrics is a dict like this
-            # metrics = {
-            #   "input_tokens":[input tokens per agent],
-            #   "output_tokens":[input tokens per agent],
-            #   "total_tokens":[input tokens + output tokens per agent],
-            #   "time":[total time per agent],
-            #   }
-            input_tokens = np.array(metrics["input_tokens"]).sum()
-            output_tokens = np.array(metrics["output_tokens"]).sum()
-            total_tokens = np.array(metrics["total_tokens"]).sum()
-            total_time = np.array(metrics["time"]).sum()
-            # st.markdown(f"**Metrics**: {metrics}")
-            st.markdown(
-                f"**Token Count** -> Input: {input_tokens:5d} - Output: {output_tokens:5d} - Total: {total_tokens:5d} | **Time Taken**: {total_time:2f}s"
+
+def show_job(job: AnalysisJob):
+    company_name = get_company_name(job.symbol)
+    label = f"{company_name} ({job.symbol}) - {job.status}"
+    if not job.active:
+        label += f" in {job.seconds:.1f}s"
+    with st.expander(label, expanded=True):
+        if job.status == "failed":
+            st.error(f"An error occurred: {job.error}")
+        if job.cached:
+            st.success(
+                "None of the inputs changed since the last analysis, showing it "
+                "(switch off re-use to force a new analysis)"
             )
-            st.markdown(analysis)
+        if job.changed_inputs:
+            st.info(f"Inputs changed since last analysis: {', '.join(job.changed_inputs)}")
+        if not job.cached:
+            st.markdown(render_stages(job))
+
+        # each member's output is shown as soon as it completes
+        outputs = [(name, stage.output) for name, stage in job.stages.items() if stage.output]
+        if outputs:
+            tabs = st.tabs([STAGE_LABELS[name] for name, _ in outputs])
+            for tab, (_, output) in zip(tabs, outputs):
+                tab.markdown(output)
+        if job.status == "completed" and job.metrics:
+            show_metrics(job.metrics, job.time_to_first_token)
+        if job.analysis:
+            st.markdown(job.analysis)
+        if not job.active and job.trace is not None and not job.cached:
+            with st.popover("Latency breakdown (waterfall)", use_container_width=True):
+                show_waterfall(job.trace)
+        if not job.active and job.network is not None and job.network.calls:
+            totals = job.network.totals()
+            with st.popover(
+                f"Yahoo! Finance calls: {totals['calls']} ({totals['redundant']} redundant)",
+                use_container_width=True,
+            ):
+                st.markdown(
+                    f"**{totals['calls']} calls, {totals['bytes'] / 1024:.0f} KB in "
+                    f"{totals['seconds']:.2f}s** | served from cache: {totals['cached']} | "
+                    f"refused (over budget): {totals['refused']}"
+                )
+                st.dataframe(job.network.summary(), hide_index=True)
+        if not job.active and job.profile is not None:
+            with st.popover("Profile (hot functions & memory)", use_container_width=True):
+                show_profile(job.profile)
+
+
+def show_jobs():
+    runner = get_job_runner()
+    jobs = [job for job in map(runner.job, st.session_state.job_ids) if job is not None]
+    polling = any(job.active for job in jobs)
+
+    # re-runs (only) this part of the page while any job is active
+    @st.fragment(run_every=JOB_POLL_SECONDS if polling else None)
+    def jobs_panel():
+        for job in jobs:
+            show_job(job)
+        if polling and not any(job.active for job in jobs):
+            # all done - a full re-run stops the polling
+            st.rerun()
+
+    jobs_panel()
 
-        st.session_state.analysis_generated = True
 
-    except Exception as e:
-        st.error(f"An error occurred: {str(e)}")
+show_jobs()
 
 # Footer
 st.markdown("---")
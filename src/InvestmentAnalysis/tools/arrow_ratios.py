@@ -0,0 +1,284 @@
+"""
+arrow_ratios.py - the ratios of tools/ratios.py calculated over Arrow tables, for a whole
+    panel of companies at once.
+
+    tools/ratios.py fetches the statements again for every ratio table, and copies them
+    several times on the way (yfinance frame -> .transpose() -> .sort_index() -> a Series
+    per line item -> a new DataFrame of ratios). Here each company's statements are fetched
+    once and normalized into an Arrow table with a fixed line-item schema (STATEMENT_SCHEMA:
+    one row per financial year, one float64 column per line item the ratios need, nulls
+    for items a company doesn't report). The tables of all companies are combined into one
+    panel with contiguous column buffers, and every ratio is a pyarrow.compute kernel over
+    whole columns - growth & average inventory use zero-copy slices of the column offset by
+    one row. Only ratio_frame(), the presentation layer, converts (one company's rows of
+    one category) to pandas for format_table().
+
+    Usage:
+        panel = statement_panel(["TCS.NS", "INFY.NS", "WIPRO.NS"])
+        ratios = calculate_ratio_table(panel)
+        print(format_table(ratio_frame(ratios, "TCS.NS", "liquidity")))
+
+    (see benchmarks/arrow_benchmark.py for time & peak memory vs. tools/ratios.py)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import yfinance as yf
+from agno.utils.log import logger
+
+# line items the ratios need: column -> (yf.Ticker statement, line item)
+# (ticker.income_stmt is the same statement as ticker.financials, so it isn't fetched)
+LINE_ITEMS = {
+    "Current Assets": ("balance_sheet", "Current Assets"),
+    "Current Liabilities": ("balance_sheet", "Current Liabilities"),
+    "Inventory": ("balance_sheet", "Inventory"),
+    "Cash And Cash Equivalents": ("balance_sheet", "Cash And Cash Equivalents"),
+    "Total Assets": ("balance_sheet", "Total Assets"),
+    "Stockholders Equity": ("balance_sheet", "Stockholders Equity"),
+    "Total Debt": ("balance_sheet", "Total Debt"),
+    "Ordinary Shares Number": ("balance_sheet", "Ordinary Shares Number"),
+    "Total Revenue": ("financials", "Total Revenue"),
+    "Cost Of Revenue": ("financials", "Cost Of Revenue"),
+    "Operating Income": ("financials", "Operating Income"),
+    "EBIT": ("financials", "EBIT"),
+    "EBIDTA": ("financials", "EBIDTA"),
+    "Depreciation & Amortization": ("financials", "Depreciation & Amortization"),
+    "Interest Expense": ("financials", "Interest Expense"),
+    "Net Income": ("financials", "Net Income"),
+    "Free Cash Flow": ("cash_flow", "Free Cash Flow"),
+}
+# ticker.info fields (same value for every year): column -> info key
+INFO_FIELDS = {"Market Cap": "marketCap", "Trailing PE": "trailingPE"}
+
+STATEMENT_SCHEMA = pa.schema(
+    [pa.field("symbol", pa.string()), pa.field("period", pa.date32())]
+    + [pa.field(column, pa.float64()) for column in list(LINE_ITEMS) + list(INFO_FIELDS)]
+)
+
+# ratio columns of each table of tools/ratios.py (keys as in utils/analytics_store.py)
+RATIO_CATEGORIES = {
+    "liquidity": ["Current Ratio", "Quick Ratio", "Cash Ratio"],
+    "profitability": [
+        "Return on Equity (RoE)",
+        "Return on Assets (RoA)",
+        "Return on Capital Employed (RoCE)",
+        "Net Profit Margin",
+        "Operating Margin",
+    ],
+    "efficiency": ["Asset Turnover", "Inventory Turnover"],
+    "valuation": [
+        "Price-to-Earnings (P/E)",
+        "Price-to-Sales (P/S)",
+        "Price-to-Book (P/B)",
+        "EV/EBIDTA",
+    ],
+    "leverage": ["Debt-to-Equity (D/E)", "Interest Coverage"],
+    "performance_and_growth": [
+        "Revenue Growth (%)",
+        "EBIT Growth (%)",
+        "Net Profit Margin (%)",
+        "EPS Growth (%)",
+        "EPS",
+        "Debt-to-Equity",
+        "Free Cash Flow",
+        "FCF Growth (%)",
+    ],
+}
+# ratios left out (like tools/ratios.py does) for companies not reporting a line item
+OPTIONAL_RATIOS = {"Quick Ratio": "Inventory", "Inventory Turnover": "Inventory"}
+
+
+def statement_table(
+    symbol: str,
+    ticker=None,
+    statements: Optional[Dict[str, pd.DataFrame]] = None,
+    info: Optional[dict] = None,
+) -> pa.Table:
+    """
+    statements of symbol, fetched once, as a table with STATEMENT_SCHEMA
+    Params:
+        ticker: yf.Ticker(symbol), if already created by the caller
+        statements, info: yf.Ticker statements (of LINE_ITEMS, name -> DataFrame) & info,
+            if already fetched by the caller
+    Returns:
+        pa.Table with a row per financial year (oldest first)
+    """
+    ticker = ticker or yf.Ticker(symbol)
+    if statements is None:
+        statements = {name: getattr(ticker, name) for name in {s for s, _ in LINE_ITEMS.values()}}
+    periods = pd.DatetimeIndex(
+        sorted(set().union(*(df.columns for df in statements.values())))
+    )
+    rows = len(periods)
+    columns = {
+        "symbol": pa.array([symbol] * rows, pa.string()),
+        "period": pa.array(periods.date, pa.date32()),
+    }
+    # one reindex per statement: its line items (missing ones NaN) x all periods
+    values = {
+        name: df.reindex(index=[i for s, i in LINE_ITEMS.values() if s == name], columns=periods)
+        for name, df in statements.items()
+    }
+    for column, (statement, item) in LINE_ITEMS.items():
+        # NaN -> null
+        row = values[statement].loc[item].to_numpy(dtype=np.float64)
+        columns[column] = pa.array(row, pa.float64(), from_pandas=True)
+    info = (ticker.info if info is None else info) or {}
+    for column, key in INFO_FIELDS.items():
+        columns[column] = pa.array([info.get(key)] * rows, pa.float64())
+    return pa.Table.from_pydict(columns, schema=STATEMENT_SCHEMA)
+
+
+def statement_panel(symbols: Sequence[str], tickers: Optional[Dict[str, object]] = None) -> pa.Table:
+    """
+    statements of symbols (see statement_table) in one table, ordered by symbol & period,
+    with a single contiguous buffer per column (companies that can't be fetched are skipped)
+    """
+    tables = []
+    for symbol in symbols:
+        try:
+            tables.append(statement_table(symbol, (tickers or {}).get(symbol)))
+        except Exception as e:
+            logger.warning(f"Unable to fetch statements of {symbol}: {e}")
+    if not tables:
+        return STATEMENT_SCHEMA.empty_table()
+    return pa.concat_tables(tables).combine_chunks()
+
+
+def _previous_of_symbol(panel: pa.Table, values) -> Tuple[pa.Array, pa.Array]:
+    """
+    (values of rows 1..n-1, values of the row before each of them) as zero-copy slices,
+    with the previous value nulled where it belongs to another company
+    """
+    values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+    symbols = panel.column("symbol").combine_chunks()
+    rows = len(values)
+    current, previous = values.slice(1, rows - 1), values.slice(0, rows - 1)
+    same_symbol = pc.equal(symbols.slice(1, rows - 1), symbols.slice(0, rows - 1))
+    return current, pc.if_else(same_symbol, previous, pa.scalar(None, pa.float64()))
+
+
+def _with_first_row(values: pa.Array) -> pa.Array:
+    """values of rows 1..n-1 (see _previous_of_symbol) with a null for row 0"""
+    return pa.concat_arrays([pa.nulls(1, pa.float64()), values])
+
+
+def _growth(panel: pa.Table, values) -> pa.Array:
+    """% change from the previous year of the same company (null for its first year)"""
+    if len(values) == 0:
+        return pa.array([], pa.float64())
+    current, previous = _previous_of_symbol(panel, values)
+    return _with_first_row(pc.multiply(pc.subtract(pc.divide(current, previous), 1.0), 100.0))
+
+
+def _two_year_average(panel: pa.Table, values) -> pa.Array:
+    """mean of this & the previous year of the same company (null for its first year)"""
+    if len(values) == 0:
+        return pa.array([], pa.float64())
+    current, previous = _previous_of_symbol(panel, values)
+    return _with_first_row(pc.divide(pc.add(current, previous), 2.0))
+
+
+def calculate_ratio_table(panel: pa.Table) -> pa.Table:
+    """
+    ratios of every company & year of panel (see statement_panel) - the ratios of all
+    RATIO_CATEGORIES, calculated as in tools/ratios.py
+    Returns:
+        pa.Table with symbol, period & a float64 column per ratio
+    """
+    column = panel.column
+    divide, subtract = pc.divide, pc.subtract
+    current_assets, current_liabilities = column("Current Assets"), column("Current Liabilities")
+    revenue, net_income = column("Total Revenue"), column("Net Income")
+    total_assets, equity = column("Total Assets"), column("Stockholders Equity")
+    total_debt, cash = column("Total Debt"), column("Cash And Cash Equivalents")
+    ebit, market_cap = column("EBIT"), column("Market Cap")
+    eps = divide(net_income, column("Ordinary Shares Number"))
+    ebidta = pc.coalesce(
+        column("EBIDTA"),
+        pc.add(column("Operating Income"), pc.coalesce(column("Depreciation & Amortization"), 0.0)),
+    )
+
+    ratios = {
+        "Current Ratio": divide(current_assets, current_liabilities),
+        "Quick Ratio": divide(subtract(current_assets, column("Inventory")), current_liabilities),
+        "Cash Ratio": divide(cash, current_liabilities),
+        "Return on Equity (RoE)": divide(net_income, equity),
+        "Return on Assets (RoA)": divide(net_income, total_assets),
+        "Return on Capital Employed (RoCE)": divide(ebit, subtract(total_assets, current_liabilities)),
+        "Net Profit Margin": divide(net_income, revenue),
+        "Operating Margin": divide(column("Operating Income"), revenue),
+        "Asset Turnover": divide(revenue, total_assets),
+        "Inventory Turnover": divide(
+            column("Cost Of Revenue"), _two_year_average(panel, column("Inventory"))
+        ),
+        "Price-to-Earnings (P/E)": column("Trailing PE"),
+        "Price-to-Sales (P/S)": divide(market_cap, revenue),
+        "Price-to-Book (P/B)": divide(market_cap, equity),
+        "EV/EBIDTA": divide(pc.add(market_cap, subtract(total_debt, cash)), ebidta),
+        "Debt-to-Equity (D/E)": divide(total_debt, equity),
+        "Interest Coverage": divide(ebit, column("Interest Expense")),
+        "Revenue Growth (%)": _growth(panel, revenue),
+        "EBIT Growth (%)": _growth(panel, ebit),
+        "Net Profit Margin (%)": pc.multiply(divide(net_income, revenue), 100.0),
+        "EPS Growth (%)": _growth(panel, eps),
+        "EPS": eps,
+        "Debt-to-Equity": divide(total_debt, equity),
+        "Free Cash Flow": column("Free Cash Flow"),
+        "FCF Growth (%)": _growth(panel, column("Free Cash Flow")),
+    }
+    return pa.table({"symbol": column("symbol"), "period": column("period"), **ratios})
+
+
+def symbol_rows(table: pa.Table) -> Dict[str, Tuple[int, int]]:
+    """(offset, rows) of each company in a panel or ratio table (rows of a company are adjacent)"""
+    rows, offset = {}, 0
+    symbols = table.column("symbol").to_pylist()
+    for i in range(1, len(symbols) + 1):
+        if i == len(symbols) or symbols[i] != symbols[offset]:
+            rows[symbols[offset]] = (offset, i - offset)
+            offset = i
+    return rows
+
+
+def ratio_frame(
+    ratios: pa.Table,
+    symbol: str,
+    category: str,
+    rows: Optional[Dict[str, Tuple[int, int]]] = None,
+    panel: Optional[pa.Table] = None,
+) -> pd.DataFrame:
+    """
+    one ratio table of one company, as returned by the calculate_X functions of tools/ratios.py
+    Params:
+        ratios: returned by calculate_ratio_table
+        category: key of RATIO_CATEGORIES
+        rows: symbol_rows(ratios), if already computed (saves a pass per call)
+        panel: statement panel of ratios - OPTIONAL_RATIOS of companies not reporting their
+            line item are left out if given
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each ratio of category
+    """
+    offset, length = (rows or symbol_rows(ratios))[symbol]
+    columns: List[str] = RATIO_CATEGORIES[category]
+    if panel is not None:
+        # (panel & ratios have the same rows)
+        items = panel.slice(offset, length)
+        columns = [
+            c for c in columns
+            if c not in OPTIONAL_RATIOS or items.column(OPTIONAL_RATIOS[c]).null_count < length
+        ]
+    table = ratios.slice(offset, length)
+    return pd.DataFrame(
+        {c: table.column(c).to_numpy() for c in columns},
+        index=pd.DatetimeIndex(table.column("period").to_numpy()),
+    )
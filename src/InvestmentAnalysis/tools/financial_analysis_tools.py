@@ -10,8 +10,11 @@ Code is meant for illustration purposes ONLY. Use at your own risk!
 Author is not liable for any damages arising from direct/indirect use of this code.
 """
 import json
+import functools
 import yfinance
+from typing import Callable, Union
 
+import pandas as pd
 from agno.tools import Toolkit
 from agno.utils.log import logger
 
@@ -20,7 +23,14 @@ try:
     import yfinance as yf
 except ImportError:
     raise ImportError("`yfinance` not installed. Please install using `pip install yfinance`.")
+from .formatting import OutputFormat, format_number, format_record, format_table, get_output_format
 from .ratios import (
+    calculate_liquidity_ratios,
+    calculate_profitability_ratios,
+    calculate_efficiency_ratios,
+    calculate_valuation_ratios,
+    calculate_leverage_ratios,
+    calculate_performance_and_growth_metrics,
     get_liquidity_ratios,
     get_profitability_ratios,
     get_efficiency_ratios,
@@ -40,33 +50,59 @@ class FinancialAnalysisTools(Toolkit):
         performance_and_growth_metrics=False,
         company_info=False,
         enable_all=False,
+        output_format: Union[str, OutputFormat, None] = None,
     ):
         super().__init__(name="finanalysis_tools")
+        # encoding of tool outputs - markdown, csv or tsv (see tools/formatting.py)
+        self.output_format = get_output_format(output_format)
 
         # register functions
         if liquidity_ratios or enable_all:
             logger.debug("Registering get_liquidity_ratios function")
-            self.register(get_liquidity_ratios)
+            self.register(self.__formatted(get_liquidity_ratios, calculate_liquidity_ratios))
         if profitability_ratios or enable_all:
             logger.debug("Registering get_profitability_ratios function")
-            self.register(get_profitability_ratios)
+            self.register(
+                self.__formatted(get_profitability_ratios, calculate_profitability_ratios)
+            )
         if efficiency_ratios or enable_all:
             logger.debug("Registering get_efficiency_ratios function")
-            self.register(get_efficiency_ratios)
+            self.register(self.__formatted(get_efficiency_ratios, calculate_efficiency_ratios))
         if valuation_ratios or enable_all:
             logger.debug("Registering get_valuation_ratios function")
-            self.register(get_valuation_ratios)
+            self.register(self.__formatted(get_valuation_ratios, calculate_valuation_ratios))
         if leverage_ratios or enable_all:
             logger.debug("Registering get_leverage_ratios function")
-            self.register(get_leverage_ratios)
+            self.register(self.__formatted(get_leverage_ratios, calculate_leverage_ratios))
         if performance_and_growth_metrics or enable_all:
             logger.debug("Registering get_performance_and_growth_metrics function")
-            self.register(get_performance_and_growth_metrics)
+            self.register(
+                self.__formatted(
+                    get_performance_and_growth_metrics,
+                    calculate_performance_and_growth_metrics,
+                )
+            )
         if company_info or enable_all:
             logger.debug("Registering get_company_info function")
             self.register(self.get_company_info)
 
-    
+
+    def __formatted(
+        self, tool: Callable[[str], str], calculate: Callable[[str], pd.DataFrame]
+    ) -> Callable[[str], str]:
+        """
+        wraps a ratios tool so it serializes its table with this toolkit's output_format.
+        The wrapper keeps the tool's name, signature & docstring, which is what the LLM sees
+        """
+
+        @functools.wraps(tool)
+        def formatted_tool(symbol: str) -> str:
+            ret = format_table(calculate(symbol), self.output_format)
+            logger.debug(ret)
+            return ret
+
+        return formatted_tool
+
     def get_company_info(self, symbol:str) -> str:
         """Use this function to get company information and overview for a given stock symbol.
 
@@ -76,6 +112,7 @@ class FinancialAnalysisTools(Toolkit):
         Returns:
             str: JSON containing company profile and overview.
         """
+        fmt = self.output_format
         try:
             company_info_full = yf.Ticker(symbol).info
             if company_info_full is None:
@@ -89,8 +126,8 @@ class FinancialAnalysisTools(Toolkit):
                 "LongName": company_info_full.get("longName"),
                 "Business Summary": company_info_full.get("longBusinessSummary"),
                 "Symbol": company_info_full.get("symbol"),
-                "Current Stock Price": f"{company_info_full.get('regularMarketPrice', company_info_full.get('currentPrice'))} {company_info_full.get('currency', 'USD')}",
-                "Market Cap": f"{company_info_full.get('marketCap', company_info_full.get('enterpriseValue'))} {company_info_full.get('currency', 'USD')}",
+                "Current Stock Price": f"{format_number(company_info_full.get('regularMarketPrice', company_info_full.get('currentPrice')), fmt)} {company_info_full.get('currency', 'USD')}",
+                "Market Cap": f"{format_number(company_info_full.get('marketCap', company_info_full.get('enterpriseValue')), fmt)} {company_info_full.get('currency', 'USD')}",
                 "Sector": company_info_full.get("sector"),
                 "Industry": company_info_full.get("industry"),
                 "Address": company_info_full.get("address1"),
@@ -117,7 +154,7 @@ class FinancialAnalysisTools(Toolkit):
                 "Gross Margins": company_info_full.get("grossMargins"),
                 "Ebitda Margins": company_info_full.get("ebitdaMargins"),
             }
-            return json.dumps(company_info_cleaned, indent=2)
+            return format_record(company_info_cleaned, fmt)
         except Exception as e:
             return f"Error fetching company profile for {symbol}: {e}"
 
@@ -0,0 +1,210 @@
+"""
+formatting.py - serialization of the tables & records returned by our agno
+    Toolkit functions. Tool outputs are pasted verbatim into the LLM prompt,
+    so the encoding we choose here directly drives input token counts (and
+    hence latency & cost) of every agent run.
+
+    Supported encodings:
+        - markdown: the original (verbose) encoding - DataFrame.to_markdown() for
+            tables and indented JSON for records. This is the default.
+        - csv/tsv: compact encodings - numbers rounded to significant digits,
+            large (currency) values scaled to M/B/T units, all-NaN columns dropped,
+            empty & duplicated record fields dropped and minified JSON for records.
+
+    The default encoding can be selected with the TOOLS_OUTPUT_FORMAT environment
+    variable (one of markdown, csv or tsv) or per Toolkit with `output_format=...`
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+ENCODINGS = ("markdown", "csv", "tsv")
+
+# large values are scaled to these units (largest first)
+SCALE_UNITS = ((1e12, "T"), (1e9, "B"), (1e6, "M"))
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """how a Toolkit function serializes its output (see module docstring)"""
+
+    encoding: str = "markdown"
+    # round numbers to these many significant digits (None = full precision)
+    significant_digits: Optional[int] = None
+    # display values >= 1 million as 416.6B, 2.88B, 55.9M etc.
+    scale_large_values: bool = False
+    # drop DataFrame columns where every value is NaN
+    drop_empty_columns: bool = False
+    # drop None values & fields duplicating an earlier field's value from records
+    deduplicate_fields: bool = False
+
+    def __post_init__(self):
+        if self.encoding not in ENCODINGS:
+            raise ValueError(
+                f"FATAL ERROR: {self.encoding} is not a supported encoding. Use one of {ENCODINGS}"
+            )
+
+    @property
+    def is_verbose(self) -> bool:
+        """True if output is exactly what we returned before compact encodings existed"""
+        return (
+            self.encoding == "markdown"
+            and self.significant_digits is None
+            and not self.scale_large_values
+            and not self.drop_empty_columns
+            and not self.deduplicate_fields
+        )
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {
+    "markdown": OutputFormat(),
+    "csv": OutputFormat(
+        encoding="csv",
+        significant_digits=4,
+        scale_large_values=True,
+        drop_empty_columns=True,
+        deduplicate_fields=True,
+    ),
+    "tsv": OutputFormat(
+        encoding="tsv",
+        significant_digits=4,
+        scale_large_values=True,
+        drop_empty_columns=True,
+        deduplicate_fields=True,
+    ),
+}
+
+
+def get_output_format(
+    output_format: Union[str, OutputFormat, None] = None,
+) -> OutputFormat:
+    """
+    resolves output_format to an OutputFormat instance
+    Params:
+        output_format: an OutputFormat instance, or name of one of the OUTPUT_FORMATS
+            or None (= use TOOLS_OUTPUT_FORMAT env variable, defaults to markdown)
+    """
+    if isinstance(output_format, OutputFormat):
+        return output_format
+    if output_format is None:
+        output_format = os.environ.get("TOOLS_OUTPUT_FORMAT", "markdown")
+    output_format = output_format.strip().lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"FATAL ERROR: {output_format} is not a supported output format. "
+            f"Use one of {list(OUTPUT_FORMATS.keys())}"
+        )
+    return OUTPUT_FORMATS[output_format]
+
+
+def format_number(value: Any, output_format: Union[str, OutputFormat, None] = None):
+    """
+    rounds & scales a single number as per output_format. Non-numeric values
+    (and NaN/inf) are returned as-is, as are all values for the verbose format.
+    Example (csv format): 416640000000.0 -> "416.6B", 0.50733241 -> "0.5073"
+    """
+    fmt = get_output_format(output_format)
+    if fmt.significant_digits is None and not fmt.scale_large_values:
+        return value
+    if isinstance(value, (bool, np.bool_)) or not isinstance(
+        value, (int, float, np.integer, np.floating)
+    ):
+        return value
+    if not math.isfinite(value):
+        return value
+
+    value, suffix = float(value), ""
+    if fmt.scale_large_values:
+        for factor, unit in SCALE_UNITS:
+            if abs(value) >= factor:
+                value, suffix = value / factor, unit
+                break
+
+    if fmt.significant_digits is not None and value != 0:
+        decimals = fmt.significant_digits - 1 - int(math.floor(math.log10(abs(value))))
+        value = round(value, decimals)
+
+    return f"{np.format_float_positional(value, trim='-')}{suffix}"
+
+
+def format_table(
+    df: pd.DataFrame, output_format: Union[str, OutputFormat, None] = None
+) -> str:
+    """
+    serializes a DataFrame (ratios table, peer comparison table etc.) as per output_format
+    Returns:
+        string representation of df, surrounded by newlines
+    """
+    fmt = get_output_format(output_format)
+    if fmt.is_verbose:
+        return f"\n{df.to_markdown()}\n"
+
+    if fmt.drop_empty_columns:
+        df = df.dropna(axis=1, how="all")
+    if isinstance(df.index, pd.DatetimeIndex):
+        # financial year end dates never have a time component
+        df = df.set_axis(df.index.strftime("%Y-%m-%d"), axis=0)
+    df = df.map(lambda v: format_number(v, fmt))
+
+    if fmt.encoding == "markdown":
+        return f"\n{df.to_markdown()}\n"
+    sep = "," if fmt.encoding == "csv" else "\t"
+    body = df.to_csv(sep=sep, na_rep="", lineterminator="\n")
+    return f"\n{body}"
+
+
+def _compact_value(value: Any, fmt: OutputFormat):
+    """recursively rounds numbers and drops empty values in nested dicts/lists"""
+    if isinstance(value, dict):
+        return {
+            k: _compact_value(v, fmt)
+            for k, v in value.items()
+            if not (fmt.deduplicate_fields and v is None)
+        }
+    if isinstance(value, (list, tuple)):
+        return [_compact_value(v, fmt) for v in value]
+    formatted = format_number(value, fmt)
+    if formatted is not value and formatted[-1].isdigit():
+        # unscaled numbers stay numbers in JSON
+        return float(formatted) if "." in formatted else int(formatted)
+    return formatted
+
+
+def format_record(
+    record: Dict[str, Any], output_format: Union[str, OutputFormat, None] = None
+) -> str:
+    """
+    serializes a dict (company info, sentiment analysis etc.) as per output_format.
+    The verbose format returns indented JSON, compact formats return minified
+    JSON without None values and without fields that repeat an earlier field's value
+    (e.g. "Summary" repeats "Business Summary" in company info)
+    """
+    fmt = get_output_format(output_format)
+    if fmt.is_verbose:
+        return json.dumps(record, indent=2)
+
+    if fmt.deduplicate_fields:
+        deduped, seen = {}, set()
+        for key, value in record.items():
+            marker = json.dumps(value, sort_keys=True, default=str)
+            if isinstance(value, str) and marker in seen:
+                continue
+            seen.add(marker)
+            deduped[key] = value
+        record = deduped
+
+    record = _compact_value(record, fmt)
+    if fmt.encoding == "markdown":
+        return json.dumps(record, indent=2, ensure_ascii=False)
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
@@ -0,0 +1,288 @@
+"""
+indicators.py - technical indicators calculated from daily price history (ticker.history)
+    - moving averages, RSI, MACD, Bollinger bands, ATR & realized volatility.
+
+The kernels work on NumPy arrays of shape (bars, symbols), so the indicators of a whole
+universe are calculated in one pass over its bars:
+    - rolling windows (SMA, Bollinger bands, volatility) use cumulative sums, i.e. O(bars)
+      whatever the window size
+    - exponential averages (EMA, MACD, Wilder's RSI & ATR) are a recursion over bars,
+      vectorized across symbols
+Missing bars are NaN - histories of different lengths are right-aligned (see
+stack_histories & drop_missing_bars), so every symbol's latest bar is in the last row.
+
+compute_indicators() also returns an IndicatorState (the last bars & the exponential
+averages), so indicators of new bars are calculated incrementally, without recomputing
+the history:
+    values, state = compute_indicators(close, high, low)
+    new_values, state = compute_indicators(new_close, new_high, new_low, state)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from agno.utils.log import logger
+
+SMA_WINDOWS = (20, 50, 200)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WINDOW, BOLLINGER_STDS = 20, 2.0
+ATR_PERIOD = 14
+VOLATILITY_WINDOW = 20
+TRADING_DAYS = 252
+# bars kept in IndicatorState for the rolling windows (+1 for the returns of volatility)
+TAIL_BARS = max(SMA_WINDOWS + (BOLLINGER_WINDOW, VOLATILITY_WINDOW + 1))
+
+INDICATORS = [f"SMA {w}" for w in SMA_WINDOWS] + [
+    f"EMA {MACD_FAST}",
+    f"EMA {MACD_SLOW}",
+    "MACD",
+    "MACD Signal",
+    "MACD Histogram",
+    f"RSI {RSI_PERIOD}",
+    "Bollinger Upper",
+    "Bollinger Lower",
+    "Bollinger %B",
+    f"ATR {ATR_PERIOD}",
+    f"Volatility {VOLATILITY_WINDOW}D",
+]
+
+
+@dataclass
+class IndicatorState:
+    """what compute_indicators() needs to continue from the last bar it saw"""
+
+    # last TAIL_BARS bars (bars x symbols)
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    # exponential averages at the last bar, by name (NaN = no bars yet)
+    averages: Dict[str, np.ndarray] = field(default_factory=dict)
+    # valid bars seen per symbol
+    bars: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls, symbols: int) -> "IndicatorState":
+        no_bars = np.empty((0, symbols))
+        return cls(no_bars, no_bars, no_bars, {}, np.zeros(symbols, dtype=np.int64))
+
+
+def _as_2d(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _window_diff(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """cumulative[t] - cumulative[t - window] (rows before the first full window: cumulative[t])"""
+    diff = cumulative.copy()
+    diff[window:] -= cumulative[:-window]
+    return diff
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """mean of the last window bars (NaN unless all of them are valid)"""
+    valid = ~np.isnan(values)
+    sums = _window_diff(np.cumsum(np.where(valid, values, 0.0), axis=0), window)
+    counts = _window_diff(np.cumsum(valid, axis=0), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+    mean[counts < window] = np.nan
+    return mean
+
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """standard deviation of the last window bars (see rolling_mean)"""
+    # centering on a per-symbol reference keeps E[x^2] - E[x]^2 from cancelling out
+    reference = values[np.argmax(~np.isnan(values), axis=0), np.arange(values.shape[1])]
+    centered = values - np.where(np.isnan(reference), 0.0, reference)
+    mean = rolling_mean(centered, window)
+    variance = rolling_mean(centered * centered, window) - mean * mean
+    variance *= window / (window - ddof)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def exponential_mean(
+    values: np.ndarray, alpha: float, start: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    exponential moving average (like pandas ewm(alpha=alpha, adjust=False)), skipping NaNs
+    Params:
+        start: average before the first bar (NaN: starts at the first valid value)
+    Returns:
+        (averages, average at the last bar)
+    """
+    average = np.full(values.shape[1], np.nan) if start is None else start.copy()
+    averages = np.empty_like(values)
+    for t, value in enumerate(values):
+        step = average + alpha * (value - average)
+        # no average yet: start at the value, missing value: keep the average
+        average = np.where(np.isnan(step), np.where(np.isnan(average), value, average), step)
+        averages[t] = average
+    return averages, average
+
+
+def compute_indicators(
+    close, high, low, state: Optional[IndicatorState] = None
+) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+    """
+    technical indicators of every bar (see INDICATORS)
+    Params:
+        close, high, low: adjusted prices, arrays of shape (bars, symbols) or (bars,)
+        state: returned by the previous call, if close, high & low are the bars after it
+    Returns:
+        (indicator -> array of shape (bars, symbols), state after the last bar)
+    """
+    close, high, low = _as_2d(close), _as_2d(high), _as_2d(low)
+    bars, symbols = close.shape
+    state = state or IndicatorState.empty(symbols)
+    if bars == 0:
+        return {name: np.empty((0, symbols)) for name in INDICATORS}, state
+    # (the state passed in stays as it was)
+    averages = dict(state.averages)
+    # rolling windows also see the last bars before these
+    k = len(state.close)
+    all_close = np.vstack([state.close, close])
+    all_high = np.vstack([state.high, high])
+    all_low = np.vstack([state.low, low])
+    previous_close = np.vstack([np.full((1, symbols), np.nan), all_close[:-1]])[k:]
+    seen = state.bars + np.cumsum(~np.isnan(close), axis=0)
+
+    def warming_up(values: np.ndarray, period: int) -> np.ndarray:
+        values[seen < period] = np.nan
+        return values
+
+    def ema(name: str, values: np.ndarray, alpha: float) -> np.ndarray:
+        averages_, averages[name] = exponential_mean(values, alpha, averages.get(name))
+        return averages_
+
+    indicators = {}
+    for window in SMA_WINDOWS:
+        indicators[f"SMA {window}"] = rolling_mean(all_close, window)[k:]
+
+    fast = ema("fast", close, 2.0 / (MACD_FAST + 1))
+    slow = ema("slow", close, 2.0 / (MACD_SLOW + 1))
+    macd = fast - slow
+    signal = ema("signal", macd, 2.0 / (MACD_SIGNAL + 1))
+    indicators[f"EMA {MACD_FAST}"] = warming_up(fast, MACD_FAST)
+    indicators[f"EMA {MACD_SLOW}"] = warming_up(slow, MACD_SLOW)
+    indicators["MACD"] = warming_up(macd, MACD_SLOW)
+    indicators["MACD Signal"] = warming_up(signal, MACD_SLOW + MACD_SIGNAL - 1)
+    indicators["MACD Histogram"] = warming_up(macd - signal, MACD_SLOW + MACD_SIGNAL - 1)
+
+    # Wilder's smoothing is an EMA with alpha = 1 / period
+    change = close - previous_close
+    gains = ema("gains", np.maximum(change, 0.0), 1.0 / RSI_PERIOD)
+    losses = ema("losses", np.maximum(-change, 0.0), 1.0 / RSI_PERIOD)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100.0 * gains / (gains + losses)
+    indicators[f"RSI {RSI_PERIOD}"] = warming_up(rsi, RSI_PERIOD + 1)
+
+    middle = rolling_mean(all_close, BOLLINGER_WINDOW)[k:]
+    width = BOLLINGER_STDS * rolling_std(all_close, BOLLINGER_WINDOW)[k:]
+    indicators["Bollinger Upper"] = middle + width
+    indicators["Bollinger Lower"] = middle - width
+    with np.errstate(invalid="ignore", divide="ignore"):
+        indicators["Bollinger %B"] = (close - (middle - width)) / (2 * width)
+
+    # true range: high - low, or the gap from the previous close if that's bigger
+    true_range = np.fmax(
+        high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close))
+    )
+    indicators[f"ATR {ATR_PERIOD}"] = warming_up(
+        ema("true_range", true_range, 1.0 / ATR_PERIOD), ATR_PERIOD
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.log(all_close[1:] / all_close[:-1])
+    returns = np.vstack([np.full((1, symbols), np.nan), returns])
+    indicators[f"Volatility {VOLATILITY_WINDOW}D"] = (
+        rolling_std(returns, VOLATILITY_WINDOW, ddof=1)[k:] * np.sqrt(TRADING_DAYS)
+    )
+
+    new_state = IndicatorState(
+        all_close[-TAIL_BARS:], all_high[-TAIL_BARS:], all_low[-TAIL_BARS:], averages, seen[-1]
+    )
+    return indicators, new_state
+
+
+def stack_histories(
+    histories: Dict[str, pd.DataFrame],
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    price histories (as returned by ticker.history) of several symbols as arrays for
+    compute_indicators - right-aligned on their last bar, shorter histories padded with NaN
+    Returns:
+        (symbols, close, high, low) - arrays of shape (bars of the longest history, symbols)
+    """
+    symbols = list(histories)
+    bars = max((len(h) for h in histories.values()), default=0)
+    arrays = {column: np.full((bars, len(symbols)), np.nan) for column in ("Close", "High", "Low")}
+    for i, symbol in enumerate(symbols):
+        history = histories[symbol]
+        for column, array in arrays.items():
+            array[bars - len(history) :, i] = history[column].to_numpy(dtype=np.float64)
+    return symbols, arrays["Close"], arrays["High"], arrays["Low"]
+
+
+def drop_missing_bars(close: np.ndarray, *others: np.ndarray) -> List[np.ndarray]:
+    """
+    copies of (bars x symbols) price arrays aligned on dates (e.g. from utils/price_store.py)
+    with each symbol's bars right-aligned like stack_histories(), so dates a symbol has no
+    bar on (other exchanges' trading days) don't break its rolling windows
+    Params:
+        close: a symbol has no bar on a date where its close is NaN
+        others: arrays of the same shape (e.g. high & low), moved the same way
+    """
+    close = _as_2d(close)
+    # stable sort: missing bars first, then the bars in date order
+    order = np.argsort(~np.isnan(close), axis=0, kind="stable")
+    return [np.take_along_axis(_as_2d(values), order, axis=0) for values in (close,) + others]
+
+
+def latest_indicators(symbols: List[str], indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """last bar of indicators (as returned by compute_indicators) with symbols as rows"""
+    return pd.DataFrame({name: values[-1] for name, values in indicators.items()}, index=symbols)
+
+
+def indicator_table(history: pd.DataFrame, indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """indicators of one symbol with history's dates as rows (Close plus one column per indicator)"""
+    df = pd.DataFrame({name: values[:, 0] for name, values in indicators.items()}, index=history.index)
+    df.insert(0, "Close", history["Close"].to_numpy())
+    return df
+
+
+def calculate_technical_indicators(symbol: str, period: str = "2y") -> pd.DataFrame:
+    """
+    calculates the technical indicators of symbol from its daily price history
+    Params:
+        period: of price history to use (as accepted by yf.Ticker.history, e.g. "1y", "10y")
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for the close & each indicator
+    """
+    logger.debug(f"Calculating technical indicators for {symbol}")
+    history = yf.Ticker(symbol).history(period=period)
+    if history.empty:
+        raise ValueError(f"FATAL ERROR: no price history for {symbol}")
+    indicators, _ = compute_indicators(history["Close"], history["High"], history["Low"])
+    return indicator_table(history, indicators)
+
+
+def calculate_universe_indicators(histories: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    latest technical indicators of several symbols, calculated in one vectorized pass
+    Params:
+        histories: price history (as returned by ticker.history) by symbol
+    Returns:
+        pd.DataFrame with a row for each symbol and a column for each indicator
+    """
+    symbols, close, high, low = stack_histories(histories)
+    indicators, _ = compute_indicators(close, high, low)
+    return latest_indicators(symbols, indicators)
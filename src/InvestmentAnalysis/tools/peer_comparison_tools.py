@@ -2,11 +2,13 @@ import json
 import yfinance
 import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Set, Tuple, Union
 
 from agno.tools import Toolkit
 from agno.utils.log import logger
 
+from .formatting import OutputFormat, format_table, get_output_format
+
 
 try:
     import yfinance as yf
@@ -17,18 +19,75 @@ except ImportError:
 
 pd.set_option("future.no_silent_downcasting", True)
 
+# what the performance ratios read from yf.Ticker - each statement (& ticker.info) is
+# fetched once per symbol. yf.Ticker statement -> line items
+# (ticker.income_stmt is the same statement as ticker.financials, so it isn't fetched)
+FETCH_PLAN = {
+    "balance_sheet": [
+        "Current Assets",
+        "Current Liabilities",
+        "Inventory",
+        "Cash And Cash Equivalents",
+        "Total Assets",
+        "Stockholders Equity",
+        "Total Debt",
+        "Ordinary Shares Number",
+    ],
+    "financials": [
+        "Total Revenue",
+        "Cost Of Revenue",
+        "Operating Income",
+        "EBIT",
+        "EBIDTA",
+        "Depreciation & Amortization",
+        "Interest Expense",
+        "Net Income",
+    ],
+    "cash_flow": ["Free Cash Flow"],
+}
+# line items not every company reports
+OPTIONAL_ITEMS = {"Inventory", "EBIDTA", "Depreciation & Amortization"}
+# ticker.info fields: name -> info key
+INFO_FIELDS = {"Market Cap": "marketCap", "Trailing PE": "trailingPE"}
+
 
 # created similar to Agno's YFinanceTools
 class PeerComparisonTools(Toolkit):
     def __init__(
         self,
+        output_format: Union[str, OutputFormat, None] = None,
     ):
         super().__init__(name="peers_analyis_tools")
+        # encoding of tool outputs - markdown, csv or tsv (see tools/formatting.py)
+        self.output_format = get_output_format(output_format)
 
         # register functions
         logger.debug("Registering get_performance_ratios function")
         self.register(self.get_peer_comparison_and_industry_benchmarks)
 
+    def __fetch_statements(
+        self, symbol: str
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float], Set[str]]:
+        """
+        everything in FETCH_PLAN & INFO_FIELDS for symbol, each read from yf.Ticker once
+        Returns:
+            (statement -> DataFrame with a row per financial year (oldest first) & a column
+             per line item of the plan, info field -> value, OPTIONAL_ITEMS reported)
+        """
+        ticker = yf.Ticker(symbol)
+        statements, reported = {}, set()
+        for statement, items in FETCH_PLAN.items():
+            df = getattr(ticker, statement)
+            missing = [item for item in items if item not in df.index]
+            if set(missing) - OPTIONAL_ITEMS:
+                raise KeyError(f"{symbol} {statement} has no {', '.join(missing)}")
+            reported.update(OPTIONAL_ITEMS.intersection(items).difference(missing))
+            # line items not reported are all NaN
+            statements[statement] = df.reindex(items).transpose().sort_index(ascending=True)
+        info = ticker.info or {}
+        fields = {field: info.get(key) for field, key in INFO_FIELDS.items()}
+        return statements, fields, reported
+
     def __calculate_performance_ratios(self, symbol: str) -> Dict[str, float]:
         """
         Use this function to get all performance ratios for a company for
@@ -44,42 +103,43 @@ class PeerComparisonTools(Toolkit):
         try:
             logger.debug(f"Calculating performance ratios for {symbol}")
 
-            ticker = yf.Ticker(symbol)
-
-            balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
-            financials = ticker.financials.transpose().sort_index(ascending=True)
-            income_stmt = ticker.income_stmt.transpose().sort_index(ascending=True)
-            cash_flow = ticker.cash_flow.transpose().sort_index(ascending=True)
+            statements, info, reported = self.__fetch_statements(symbol)
+            balance_sheet = statements["balance_sheet"]
+            financials = statements["financials"]
+            cash_flow = statements["cash_flow"]
 
             # get numbers for latest financial year
-            current_assets = balance_sheet["Current Assets"].iloc[-1]
-            current_liabilities = balance_sheet["Current Liabilities"].iloc[-1]
+            latest = {}
+            for df in statements.values():
+                latest.update(df.iloc[-1].to_dict())
+            current_assets = latest["Current Assets"]
+            current_liabilities = latest["Current Liabilities"]
+            total_assets = latest["Total Assets"]
+            shareholder_equity = latest["Stockholders Equity"]
+            total_debt = latest["Total Debt"]
+            cash_equivalents = latest["Cash And Cash Equivalents"]
+            revenue = latest["Total Revenue"]
+            operating_income = latest["Operating Income"]
+            net_income = latest["Net Income"]
+            ebit = latest["EBIT"]
+            cost_of_goods_sold = latest["Cost Of Revenue"]
+            interest_expense = latest["Interest Expense"]
+            market_cap = info["Market Cap"]
+
             # some companies do not report inventory (e.g. Reliance does, Persistent may not)
-            inventory_fields_exist = "Inventory" in ticker.balance_sheet.index
-
-            revenue = financials["Total Revenue"].iloc[-1]
-            operating_income = financials["Operating Income"].iloc[-1]
-            net_income = financials["Net Income"].iloc[-1]
-            total_assets = balance_sheet["Total Assets"].iloc[-1]
-            shareholder_equity = balance_sheet["Stockholders Equity"].iloc[-1]
-            ebit = income_stmt["EBIT"].iloc[-1]
-            current_liabilities = balance_sheet["Current Liabilities"].iloc[-1]
-
-            cost_of_goods_sold = financials["Cost Of Revenue"].iloc[-1]
-
-            market_cap = ticker.info["marketCap"]
-            shareholder_equity = balance_sheet["Stockholders Equity"].iloc[-1]
-            ebidta = financials.get(
-                "EBIDTA",
-                financials["Operating Income"]
-                + financials.get("Depreciation & Amortization", 0),
-            ).iloc[-1]
-            total_debt = balance_sheet["Total Debt"].iloc[-1]
-            cash_equivalents = balance_sheet["Cash And Cash Equivalents"].iloc[-1]
+            inventory_fields_exist = "Inventory" in reported
+            if "EBIDTA" in reported:
+                ebidta = latest["EBIDTA"]
+            else:
+                ebidta = operating_income + (
+                    latest["Depreciation & Amortization"]
+                    if "Depreciation & Amortization" in reported
+                    else 0
+                )
             ev = market_cap + total_debt - cash_equivalents
-
-            total_debt = balance_sheet["Total Debt"].iloc[-1]
-            interest_expense = financials["Interest Expense"].iloc[-1]
+            debt_to_equity = total_debt / shareholder_equity
+            net_profit_margin = net_income / revenue
+            eps = financials["Net Income"] / balance_sheet["Ordinary Shares Number"]
 
             # ------------ calculate the ratios -----------------------------------------
 
@@ -88,15 +148,11 @@ class PeerComparisonTools(Toolkit):
             # liquidity ratios
             ratios["Current Ratio"] = current_assets / current_liabilities
             ratios["Quick Ratio"] = (
-                (current_assets - balance_sheet["Inventory"].iloc[-1])
-                / current_liabilities
+                (current_assets - latest["Inventory"]) / current_liabilities
                 if inventory_fields_exist
                 else np.nan
             )
-            ratios["Cash Ratio"] = (
-                balance_sheet["Cash And Cash Equivalents"].iloc[-1]
-                / balance_sheet["Current Liabilities"].iloc[-1]
-            )
+            ratios["Cash Ratio"] = cash_equivalents / current_liabilities
 
             # profitability ratios
             ratios["Return on Equity (RoE)"] = net_income / shareholder_equity
@@ -104,60 +160,60 @@ class PeerComparisonTools(Toolkit):
             ratios["Return on Capital Employed (RoCE)"] = ebit / (
                 total_assets - current_liabilities
             )
-            ratios["Net Profit Margin"] = net_income / revenue
+            ratios["Net Profit Margin"] = net_profit_margin
             ratios["Operating Margin"] = operating_income / revenue
 
             # efficiency ratios
             ratios["Asset Turnover"] = revenue / total_assets
-
-            if inventory_fields_exist:
-                inventory = balance_sheet["Inventory"]
-                # instead of rolling mean, we get just the mean
-                # average_inventory = inventory.rolling(2).mean()
-                average_inventory = inventory.mean()
-
+            # instead of rolling mean, we get just the mean
             ratios["Inventory Turnover"] = (
-                cost_of_goods_sold / average_inventory
+                cost_of_goods_sold / balance_sheet["Inventory"].mean()
                 if inventory_fields_exist
                 else np.nan
             )
 
             # valuation ratios
-            ratios["Price-to-Earnings (P/E)"] = ticker.info["trailingPE"]
+            ratios["Price-to-Earnings (P/E)"] = info["Trailing PE"]
             ratios["Price-to-Sales (P/S)"] = market_cap / revenue
             ratios["Price-to-Book (P/B)"] = market_cap / shareholder_equity
             ratios["EV/EBIDTA"] = ev / ebidta
 
             # leverage ratios
-            ratios["Debt-to-Equity (D/E)"] = total_debt / shareholder_equity
+            ratios["Debt-to-Equity (D/E)"] = debt_to_equity
             ratios["Interest Coverage"] = ebit / interest_expense
 
             # performance & growth metrics
-            ratios["Revenue Growth (%)"] = (
-                financials["Total Revenue"].pct_change().iloc[-1] * 100.0
-            )
-            ratios["EBIT Growth (%)"] = financials["EBIT"].pct_change().iloc[-1] * 100.0
-            ratios["Net Profit Margin (%)"] = (
-                financials["Net Income"] / financials["Total Revenue"]
-            ).iloc[-1] * 100.0
-            shares_outstanding = balance_sheet["Ordinary Shares Number"]
-            eps = financials["Net Income"] / shares_outstanding
-            ratios["EPS Growth (%)"] = eps.pct_change().iloc[-1] * 100.0
-
-            ratios["EPS"] = (financials["Net Income"] / shares_outstanding).iloc[-1]
-            ratios["Debt-to-Equity"] = (
-                balance_sheet["Total Debt"] / balance_sheet["Stockholders Equity"]
-            ).iloc[-1]
-
-            ratios["Free Cash Flow"] = cash_flow["Free Cash Flow"].iloc[-1]
-            ratios["FCF Growth (%)"] = (
-                cash_flow["Free Cash Flow"].pct_change().iloc[-1] * 100.0
-            )
+            ratios["Revenue Growth (%)"] = _latest_growth(financials["Total Revenue"])
+            ratios["EBIT Growth (%)"] = _latest_growth(financials["EBIT"])
+            ratios["Net Profit Margin (%)"] = net_profit_margin * 100.0
+            ratios["EPS Growth (%)"] = _latest_growth(eps)
+            ratios["EPS"] = eps.iloc[-1]
+            ratios["Debt-to-Equity"] = debt_to_equity
+
+            ratios["Free Cash Flow"] = latest["Free Cash Flow"]
+            ratios["FCF Growth (%)"] = _latest_growth(cash_flow["Free Cash Flow"])
             logger.debug(f"   Ratios for {symbol}:\n {json.dumps(ratios, indent=2)}\n")
             return ratios
         except Exception as e:
             return f"Error fetching company profile for {symbol}: {e}"
 
+    def calculate_peer_comparison(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        peer comparison table - key metrics as rows, symbols (+ "Industry Benchmark",
+        the row-wise mean) as columns. Not registered as a tool, the LLM gets the
+        formatted table from get_peer_comparison_and_industry_benchmarks
+        """
+        logger.debug(f"Fetching performance ratios for {symbols}")
+
+        ratios = {}
+        for symbol in symbols:
+            ratios[symbol] = self.__calculate_performance_ratios(symbol)
+
+        df = pd.DataFrame(ratios)
+        # calculate industry benchmarks - average across rows
+        df["Industry Benchmark"] = df.mean(axis=1)
+        return df
+
     def get_peer_comparison_and_industry_benchmarks(self, symbols: List[str]) -> str:
         """
         Use this function to get a comparison table of all key performance ratios
@@ -168,7 +224,7 @@ class PeerComparisonTools(Toolkit):
             symbols (List[str]): List of stock symbols for which comparison is needed.
 
         Returns:
-            str: pandas Dataframe in markdown format. The dataframe has all the key
+            str: pandas Dataframe in markdown (or compact CSV/TSV) format. The dataframe has all the key
                 metrics as the index and company symbols as the columns. The last column
                 of this table holds the industry benchmark (which is basically the row-wise)
                 mean of all the metrics.
@@ -201,17 +257,21 @@ class PeerComparisonTools(Toolkit):
                     | FCF Growth (%)                    |    7.20185    |   13.7332    |  43.1375      |   30.9029    |   22.5707     |    79.4177      |         32.8273      |
         """
         try:
-            logger.debug("Fetching performance ratios for {symbols}")
-
-            ratios = {}
-            for symbol in symbols:
-                ratios[symbol] = self.__calculate_performance_ratios(symbol)
-
-            df = pd.DataFrame(ratios)
-            # calculate industry benchmarks - average across rows
-            df["Industry Benchmark"] = df.mean(axis=1)
+            df = self.calculate_peer_comparison(symbols)
             logger.debug(f"Returning peer comparison table\n{df.to_markdown()}")
             # return json.dumps(ratios)
-            return f"\n{df.to_markdown()}\n"
+            return format_table(df, self.output_format)
         except Exception as e:
             return f"Error fetching company profile for {symbols}: {e}"
+
+
+def _latest_growth(values: pd.Series) -> float:
+    """
+    % change of the latest financial year over the previous one, i.e.
+    values.pct_change(fill_method=None).iloc[-1] * 100 (without a Series per metric)
+    """
+    if len(values) < 2:
+        return np.nan
+    current, previous = values.iloc[-1], values.iloc[-2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (np.float64(current) / previous - 1.0) * 100.0
@@ -0,0 +1,176 @@
+"""
+peer_universe.py - the peer comparison of PeerComparisonTools (metrics x companies table with
+    an "Industry Benchmark" column), for a whole universe of companies at once.
+
+    PeerComparisonTools.calculate_peer_comparison computes the metrics of each company with
+    dozens of small pandas operations - once the statements are cached locally, comparing a
+    few thousand companies is CPU bound on that per-company overhead, and threads don't help
+    (the GIL). Here:
+        - the statements of all companies are fetched once, into an Arrow panel (see
+          tools/arrow_ratios.statement_panel), and packed into one dense float64 array
+          (companies x years x line items, latest year last)
+        - every metric is one NumPy kernel over that array, vectorized across companies
+    This takes microseconds per company, so it runs in-process: fanning the companies out
+    to a process pool (with the array in shared memory) was measured slower than one process
+    - pool start-up & result transfer cost more than the computation they parallelize.
+
+    Usage:
+        table = compare_universe(symbols)
+        print(format_table(table))
+
+    (see benchmarks/peer_universe_benchmark.py for timings vs. PeerComparisonTools)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .arrow_ratios import INFO_FIELDS, LINE_ITEMS, statement_panel, symbol_rows
+
+# metrics (rows of the comparison table) in the order of PeerComparisonTools
+PEER_METRICS = [
+    "Current Ratio",
+    "Quick Ratio",
+    "Cash Ratio",
+    "Return on Equity (RoE)",
+    "Return on Assets (RoA)",
+    "Return on Capital Employed (RoCE)",
+    "Net Profit Margin",
+    "Operating Margin",
+    "Asset Turnover",
+    "Inventory Turnover",
+    "Price-to-Earnings (P/E)",
+    "Price-to-Sales (P/S)",
+    "Price-to-Book (P/B)",
+    "EV/EBIDTA",
+    "Debt-to-Equity (D/E)",
+    "Interest Coverage",
+    "Revenue Growth (%)",
+    "EBIT Growth (%)",
+    "Net Profit Margin (%)",
+    "EPS Growth (%)",
+    "EPS",
+    "Debt-to-Equity",
+    "Free Cash Flow",
+    "FCF Growth (%)",
+]
+# last axis of the statement array
+FIELDS = list(LINE_ITEMS) + list(INFO_FIELDS)
+
+
+def statement_array(panel: pa.Table) -> Tuple[List[str], np.ndarray]:
+    """
+    statements of a panel (see tools/arrow_ratios.statement_panel) as a dense array
+    Returns:
+        (symbols, float64 array of companies x years x FIELDS) - the years of each company
+        are right-aligned (latest year last), earlier years it doesn't have are NaN
+    """
+    rows = symbol_rows(panel)
+    shape = statement_shape(panel, rows)
+    values = np.full(shape, np.nan)
+    if not rows:
+        return [], values
+    offsets, counts = map(np.array, zip(*rows.values()))
+    company = np.repeat(np.arange(len(rows)), counts)
+    year = np.arange(len(panel)) - np.repeat(offsets, counts) + np.repeat(shape[1] - counts, counts)
+    # nulls -> NaN
+    columns = [panel.column(field).to_numpy() for field in FIELDS]
+    values[company, year, :] = np.column_stack(columns)
+    return list(rows), values
+
+
+def statement_shape(panel: pa.Table, rows=None) -> Tuple[int, int, int]:
+    """shape of statement_array(panel) - at least 2 years, so growth has a previous year"""
+    rows = symbol_rows(panel) if rows is None else rows
+    years = max([count for _, count in rows.values()] + [2])
+    return len(rows), years, len(FIELDS)
+
+
+def _growth(values: np.ndarray) -> np.ndarray:
+    """
+    % change of the latest year of companies x years values
+    (pct_change(fill_method=None).iloc[-1] * 100)
+    """
+    return (values[:, -1] / values[:, -2] - 1.0) * 100.0
+
+
+def peer_metrics(values: np.ndarray) -> np.ndarray:
+    """
+    PEER_METRICS of companies, vectorized across them
+    Params:
+        values: companies x years x FIELDS (see statement_array)
+    Returns:
+        float64 array of companies x PEER_METRICS
+    """
+    series = {field: values[:, :, i] for i, field in enumerate(FIELDS)}
+    latest = {field: s[:, -1] for field, s in series.items()}
+
+    current_assets, current_liabilities = latest["Current Assets"], latest["Current Liabilities"]
+    revenue, net_income = latest["Total Revenue"], latest["Net Income"]
+    total_assets, equity = latest["Total Assets"], latest["Stockholders Equity"]
+    total_debt, ebit, market_cap = latest["Total Debt"], latest["EBIT"], latest["Market Cap"]
+    ev = market_cap + total_debt - latest["Cash And Cash Equivalents"]
+    ebidta = np.where(
+        np.isnan(latest["EBIDTA"]),
+        latest["Operating Income"] + np.nan_to_num(latest["Depreciation & Amortization"]),
+        latest["EBIDTA"],
+    )
+    # some companies do not report inventory
+    inventory = series["Inventory"]
+    with np.errstate(all="ignore"):
+        reported = ~np.isnan(inventory).all(axis=1)
+        average_inventory = np.full(len(values), np.nan)
+        average_inventory[reported] = np.nanmean(inventory[reported], axis=1)
+        eps = series["Net Income"] / series["Ordinary Shares Number"]
+
+        metrics = [
+            current_assets / current_liabilities,
+            np.where(reported, (current_assets - latest["Inventory"]) / current_liabilities, np.nan),
+            latest["Cash And Cash Equivalents"] / current_liabilities,
+            net_income / equity,
+            net_income / total_assets,
+            ebit / (total_assets - current_liabilities),
+            net_income / revenue,
+            latest["Operating Income"] / revenue,
+            revenue / total_assets,
+            latest["Cost Of Revenue"] / average_inventory,
+            latest["Trailing PE"],
+            market_cap / revenue,
+            market_cap / equity,
+            ev / ebidta,
+            total_debt / equity,
+            ebit / latest["Interest Expense"],
+            _growth(series["Total Revenue"]),
+            _growth(series["EBIT"]),
+            net_income / revenue * 100.0,
+            _growth(eps),
+            eps[:, -1],
+            total_debt / equity,
+            latest["Free Cash Flow"],
+            _growth(series["Free Cash Flow"]),
+        ]
+    return np.column_stack(metrics)
+
+
+def compare_universe(symbols: Sequence[str], panel: Optional[pa.Table] = None) -> pd.DataFrame:
+    """
+    peer comparison of a universe of companies (same table as
+    PeerComparisonTools.calculate_peer_comparison, companies that can't be fetched are skipped)
+    Params:
+        panel: statement_panel(symbols), if already fetched
+    Returns:
+        pd.DataFrame with PEER_METRICS as rows, symbols + "Industry Benchmark" (the row-wise
+        mean) as columns
+    """
+    panel = statement_panel(symbols) if panel is None else panel
+    names, values = statement_array(panel)
+    df = pd.DataFrame(peer_metrics(values).T, index=PEER_METRICS, columns=names)
+    # industry benchmarks - average across rows
+    df["Industry Benchmark"] = df.mean(axis=1)
+    return df
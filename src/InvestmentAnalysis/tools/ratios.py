@@ -21,6 +21,8 @@ import json
 import yfinance as yf
 from agno.utils.log import logger
 
+from .formatting import format_table
+
 
 # display tweaks
 # Set Pandas to display float values with 4 decimal places
@@ -48,26 +50,11 @@ def is_valid_ticker(symbol: str) -> bool:
         return False
 
 
-# def get_liquidity_ratios(symbol: str) -> pd.DataFrame:
-def get_liquidity_ratios(symbol: str) -> str:
+def calculate_liquidity_ratios(symbol: str) -> pd.DataFrame:
     """
-    Use this function to get the end-of-financial-year values for liquidity ratios for a given symbol.
-        - Current Ratio = Current Assets / Current Liabilities
-        - Quick Ratio = (Current Assets - Inventory) / Current Liabilities
-        - Cash Ratio = (Cash & Equivalents) / Current Liabilities
-
-    Liquidity ratios help determine short-term stability of a company. These can be interpreted
-    as follows (though the interpretation could differ person-to-person)
-        - Current Ratio: > 1.5 is good (indicates ability to cover short-term liabilities). < 1 risky!
-        - Quick Ratio: > 1 is good (measures liquidity excluding inventory) [conservative number]
-        - Cash Ratio: Company's pure cash position/pile - higher the better.
-
-    Args:
-        symbol (string) - the stock symbol
-
+    calculates the liquidity ratios for symbol (see get_liquidity_ratios for details)
     Returns:
-        str: markdown version of the liquidity ratios with rows ordered by date
-           and columns having values for each of the liquidity ratio
+        pd.DataFrame with rows ordered by date and a column for each of the liquidity ratios
     """
     
     logger.debug(f"Calculatig liquidity ratios for {symbol}")
@@ -93,36 +80,39 @@ def get_liquidity_ratios(symbol: str) -> str:
     )
 
 
-    ret =  f"\n{pd.DataFrame(ratios).to_markdown()}\n"
-    logger.debug(ret)
-    return ret
+    return pd.DataFrame(ratios)
 
 
-# def get_profitability_ratios(symbol: str) -> pd.DataFrame:
-def get_profitability_ratios(symbol: str) -> str:
+def get_liquidity_ratios(symbol: str) -> str:
     """
-    Use this function to get the end-of-financial-year values for profitability ratios for a given symbol.
-        - Return on Equity (RoE) = Net Income / Shareholder's Equity
-        - Return on Assets (RoA) = Net Income / Total Assets
-        - Return on Capital Employed (RoCE) = EBIT / (Total Assets - Current Liabilities)
-        - Net Profit Margin = Net Income / Revenue'
-        - Operating Margin = Operating Income / Revenue
+    Use this function to get the end-of-financial-year values for liquidity ratios for a given symbol.
+        - Current Ratio = Current Assets / Current Liabilities
+        - Quick Ratio = (Current Assets - Inventory) / Current Liabilities
+        - Cash Ratio = (Cash & Equivalents) / Current Liabilities
 
-    Profitability ratios help earnings of and returns from a company. These can be interpreted
+    Liquidity ratios help determine short-term stability of a company. These can be interpreted
     as follows (though the interpretation could differ person-to-person)
-        - Return on Equity (RoE) - >15% is good (higher return on shareholder investment)
-        - Return on Assets (RoA) - >5% is good (shows how efficiently assets generate capital)
-        - Return on Capital Employed (RoCE) - >12% preferred, measures efficiency in capital utilization
-        - Net Profit Margin - >10% is strong, measures final profitability per dollar of revenue
-        - Operating Margin - >20% is Excellent (strong profitability & cost efficiency),
-            10-20% is Good (healthy operations & stable profits), 5-10% (Low, businesses is operational, but struggles with cost), <5% is weak (thin margins & potential weakness), negative (loss making business!!)
+        - Current Ratio: > 1.5 is good (indicates ability to cover short-term liabilities). < 1 risky!
+        - Quick Ratio: > 1 is good (measures liquidity excluding inventory) [conservative number]
+        - Cash Ratio: Company's pure cash position/pile - higher the better.
 
     Args:
         symbol (string) - the stock symbol
 
     Returns:
-        str: markdown version of the profitability ratios with rows ordered by date
-           and columns having values for each of the profitability ratio
+        str: markdown (or compact CSV/TSV) version of the liquidity ratios with rows ordered by date
+           and columns having values for each of the liquidity ratio
+    """
+    ret = format_table(calculate_liquidity_ratios(symbol))
+    logger.debug(ret)
+    return ret
+
+
+def calculate_profitability_ratios(symbol: str) -> pd.DataFrame:
+    """
+    calculates the profitability ratios for symbol (see get_profitability_ratios for details)
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each of the profitability ratios
     """
     ticker = yf.Ticker(symbol)
     balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
@@ -146,30 +136,44 @@ def get_profitability_ratios(symbol: str) -> str:
     ratios["Net Profit Margin"] = net_income / revenue
     ratios["Operating Margin"] = operating_income / revenue
 
-    ret =  f"\n{pd.DataFrame(ratios).to_markdown()}\n"
-    logger.debug(ret)
-    return ret
+    return pd.DataFrame(ratios)
 
 
-# def get_efficiency_ratios(symbol: str) -> pd.DataFrame:
-def get_efficiency_ratios(symbol: str) -> str:
+def get_profitability_ratios(symbol: str) -> str:
     """
-    Use this function to get the end-of-financial-year values for efficiency ratios for a given symbol.
-        - Asset Turnover Ratio = Revenue / Total Assets
-        - Inventory Turnover = Cost of Goods Sold (COGS) / Inventory
+    Use this function to get the end-of-financial-year values for profitability ratios for a given symbol.
+        - Return on Equity (RoE) = Net Income / Shareholder's Equity
+        - Return on Assets (RoA) = Net Income / Total Assets
+        - Return on Capital Employed (RoCE) = EBIT / (Total Assets - Current Liabilities)
+        - Net Profit Margin = Net Income / Revenue'
+        - Operating Margin = Operating Income / Revenue
 
-    Financial ratios measure operational efficiency of a company. These can be interpreted
+    Profitability ratios help earnings of and returns from a company. These can be interpreted
     as follows (though the interpretation could differ person-to-person)
-        - Asset Turnover Ratio - measures how effectively assets generate sales. Higher is better
-        - Inventory Turnover - >5 means fast-moving stocks/inventory, lower values indicate excess inventory
-            (NOTE: not all companies report inventory!)
+        - Return on Equity (RoE) - >15% is good (higher return on shareholder investment)
+        - Return on Assets (RoA) - >5% is good (shows how efficiently assets generate capital)
+        - Return on Capital Employed (RoCE) - >12% preferred, measures efficiency in capital utilization
+        - Net Profit Margin - >10% is strong, measures final profitability per dollar of revenue
+        - Operating Margin - >20% is Excellent (strong profitability & cost efficiency),
+            10-20% is Good (healthy operations & stable profits), 5-10% (Low, businesses is operational, but struggles with cost), <5% is weak (thin margins & potential weakness), negative (loss making business!!)
 
     Args:
         symbol (string) - the stock symbol
 
     Returns:
-        str: markdown version of the efficiency ratios with rows ordered by date
-           and columns having values for each of the efficiency ratio
+        str: markdown (or compact CSV/TSV) version of the profitability ratios with rows ordered by date
+           and columns having values for each of the profitability ratio
+    """
+    ret = format_table(calculate_profitability_ratios(symbol))
+    logger.debug(ret)
+    return ret
+
+
+def calculate_efficiency_ratios(symbol: str) -> pd.DataFrame:
+    """
+    calculates the efficiency ratios for symbol (see get_efficiency_ratios for details)
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each of the efficiency ratios
     """
     ticker = yf.Ticker(symbol)
     balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
@@ -193,12 +197,65 @@ def get_efficiency_ratios(symbol: str) -> str:
     if inventory_fields_exist:
         ratios["Inventory Turnover"] = cost_of_goods_sold / average_inventory
 
-    ret =  f"\n{pd.DataFrame(ratios).to_markdown()}\n"
+    return pd.DataFrame(ratios)
+
+
+def get_efficiency_ratios(symbol: str) -> str:
+    """
+    Use this function to get the end-of-financial-year values for efficiency ratios for a given symbol.
+        - Asset Turnover Ratio = Revenue / Total Assets
+        - Inventory Turnover = Cost of Goods Sold (COGS) / Inventory
+
+    Financial ratios measure operational efficiency of a company. These can be interpreted
+    as follows (though the interpretation could differ person-to-person)
+        - Asset Turnover Ratio - measures how effectively assets generate sales. Higher is better
+        - Inventory Turnover - >5 means fast-moving stocks/inventory, lower values indicate excess inventory
+            (NOTE: not all companies report inventory!)
+
+    Args:
+        symbol (string) - the stock symbol
+
+    Returns:
+        str: markdown (or compact CSV/TSV) version of the efficiency ratios with rows ordered by date
+           and columns having values for each of the efficiency ratio
+    """
+    ret = format_table(calculate_efficiency_ratios(symbol))
     logger.debug(ret)
     return ret
 
 
-# def get_valuation_ratios(symbol: str) -> pd.DataFrame:
+def calculate_valuation_ratios(symbol: str) -> pd.DataFrame:
+    """
+    calculates the valuation ratios for symbol (see get_valuation_ratios for details)
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each of the valuation ratios
+    """
+    ticker = yf.Ticker(symbol)
+    balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
+    financials = ticker.financials.transpose().sort_index(ascending=True)
+
+    ratios = {}
+
+    market_cap = ticker.info["marketCap"]
+    revenue = financials["Total Revenue"]
+    shareholder_equity = balance_sheet["Stockholders Equity"]
+    ebidta = financials.get(
+        "EBIDTA",
+        financials["Operating Income"]
+        + financials.get("Depreciation & Amortization", 0),
+    )
+    total_debt = balance_sheet["Total Debt"]
+    cash_equivalents = balance_sheet["Cash And Cash Equivalents"]
+    ev = market_cap + total_debt - cash_equivalents
+
+    ratios["Price-to-Earnings (P/E)"] = ticker.info["trailingPE"]
+    ratios["Price-to-Sales (P/S)"] = market_cap / revenue
+    ratios["Price-to-Book (P/B)"] = market_cap / shareholder_equity
+    ratios["EV/EBIDTA"] = ev / ebidta
+
+    return pd.DataFrame(ratios)
+
+
 def get_valuation_ratios(symbol: str) -> str:
     """
     Use this function to get the end-of-financial-year values for valuation ratios for a given symbol.
@@ -225,38 +282,36 @@ def get_valuation_ratios(symbol: str) -> str:
         symbol (string) - the stock symbol
 
     Returns:
-        str: markdown version of the valuation ratios with rows ordered by date
+        str: markdown (or compact CSV/TSV) version of the valuation ratios with rows ordered by date
            and columns having values for each of the valuation ratio
     """
+    ret = format_table(calculate_valuation_ratios(symbol))
+    logger.debug(ret)
+    return ret
+
+
+def calculate_leverage_ratios(symbol: str) -> pd.DataFrame:
+    """
+    calculates the leverage ratios for symbol (see get_leverage_ratios for details)
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each of the leverage ratios
+    """
     ticker = yf.Ticker(symbol)
     balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
     financials = ticker.financials.transpose().sort_index(ascending=True)
 
-    ratios = {}
-
-    market_cap = ticker.info["marketCap"]
-    revenue = financials["Total Revenue"]
-    shareholder_equity = balance_sheet["Stockholders Equity"]
-    ebidta = financials.get(
-        "EBIDTA",
-        financials["Operating Income"]
-        + financials.get("Depreciation & Amortization", 0),
-    )
     total_debt = balance_sheet["Total Debt"]
-    cash_equivalents = balance_sheet["Cash And Cash Equivalents"]
-    ev = market_cap + total_debt - cash_equivalents
+    shareholder_equity = balance_sheet["Stockholders Equity"]
+    ebit = financials["EBIT"]
+    interest_expense = financials["Interest Expense"]
 
-    ratios["Price-to-Earnings (P/E)"] = ticker.info["trailingPE"]
-    ratios["Price-to-Sales (P/S)"] = market_cap / revenue
-    ratios["Price-to-Book (P/B)"] = market_cap / shareholder_equity
-    ratios["EV/EBIDTA"] = ev / ebidta
+    ratios = {}
+    ratios["Debt-to-Equity (D/E)"] = total_debt / shareholder_equity
+    ratios["Interest Coverage"] = ebit / interest_expense
 
-    ret =  f"\n{pd.DataFrame(ratios).to_markdown()}\n"
-    logger.debug(ret)
-    return ret
+    return pd.DataFrame(ratios)
 
 
-# def get_leverage_ratios(symbol: str) -> pd.DataFrame:
 def get_leverage_ratios(symbol: str) -> str:
     """
     Use this function to get the end-of-financial-year values for leverage ratios for a given symbol.
@@ -272,28 +327,45 @@ def get_leverage_ratios(symbol: str) -> str:
         symbol (string) - the stock symbol
 
     Returns:
-        str: markdown version of the leverage ratios with rows ordered by date
+        str: markdown (or compact CSV/TSV) version of the leverage ratios with rows ordered by date
            and columns having values for each of the leverage ratio
     """
+    ret = format_table(calculate_leverage_ratios(symbol))
+    logger.debug(ret)
+    return ret
+
+
+def calculate_performance_and_growth_metrics(symbol: str) -> pd.DataFrame:
+    """
+    calculates the performance & growth metrics for symbol (see get_performance_and_growth_metrics for details)
+    Returns:
+        pd.DataFrame with rows ordered by date and a column for each of the performance & growth metrics
+    """
     ticker = yf.Ticker(symbol)
     balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
     financials = ticker.financials.transpose().sort_index(ascending=True)
+    cash_flow = ticker.cash_flow.transpose().sort_index(ascending=True)
 
-    total_debt = balance_sheet["Total Debt"]
-    shareholder_equity = balance_sheet["Stockholders Equity"]
-    ebit = financials["EBIT"]
-    interest_expense = financials["Interest Expense"]
+    ratios = pd.DataFrame(index=financials.index)
+    ratios["Revenue Growth (%)"] = financials["Total Revenue"].pct_change() * 100.0
+    ratios["EBIT Growth (%)"] = financials["EBIT"].pct_change() * 100.0
+    ratios["Net Profit Margin (%)"] = (
+        financials["Net Income"] / financials["Total Revenue"]
+    ) * 100.0
+    shares_outstanding = balance_sheet["Ordinary Shares Number"]
+    eps = financials["Net Income"] / shares_outstanding
+    ratios["EPS Growth (%)"] = eps.pct_change() * 100.0
 
-    ratios = {}
-    ratios["Debt-to-Equity (D/E)"] = total_debt / shareholder_equity
-    ratios["Interest Coverage"] = ebit / interest_expense
+    ratios["EPS"] = financials["Net Income"] / shares_outstanding
+    ratios["Debt-to-Equity"] = (
+        balance_sheet["Total Debt"] / balance_sheet["Stockholders Equity"]
+    )
+    ratios["Free Cash Flow"] = cash_flow["Free Cash Flow"]
+    ratios["FCF Growth (%)"] = cash_flow["Free Cash Flow"].pct_change() * 100.0
 
-    ret =  f"\n{pd.DataFrame(ratios).to_markdown()}\n"
-    logger.debug(ret)
-    return ret
+    return ratios
 
 
-# def get_performance_and_growth_metrics(symbol: str) -> pd.DataFrame:
 def get_performance_and_growth_metrics(symbol: str) -> str:
     """
     Use this function to get the end-of-financial-year values for performance & growth metrics for a given symbol.
@@ -336,32 +408,9 @@ def get_performance_and_growth_metrics(symbol: str) -> str:
         symbol (string) - the stock symbol
 
     Returns:
-        str: markdown version of the performance & growth metrics with rows ordered by date
+        str: markdown (or compact CSV/TSV) version of the performance & growth metrics with rows ordered by date
            and columns having values for each of the performance & growth metric
     """
-    ticker = yf.Ticker(symbol)
-    balance_sheet = ticker.balance_sheet.transpose().sort_index(ascending=True)
-    financials = ticker.financials.transpose().sort_index(ascending=True)
-    cash_flow = ticker.cash_flow.transpose().sort_index(ascending=True)
-
-    ratios = pd.DataFrame(index=financials.index)
-    ratios["Revenue Growth (%)"] = financials["Total Revenue"].pct_change() * 100.0
-    ratios["EBIT Growth (%)"] = financials["EBIT"].pct_change() * 100.0
-    ratios["Net Profit Margin (%)"] = (
-        financials["Net Income"] / financials["Total Revenue"]
-    ) * 100.0
-    shares_outstanding = balance_sheet["Ordinary Shares Number"]
-    eps = financials["Net Income"] / shares_outstanding
-    ratios["EPS Growth (%)"] = eps.pct_change() * 100.0
-
-    ratios["EPS"] = financials["Net Income"] / shares_outstanding
-    ratios["Debt-to-Equity"] = (
-        balance_sheet["Total Debt"] / balance_sheet["Stockholders Equity"]
-    )
-    ratios["Free Cash Flow"] = cash_flow["Free Cash Flow"]
-    ratios["FCF Growth (%)"] = cash_flow["Free Cash Flow"].pct_change() * 100.0
-
-    # NOTE: unlike other functions, ratios is a DataFrame
-    ret =  f"\n{ratios.to_markdown()}\n"
+    ret = format_table(calculate_performance_and_growth_metrics(symbol))
     logger.debug(ret)
     return ret
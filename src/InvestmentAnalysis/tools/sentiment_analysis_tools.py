@@ -2,20 +2,64 @@ import json
 import yfinance as yf
 from bs4 import BeautifulSoup
 from textblob import TextBlob
-from typing import List
+from typing import List, Union
 
 from agno.tools import Toolkit
 from agno.utils.log import logger
 
+from .formatting import OutputFormat, format_record, get_output_format
+
 
 class SentimentAnalysisTools(Toolkit):
-    def __init__(self):
+    def __init__(
+        self,
+        output_format: Union[str, OutputFormat, None] = None,
+        news_count: int = 25,
+    ):
         super().__init__(name="sentiment_analysis_tools")
+        # encoding of tool outputs - markdown, csv or tsv (see tools/formatting.py)
+        self.output_format = get_output_format(output_format)
+        # number of latest news headlines scored
+        self.news_count = news_count
 
         # register functions as tools
         logger.debug("Registering analyze_sentiment function")
         self.register(self.analyze_market_sentiment)
 
+    def score_market_sentiment(self, symbol: str) -> dict:
+        """
+        market sentiment of the news_count (default 25) latest news headlines of symbol
+        (see analyze_market_sentiment)
+        Returns:
+            dict with market_sentiment, avg_score, articles (number of headlines scored)
+            & headlines (top 7) - raises on errors
+        """
+        # fetch latest headlines
+        logger.info(f"Analyzing market sentiment for {symbol}")
+        ticker = yf.Ticker(symbol)
+        news = ticker.get_news(count=self.news_count)
+        headlines = [h["content"]["summary"] for h in news]
+        # polarity is a float in range [-1.0, 1.0]
+        scores = [TextBlob(h).sentiment.polarity for h in headlines]
+        avg = sum(scores) / len(scores) if scores else 0
+        # this is my scoring criteria - usually a >0 value is positive sentiment
+        # =0 value is neutral and <0 value is negative sentiment
+        tone = "Positive" if avg > 0.1 else "Negative" if avg < -0.1 else "Neutral"
+        # save headlines & url of top 5 news headlines
+        top7_news_headlines = [{
+            "headline":n["content"]["title"], 
+            "summary":n["content"]["summary"], 
+            "score" : scores[i],
+            "url":("URL Link Not Available" if n["content"]["clickThroughUrl"] is None else n["content"]['clickThroughUrl']['url']),
+            } for i, n in enumerate(news[:7])]
+
+        return {
+            "market_sentiment": tone,
+            "avg_score": round(avg, 3),
+            "articles": len(scores),
+            "headlines": top7_news_headlines,
+        }
+
     def analyze_market_sentiment(self, symbol: str) -> str:
         """use this function to analyze market sentiment for a given stock symbol
            it downloads 25 market headlines from Yahoo News and analyzes sentiment.
@@ -33,33 +77,11 @@ class SentimentAnalysisTools(Toolkit):
             }
         """
         try:
-            # fetch latest headlines
-            logger.info(f"Analyzing market sentiment for {symbol}")
-            ticker = yf.Ticker(symbol)
-            news = ticker.get_news(count=25)
-            headlines = [h["content"]["summary"] for h in news]
-            # polarity is a float in range [-1.0, 1.0]
-            scores = [TextBlob(h).sentiment.polarity for h in headlines]
-            avg = sum(scores) / len(scores) if scores else 0
-            # this is my scoring criteria - usually a >0 value is positive sentiment
-            # =0 value is neutral and <0 value is negative sentiment
-            tone = "Positive" if avg > 0.1 else "Negative" if avg < -0.1 else "Neutral"
-            # save headlines & url of top 5 news headlines
-            top7_news_headlines = [{
-                "headline":n["content"]["title"], 
-                "summary":n["content"]["summary"], 
-                "score" : scores[i],
-                "url":("URL Link Not Available" if n["content"]["clickThroughUrl"] is None else n["content"]['clickThroughUrl']['url']),
-                } for n in news[:7] for i in range(7)]
-            
-            sentiment_analysis = {
-                "market_sentiment": tone,
-                "avg_score": round(avg, 3),
-                #"scores": scores[:7],
-                "headlines": top7_news_headlines,
-            }
+            sentiment_analysis = self.score_market_sentiment(symbol)
+            # the LLM doesn't need the article count (see the docstring above)
+            del sentiment_analysis["articles"]
             # must return text!
-            json_str: str = json.dumps(sentiment_analysis, indent=2)
+            json_str: str = format_record(sentiment_analysis, self.output_format)
             logger.info(f"Response from analyze_market_sentiment:\n {json_str}\n")
             return json_str
         except Exception as e:
@@ -0,0 +1,135 @@
+"""
+technical_analysis_tools.py - tools for Agno agents to get technical indicators (moving
+    averages, RSI, MACD, Bollinger bands, ATR & realized volatility) of a stock, calculated
+    from its daily price history (see tools/indicators.py).
+
+    The toolkit keeps the indicator state of every symbol it has seen, so asking for the
+    same symbol again (e.g. in a long running app, the next day) only downloads & computes
+    the bars added since.
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+from .formatting import OutputFormat, format_table, get_output_format
+from .indicators import IndicatorState, compute_indicators, indicator_table
+
+# price history used for a symbol seen for the first time
+HISTORY_PERIOD = "2y"
+# price history downloaded to update a symbol seen before (if older, it's recomputed)
+UPDATE_PERIOD = "1mo"
+
+
+class TechnicalAnalysisTools(Toolkit):
+    def __init__(
+        self,
+        output_format: Union[str, OutputFormat, None] = None,
+        rows: int = 5,
+    ):
+        super().__init__(name="technical_analysis_tools")
+        # encoding of tool outputs - markdown, csv or tsv (see tools/formatting.py)
+        self.output_format = get_output_format(output_format)
+        # latest trading days returned to the LLM
+        self.rows = rows
+        # symbol -> (indicators so far, state before their last bar)
+        self._indicators: Dict[str, Tuple[pd.DataFrame, IndicatorState]] = {}
+        self._lock = threading.Lock()
+
+        # register functions as tools
+        logger.debug("Registering get_technical_indicators function")
+        self.register(self.get_technical_indicators)
+
+    def calculate_indicators(self, symbol: str) -> pd.DataFrame:
+        """
+        technical indicators of symbol for every trading day (see tools/indicators.py) -
+        bars added since the last call for symbol are computed incrementally
+        Returns:
+            pd.DataFrame with rows ordered by date and a column for the close & each indicator
+        """
+        with self._lock:
+            known = self._indicators.get(symbol)
+        ticker = yf.Ticker(symbol)
+        if known is not None:
+            table, state = known
+            history = ticker.history(period=UPDATE_PERIOD)
+            # the last bar changes until the market closes, so it is always recomputed
+            new_bars = history[history.index >= table.index[-1]]
+            if len(new_bars) and new_bars.index[0] == table.index[-1]:
+                logger.debug(f"Updating technical indicators for {symbol} ({len(new_bars)} bars)")
+                new_table, state = _indicators_of(new_bars, state)
+                table = pd.concat([table.iloc[:-1], new_table])
+                with self._lock:
+                    self._indicators[symbol] = (table, state)
+                return table
+
+        logger.debug(f"Calculating technical indicators for {symbol}")
+        history = ticker.history(period=HISTORY_PERIOD)
+        if history.empty:
+            raise ValueError(f"FATAL ERROR: no price history for {symbol}")
+        table, state = _indicators_of(history)
+        with self._lock:
+            self._indicators[symbol] = (table, state)
+        return table
+
+    def get_technical_indicators(self, symbol: str) -> str:
+        """
+        Use this function to get technical indicators of a stock, calculated from its daily
+        prices, for the latest trading days:
+            - SMA 20/50/200: simple moving averages of the close over 20, 50 & 200 days
+            - EMA 12/26: exponential moving averages of the close
+            - MACD = EMA 12 - EMA 26, MACD Signal = 9 day EMA of MACD, MACD Histogram = MACD - Signal
+            - RSI 14: relative strength index (0-100) over 14 days
+            - Bollinger Upper/Lower: SMA 20 +/- 2 standard deviations, %B = position of the
+              close within the bands (0 = lower band, 1 = upper band)
+            - ATR 14: average true range (daily price range) over 14 days
+            - Volatility 20D: annualized standard deviation of daily returns over 20 days
+
+        These can be interpreted as follows (though the interpretation could differ person-to-person)
+            - Close above SMA 50 & SMA 200 is an uptrend, SMA 50 crossing above SMA 200 is bullish
+            - RSI > 70 is overbought, < 30 is oversold
+            - MACD crossing above its signal (histogram turning positive) is bullish momentum
+            - %B > 1 or < 0: close is outside the Bollinger bands (stretched move)
+            - ATR & volatility measure risk - higher means bigger daily swings
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            str: markdown (or compact CSV/TSV) table with rows for the latest trading days
+                and columns for the close & each of the technical indicators
+        """
+        try:
+            table = self.calculate_indicators(symbol).tail(self.rows)
+            # daily bars have no time of day
+            table = table.set_axis(table.index.strftime("%Y-%m-%d"), axis=0)
+            ret = format_table(table, self.output_format)
+            logger.debug(ret)
+            return ret
+        except Exception as e:
+            return f"Error calculating technical indicators for {symbol}: {e}"
+
+
+def _indicators_of(
+    history: pd.DataFrame, state: Optional[IndicatorState] = None
+) -> Tuple[pd.DataFrame, IndicatorState]:
+    """
+    indicators of the bars of history (given the state before its first bar)
+    Returns:
+        (indicators table, state before the last bar of history)
+    """
+    prices = [history[column].to_numpy() for column in ("Close", "High", "Low")]
+    indicators, state = compute_indicators(*[p[:-1] for p in prices], state)
+    last_bar, _ = compute_indicators(*[p[-1:] for p in prices], state)
+    indicators = {name: np.vstack([values, last_bar[name]]) for name, values in indicators.items()}
+    return indicator_table(history, indicators), state
@@ -0,0 +1,346 @@
+"""
+analysis_cache.py - skips the (slow & costly) LLM analysis of a company when
+    nothing it depends on has changed since the last analysis.
+
+    An investment analysis is a function of its inputs:
+        - statements: values of each financial statement (all financial years), rounded
+          to 4 significant digits (see tools/formatting.py) - the ratio tables & the peer
+          comparison are calculated from these
+        - peers: statements of the peers chosen in the last analysis
+        - market: the trading day - prices (and so market cap, P/E & the other valuation
+          ratios) move all day long, so market data is bucketed by trading day instead of
+          hashed (an analysis is reused for the rest of the day)
+        - news: ids of the latest news articles (input to sentiment analysis)
+        - prompts: hashes of the prompt files used by our agents
+    Each input is hashed separately, and the fingerprint of an analysis is the hash of all
+    input hashes. Past analyses are stored (as JSON, per symbol) keyed by fingerprint, so a
+    re-analysis with an unchanged fingerprint returns instantly, while a changed one
+    reports which inputs moved (e.g. ["news", "statements.financials"]). Metadata of every new
+    analysis (fingerprint, peers & changed inputs) is also saved to the analytics store
+    (see utils/analytics_store.py).
+
+    Usage:
+        cache = AnalysisCache()
+        result = cache.analyze("TCS.NS", lambda: run_my_analysis("TCS.NS"))
+        # or, when the analysis can't be wrapped in a callable (e.g. streamed to a UI)
+        check = cache.check("TCS.NS")
+        result = check.hit or cache.store(check, run_my_analysis("TCS.NS"))
+
+        if not result.cached:
+            print(f"Re-analyzed, inputs changed: {result.changed_inputs}")
+        print(result.analysis)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import json
+import hashlib
+import pathlib
+import importlib
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import yfinance as yf
+from agno.utils.log import logger
+
+from utils.analytics_store import AnalyticsStore, get_analytics_store
+from utils.prompts import CONFIG_DIR
+
+# financial statements whose values are part of the fingerprint
+# (ticker.income_stmt is the same statement as ticker.financials)
+STATEMENTS = ("balance_sheet", "financials", "cash_flow")
+# number of latest news articles analyzed by the sentiment analysis tools
+NEWS_COUNT = 25
+# number of past analyses kept per symbol
+MAX_ENTRIES_PER_SYMBOL = 10
+
+
+def _hash(value) -> str:
+    if not isinstance(value, (str, bytes)):
+        value = json.dumps(value, sort_keys=True, default=str)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return hashlib.sha256(value).hexdigest()[:16]
+
+
+def prompt_files() -> List[pathlib.Path]:
+    """prompt files used by the agents in agents/registry.py"""
+    from agents.registry import AGENT_FACTORIES
+
+    files = set()
+    for factory in AGENT_FACTORIES.values():
+        module = importlib.import_module(factory.split(":")[0])
+        prompts_file = getattr(module, "PROMPTS_FILE", None)
+        if prompts_file is not None:
+            files.add(CONFIG_DIR / prompts_file)
+    return sorted(files)
+
+
+def trading_day(now: Optional[datetime] = None) -> str:
+    """today's date (Friday's on weekends), the bucket of market data in the fingerprint"""
+    day = (now or datetime.now()).date()
+    day -= timedelta(days=max(0, day.weekday() - 4))
+    return day.isoformat()
+
+
+def statement_values(ticker, statement: str) -> str:
+    """a statement of ticker (financial years as rows) as compact CSV - 4 significant digits"""
+    from tools.formatting import format_table
+
+    df = getattr(ticker, statement)
+    return format_table(df.transpose().sort_index(), "csv")
+
+
+def fingerprint_inputs(symbol: str, peers: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    hashes of all normalized inputs of an analysis of symbol (see module docstring)
+    Params:
+        symbol: valid ticker symbol (as used by Yahoo Finance!)
+        peers: symbols used for peer comparison (symbol first), None = no peer comparison
+    Returns:
+        dict of input name -> hash, e.g. {"statements.balance_sheet": "3f2a...", ...}
+    """
+    inputs = {}
+    ticker = yf.Ticker(symbol)
+    for statement in STATEMENTS:
+        inputs[f"statements.{statement}"] = _hash(statement_values(ticker, statement))
+
+    if peers:
+        peer_statements = []
+        for peer in peers:
+            if peer.upper() == symbol.upper():
+                continue
+            try:
+                peer_ticker = yf.Ticker(peer)
+                peer_statements.append([statement_values(peer_ticker, s) for s in STATEMENTS])
+            except Exception as e:
+                # the peer comparison tool reports the same error to the LLM
+                peer_statements.append(f"error: {e}")
+        inputs["peers"] = _hash([list(peers), peer_statements])
+
+    inputs["market.trading_day"] = _hash(trading_day())
+
+    news = ticker.get_news(count=NEWS_COUNT)
+    article_ids = [
+        n.get("id") or n.get("content", {}).get("id") or n.get("content", {}).get("title")
+        for n in news
+    ]
+    inputs["news"] = _hash(article_ids)
+
+    for prompts_file in prompt_files():
+        inputs[f"prompts.{prompts_file.name}"] = _hash(prompts_file.read_bytes())
+    return inputs
+
+
+def fingerprint(inputs: Dict[str, str]) -> str:
+    """fingerprint of an analysis, from the hashes of its inputs"""
+    return _hash(inputs)
+
+
+def changed_inputs(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    """names of inputs that were added, removed or changed between previous & current"""
+    return sorted(
+        name
+        for name in set(previous) | set(current)
+        if previous.get(name) != current.get(name)
+    )
+
+
+@dataclass
+class CachedAnalysis:
+    symbol: str
+    fingerprint: str
+    analysis: str
+    inputs: Dict[str, str]
+    peers: Optional[List[str]] = None
+    created: str = ""
+    # True if analysis was returned from the cache (i.e. without running the LLM)
+    cached: bool = False
+    # inputs that changed since the previous analysis of symbol (empty if cached)
+    changed_inputs: List[str] = field(default_factory=list)
+
+
+class AnalysisCache:
+    """
+    store of past analyses, keyed by (symbol, fingerprint)
+        cache_dir: folder for the per-symbol JSON files (default: ANALYSIS_CACHE_DIR env
+            variable, else cache/analyses under the src/InvestmentAnalysis folder)
+        max_entries: past analyses kept per symbol
+        analytics_store: where metadata of new analyses is saved (default: get_analytics_store())
+        fingerprint_inputs: function hashing the inputs of an analysis (default:
+            fingerprint_inputs() - replace e.g. with a version whose results are cached)
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, pathlib.Path, None] = None,
+        max_entries: int = MAX_ENTRIES_PER_SYMBOL,
+        analytics_store: Optional[AnalyticsStore] = None,
+        fingerprint_inputs: Callable[[str, Optional[List[str]]], Dict[str, str]] = fingerprint_inputs,
+    ):
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                "ANALYSIS_CACHE_DIR",
+                pathlib.Path(__file__).parent.parent / "cache" / "analyses",
+            )
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_entries = max_entries
+        self.analytics_store = analytics_store or get_analytics_store()
+        self.fingerprint_inputs = fingerprint_inputs
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> pathlib.Path:
+        return self.cache_dir / f"{symbol.upper()}.json"
+
+    def entries(self, symbol: str) -> List[dict]:
+        """past analyses of symbol, latest last"""
+        path = self._path(symbol)
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def latest(self, symbol: str) -> Optional[CachedAnalysis]:
+        entries = self.entries(symbol)
+        return CachedAnalysis(**entries[-1]) if entries else None
+
+    def lookup(self, symbol: str, analysis_fingerprint: str) -> Optional[CachedAnalysis]:
+        for entry in reversed(self.entries(symbol)):
+            if entry["fingerprint"] == analysis_fingerprint:
+                return CachedAnalysis(**entry)
+        return None
+
+    def save(self, result: CachedAnalysis):
+        with self._lock:
+            entries = [
+                e for e in self.entries(result.symbol) if e["fingerprint"] != result.fingerprint
+            ]
+            entries.append(
+                {
+                    "symbol": result.symbol,
+                    "fingerprint": result.fingerprint,
+                    "analysis": result.analysis,
+                    "inputs": result.inputs,
+                    "peers": result.peers,
+                    "created": result.created,
+                }
+            )
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(result.symbol)
+            # write to a temp file first, so readers never see a partial file
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries[-self.max_entries :], f, indent=2)
+            os.replace(tmp_path, path)
+
+    def check(self, symbol: str) -> "AnalysisCheck":
+        """fingerprints the current inputs of symbol & looks up a stored analysis for them"""
+        symbol = symbol.upper()
+        previous = self.latest(symbol)
+        peers = previous.peers if previous is not None else None
+        inputs = self.fingerprint_inputs(symbol, peers)
+        hit = self.lookup(symbol, fingerprint(inputs))
+        if hit is not None:
+            hit.cached = True
+        return AnalysisCheck(symbol, previous, peers, inputs, hit)
+
+    def store(
+        self, check: "AnalysisCheck", analysis: str, peers: Optional[List[str]] = None
+    ) -> CachedAnalysis:
+        """
+        stores a (new) analysis for the inputs fingerprinted by check
+        Params:
+            check: returned by check(), before the analysis was run
+            analysis: the analysis text
+            peers: symbols used for peer comparison (see peers_used()), None = same as before
+        """
+        inputs = check.inputs
+        if peers is not None and peers != check.peers:
+            # the LLM picked different peers, so fingerprint their comparison table
+            inputs = self.fingerprint_inputs(check.symbol, peers)
+
+        result = CachedAnalysis(
+            symbol=check.symbol,
+            fingerprint=fingerprint(inputs),
+            analysis=analysis,
+            inputs=inputs,
+            peers=peers if peers is not None else check.peers,
+            created=datetime.now().isoformat(timespec="seconds"),
+            changed_inputs=check.changed_inputs,
+        )
+        self.save(result)
+        try:
+            self.analytics_store.save_analysis(
+                result.symbol,
+                "agents",
+                fingerprint=result.fingerprint,
+                peers=result.peers,
+                changed_inputs=result.changed_inputs,
+            )
+        except Exception as e:
+            # the analysis is cached, its history is nice-to-have
+            logger.warning(f"Unable to save analysis of {result.symbol} to analytics store: {e}")
+        return result
+
+    def analyze(
+        self,
+        symbol: str,
+        run_analysis: Callable[[], Union[str, Tuple[str, Optional[List[str]]]]],
+        force: bool = False,
+    ) -> CachedAnalysis:
+        """
+        returns the stored analysis of symbol if its inputs are unchanged, else runs
+        run_analysis() and stores its result
+        Params:
+            symbol: valid ticker symbol (as used by Yahoo Finance!)
+            run_analysis: callable returning the analysis text, or (analysis, peers)
+                where peers are the symbols used for peer comparison (see peers_used())
+            force: run the analysis even if inputs are unchanged
+        """
+        check = self.check(symbol)
+        if check.hit is not None and not force:
+            return check.hit
+
+        result = run_analysis()
+        analysis, peers = result if isinstance(result, tuple) else (result, None)
+        return self.store(check, analysis, peers)
+
+
+@dataclass
+class AnalysisCheck:
+    """result of AnalysisCache.check()"""
+
+    symbol: str
+    # latest stored analysis of symbol (None if never analyzed)
+    previous: Optional[CachedAnalysis]
+    # peers (of previous analysis) used to fingerprint the peer comparison
+    peers: Optional[List[str]]
+    inputs: Dict[str, str]
+    # stored analysis with the same fingerprint (None = inputs changed)
+    hit: Optional[CachedAnalysis]
+
+    @property
+    def changed_inputs(self) -> List[str]:
+        """inputs that changed since the previous analysis (["all"] if never analyzed)"""
+        if self.previous is None:
+            return ["all"]
+        return changed_inputs(self.previous.inputs, self.inputs)
+
+
+def peers_used(agent) -> Optional[List[str]]:
+    """
+    symbols passed to the peer comparison tool during the last run of agent
+    (or of its team members), None if the tool wasn't called
+    """
+    for member in [agent] + list(agent.team or []):
+        run_response = getattr(member, "run_response", None)
+        for tool in (run_response.tools if run_response is not None else None) or []:
+            if tool.get("tool_name") == "get_peer_comparison_and_industry_benchmarks":
+                return list((tool.get("tool_args") or {}).get("symbols") or []) or None
+    return None
@@ -0,0 +1,246 @@
+"""
+analysis_jobs.py - runs investment analyses as background jobs on a (process-wide) pool
+    of worker threads, tracking the progress of each stage of an analysis:
+        - financial, peers & sentiment: the member agents of the investment analysis team
+          (a stage runs while the team leader's transfer_task_to_<member> tool call runs)
+        - synthesis: the team leader writing the final analysis from the members' outputs
+    A front end (e.g. the streamlit app) submits jobs & polls them - every stage's output
+    is available as soon as the stage completes, and the synthesis streams into
+    job.analysis as it is generated.
+
+    Usage:
+        runner = AnalysisJobRunner(workers=2)
+        job = runner.submit("TCS.NS")
+        while job.active:
+            print({name: stage.status for name, stage in job.stages.items()})
+            time.sleep(1)
+        print(job.analysis)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from agno.utils.log import logger
+
+from utils.analysis_cache import AnalysisCache, peers_used
+from utils.tracing import Trace
+from utils.network_accounting import NetworkAccount
+from utils.profiling import ProfileReport, profile_analysis
+from utils.run_metrics import record_run_metrics
+
+# stage of each member agent of the investment analysis team (by agent name)
+MEMBER_STAGES = {
+    "Financial Analysis Agent": "financial",
+    "Peers Comparison Agent": "peers",
+    "Sentiment Analysis Agent": "sentiment",
+}
+SYNTHESIS_STAGE = "synthesis"
+# finished jobs kept for polling
+MAX_FINISHED_JOBS = 100
+
+
+def transfer_tool_name(agent_name: str) -> str:
+    """name of the tool a team leader calls to hand a task to agent_name (as named by agno)"""
+    agent_name = "".join(c for c in agent_name if c.isalnum() or c in "_- ").strip()
+    return f"transfer_task_to_{agent_name.lower().replace(' ', '_')}"
+
+
+@dataclass
+class StageStatus:
+    name: str
+    # pending, running, completed, skipped (analysis re-used from the cache) or failed
+    status: str = "pending"
+    started: Optional[float] = None
+    seconds: Optional[float] = None
+    output: str = ""
+
+
+@dataclass
+class AnalysisJob:
+    symbol: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # queued, running, completed or failed
+    status: str = "queued"
+    stages: Dict[str, StageStatus] = field(
+        default_factory=lambda: {
+            name: StageStatus(name) for name in list(MEMBER_STAGES.values()) + [SYNTHESIS_STAGE]
+        }
+    )
+    # the analysis so far (streamed while the synthesis stage runs)
+    analysis: str = ""
+    # True if a past analysis was re-used (see utils/analysis_cache.py)
+    cached: bool = False
+    changed_inputs: List[str] = field(default_factory=list)
+    # run metrics of the team leader (token counts & times per model call)
+    metrics: dict = field(default_factory=dict)
+    time_to_first_token: Optional[float] = None
+    # spans of the analysis (yfinance fetches, tool calls, agent runs & LLM calls)
+    trace: Optional[Trace] = None
+    # Yahoo! Finance requests of the analysis (see utils/network_accounting.py)
+    network: Optional[NetworkAccount] = None
+    # hot functions, stacks & peak memory, if the job was profiled (see utils/profiling.py)
+    profile: Optional[ProfileReport] = None
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def seconds(self) -> float:
+        """time running (so far)"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class AnalysisJobRunner:
+    """
+    pool of worker threads running analysis jobs (see module docstring)
+        workers: max. concurrent analyses
+        analysis_cache: past analyses, re-used when their inputs are unchanged
+            (None = always run the agents)
+        create_agent: returns a new agent team per job (default: create_worker_agent)
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        analysis_cache: Optional[AnalysisCache] = None,
+        create_agent: Optional[Callable] = None,
+    ):
+        self.analysis_cache = analysis_cache
+        self.create_agent = create_agent
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, symbol: str, reuse: bool = True, profile: bool = False) -> AnalysisJob:
+        """
+        queues an analysis of symbol - returns the queued/running job of symbol instead, if
+        there is one (so concurrent requests for a symbol share one analysis)
+        Params:
+            reuse: re-use the last analysis of symbol if none of its inputs changed
+            profile: profile the analysis - skipped if another job is being profiled
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            for job in self._jobs.values():
+                if job.symbol == symbol and job.active:
+                    return job
+            job = AnalysisJob(symbol)
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if not j.active]
+            for old_job in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+                del self._jobs[old_job.id]
+        self._executor.submit(self._run, job, reuse, profile)
+        return job
+
+    def job(self, job_id: str) -> Optional[AnalysisJob]:
+        return self._jobs.get(job_id)
+
+    def _run(self, job: AnalysisJob, reuse: bool, profile: bool):
+        job.status, job.started = "running", time.time()
+        try:
+            with ExitStack() as stack:
+                if profile:
+                    try:
+                        job.profile = stack.enter_context(profile_analysis(job.symbol))
+                    except RuntimeError as e:
+                        logger.warning(f"Not profiling the analysis of {job.symbol}: {e}")
+                with Trace("analysis", symbol=job.symbol) as job.trace, NetworkAccount(
+                    symbol=job.symbol
+                ) as job.network:
+                    self._analyze(job, reuse)
+            job.status = "completed"
+        except Exception as e:
+            logger.warning(f"Analysis job for {job.symbol} failed: {e}")
+            job.status, job.error = "failed", str(e)
+            for stage in job.stages.values():
+                if stage.status == "running":
+                    stage.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def _analyze(self, job: AnalysisJob, reuse: bool):
+        from agno.run.response import RunEvent
+
+        check = None
+        if reuse and self.analysis_cache is not None:
+            try:
+                check = self.analysis_cache.check(job.symbol)
+            except Exception as e:
+                logger.warning(f"Unable to fingerprint inputs of {job.symbol} ({e}), not caching")
+        if check is not None and check.hit is not None:
+            job.analysis, job.cached = check.hit.analysis, True
+            for stage in job.stages.values():
+                stage.status = "skipped"
+            return
+        if check is not None and check.previous is not None:
+            job.changed_inputs = check.changed_inputs
+
+        if self.create_agent is None:
+            from investment_analysis_batch import create_worker_agent
+
+            self.create_agent = create_worker_agent
+        agent = self.create_agent()
+        # member agent & stage by the name of the tool that hands a task to the member
+        members_by_tool = {
+            transfer_tool_name(member.name): (member, job.stages[MEMBER_STAGES[member.name]])
+            for member in agent.team or []
+            if member.name in MEMBER_STAGES
+        }
+        member_stages = [stage for _, stage in members_by_tool.values()]
+        synthesis = job.stages[SYNTHESIS_STAGE]
+        running = None
+
+        prompt = f"Generate investment analysis for {job.symbol}"
+        for chunk in agent.run(prompt, markdown=True, stream=True, stream_intermediate_steps=True):
+            if chunk.event == RunEvent.run_response.value and chunk.content:
+                if job.time_to_first_token is None:
+                    job.time_to_first_token = time.time() - job.started
+                # the leader writes the analysis once its members are done
+                members_done = any(s.status == "completed" for s in member_stages)
+                if synthesis.status == "pending" and members_done and running is None:
+                    synthesis.status, synthesis.started = "running", time.time()
+                job.analysis += chunk.content
+            elif chunk.event == RunEvent.tool_call_started.value and chunk.tools:
+                # tool calls run one at a time, the one started is the last one in chunk.tools
+                member, stage = members_by_tool.get(chunk.tools[-1].get("tool_name"), (None, None))
+                if stage is not None:
+                    stage.status, stage.started = "running", time.time()
+                    running = (member, stage)
+            elif chunk.event == RunEvent.tool_call_completed.value and running is not None:
+                member, stage = running
+                stage.status, stage.seconds = "completed", time.time() - stage.started
+                if member.run_response is not None:
+                    stage.output = str(member.run_response.content or "")
+                running = None
+
+        for stage in member_stages:
+            if stage.status == "pending":
+                # the team leader didn't need this member
+                stage.status = "skipped"
+        if synthesis.started is not None:
+            synthesis.seconds = time.time() - synthesis.started
+        synthesis.status = "completed"
+        job.metrics = agent.run_response.metrics or {}
+        try:
+            record_run_metrics(agent, job.symbol)
+        except Exception as e:
+            logger.warning(f"Unable to record run metrics of {job.symbol}: {e}")
+        if check is not None and job.analysis:
+            self.analysis_cache.store(check, job.analysis, peers_used(agent))
@@ -0,0 +1,517 @@
+"""
+analytics_store.py - embedded (SQLite) store of everything we download & compute for a
+    company, so that historical & cross-company questions ("how did the current ratio of
+    TCS.NS move over 4 years?", "which IT services company has the best net margin?")
+    are answered by indexed SQL queries, instead of re-downloading statements & ratios.
+
+    Tables (period is a financial year end for statements & ratios, the date of the run
+    for sentiment & analyses - all periods are ISO dates, YYYY-MM-DD):
+        companies   (symbol, name, sector, industry, currency, updated)
+        statements  (symbol, statement, period, item, value, updated) - normalized (long) format
+        ratios      (symbol, industry, category, period, ratio, value, updated)
+        peer_sets   (symbol, period, peers, source, created)
+        sentiment   (symbol, industry, period, sentiment, avg_score, articles, created)
+        analyses    (id, symbol, industry, period, source, fingerprint, provider, peers,
+                     changed_inputs, cached, report_path, created)
+        llm_calls   (run_id, call, symbol, agent, prompts_file, model, input_tokens,
+                     output_tokens, total_tokens, seconds, time_to_first_token, created)
+        tool_calls  (run_id, call, symbol, agent, tool, seconds, error, created)
+    with indexes on (symbol, period) and, where the industry is known, (industry, period).
+    llm_calls & tool_calls (one row per model / tool call of an agent run, see
+    utils/run_metrics.py) are indexed on (agent, created) & (tool, created).
+    Re-saving the same (symbol, statement/category, period, item) replaces the old value.
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python -m utils.analytics_store ingest TCS.NS INFY.NS WIPRO.NS
+        python -m utils.analytics_store history TCS.NS --category liquidity
+        python -m utils.analytics_store industry "Information Technology Services" "Net Margin"
+        python -m utils.analytics_store query "SELECT * FROM analyses ORDER BY created DESC LIMIT 5"
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import json
+import pathlib
+import sqlite3
+import argparse
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from agno.utils.log import logger
+
+# financial statements saved by ingest() (attribute of yf.Ticker)
+STATEMENTS = ("balance_sheet", "financials", "cash_flow")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    symbol TEXT PRIMARY KEY,
+    name TEXT,
+    sector TEXT,
+    industry TEXT,
+    currency TEXT,
+    updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_companies_industry ON companies (industry);
+
+CREATE TABLE IF NOT EXISTS statements (
+    symbol TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    period TEXT NOT NULL,
+    item TEXT NOT NULL,
+    value REAL,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (symbol, statement, period, item)
+);
+CREATE INDEX IF NOT EXISTS idx_statements_symbol_period ON statements (symbol, period);
+
+CREATE TABLE IF NOT EXISTS ratios (
+    symbol TEXT NOT NULL,
+    industry TEXT,
+    category TEXT NOT NULL,
+    period TEXT NOT NULL,
+    ratio TEXT NOT NULL,
+    value REAL,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (symbol, category, period, ratio)
+);
+CREATE INDEX IF NOT EXISTS idx_ratios_symbol_period ON ratios (symbol, period);
+CREATE INDEX IF NOT EXISTS idx_ratios_industry_period ON ratios (industry, period);
+
+CREATE TABLE IF NOT EXISTS peer_sets (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    peers TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created TEXT NOT NULL,
+    PRIMARY KEY (symbol, period, source)
+);
+
+CREATE TABLE IF NOT EXISTS sentiment (
+    symbol TEXT NOT NULL,
+    industry TEXT,
+    period TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    avg_score REAL NOT NULL,
+    articles INTEGER NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sentiment_symbol_period ON sentiment (symbol, period);
+CREATE INDEX IF NOT EXISTS idx_sentiment_industry_period ON sentiment (industry, period);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    industry TEXT,
+    period TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fingerprint TEXT,
+    provider TEXT,
+    peers TEXT,
+    changed_inputs TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    report_path TEXT,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_symbol_period ON analyses (symbol, period);
+CREATE INDEX IF NOT EXISTS idx_analyses_industry_period ON analyses (industry, period);
+
+CREATE TABLE IF NOT EXISTS llm_calls (
+    run_id TEXT NOT NULL,
+    call INTEGER NOT NULL,
+    symbol TEXT,
+    agent TEXT NOT NULL,
+    prompts_file TEXT,
+    model TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    total_tokens INTEGER,
+    seconds REAL,
+    time_to_first_token REAL,
+    created TEXT NOT NULL,
+    PRIMARY KEY (run_id, call)
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_agent_created ON llm_calls (agent, created);
+
+CREATE TABLE IF NOT EXISTS tool_calls (
+    run_id TEXT NOT NULL,
+    call INTEGER NOT NULL,
+    symbol TEXT,
+    agent TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    seconds REAL,
+    error INTEGER NOT NULL DEFAULT 0,
+    created TEXT NOT NULL,
+    PRIMARY KEY (run_id, call)
+);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_tool_created ON tool_calls (tool, created);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _period(value) -> str:
+    """ISO date (YYYY-MM-DD) of a period (Timestamp, date or string)"""
+    return str(value)[:10]
+
+
+def _value(value) -> Optional[float]:
+    """float value for the store - NaN & inf (e.g. from division by 0) are stored as NULL"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+class AnalyticsStore:
+    """
+    SQLite store of statements, ratios, peer sets, sentiment & analyses (see module docstring)
+        db_path: path of the database (default: ANALYTICS_DB env variable, else
+            cache/analytics.db under the src/InvestmentAnalysis folder)
+    Safe to share across threads - each thread gets its own connection.
+    """
+
+    def __init__(self, db_path: Union[str, pathlib.Path, None] = None):
+        if db_path is None:
+            db_path = os.environ.get(
+                "ANALYTICS_DB", pathlib.Path(__file__).parent.parent / "cache" / "analytics.db"
+            )
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self.connection() as conn:
+            # WAL lets readers (e.g. the streamlit app) query while a batch run writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """connection of the calling thread (use as a context manager for a transaction)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """closes the connection of the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -------------------------------------------------------------------------
+    # writes
+    # -------------------------------------------------------------------------
+
+    def save_company(self, symbol: str, info: dict):
+        """saves name, sector & industry of symbol from its yf.Ticker().info"""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO companies VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    symbol.upper(),
+                    info.get("longName") or info.get("shortName"),
+                    info.get("sector"),
+                    info.get("industry"),
+                    info.get("financialCurrency") or info.get("currency"),
+                    _now(),
+                ),
+            )
+
+    def industry(self, symbol: str) -> Optional[str]:
+        """industry of symbol, if save_company() was called for it"""
+        row = (
+            self.connection()
+            .execute("SELECT industry FROM companies WHERE symbol = ?", (symbol.upper(),))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def save_statement(self, symbol: str, statement: str, df: pd.DataFrame) -> int:
+        """
+        saves a financial statement of symbol in normalized (long) format
+        Params:
+            symbol: valid ticker symbol (as used by Yahoo Finance!)
+            statement: name of the statement (e.g. "balance_sheet")
+            df: the statement as returned by yfinance (line items as rows, periods as columns)
+        Returns:
+            number of values saved
+        """
+        updated = _now()
+        rows = [
+            (symbol.upper(), statement, _period(period), str(item), _value(value), updated)
+            for period in df.columns
+            for item, value in df[period].items()
+        ]
+        with self.connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def save_ratios(self, symbol: str, category: str, df: pd.DataFrame) -> int:
+        """
+        saves a ratio table of symbol
+        Params:
+            symbol: valid ticker symbol (as used by Yahoo Finance!)
+            category: name of the table (e.g. "liquidity", see tools/arrow_ratios.RATIO_CATEGORIES)
+            df: as returned by tools/arrow_ratios.ratio_frame (or the calculate_X functions in
+                tools/ratios.py) - periods as rows, ratios as columns
+        Returns:
+            number of values saved
+        """
+        industry, updated = self.industry(symbol), _now()
+        rows = [
+            (symbol.upper(), industry, category, _period(period), str(ratio), _value(value), updated)
+            for period, values in df.iterrows()
+            for ratio, value in values.items()
+        ]
+        with self.connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO ratios VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def save_peers(self, symbol: str, peers: Sequence[str], source: str = "analysis"):
+        """saves the peers of symbol picked today (by source - e.g. the agent team or an LLM)"""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO peer_sets VALUES (?, ?, ?, ?, ?)",
+                (symbol.upper(), date.today().isoformat(), json.dumps(list(peers)), source, _now()),
+            )
+
+    def save_sentiment(self, symbol: str, sentiment: str, avg_score: float, articles: int):
+        """saves a market sentiment score of symbol (see SentimentAnalysisTools)"""
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO sentiment VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    symbol.upper(),
+                    self.industry(symbol),
+                    date.today().isoformat(),
+                    sentiment,
+                    float(avg_score),
+                    int(articles),
+                    _now(),
+                ),
+            )
+
+    def save_analysis(
+        self,
+        symbol: str,
+        source: str,
+        fingerprint: Optional[str] = None,
+        provider: Optional[str] = None,
+        peers: Optional[Sequence[str]] = None,
+        changed_inputs: Optional[Sequence[str]] = None,
+        cached: bool = False,
+        report_path: Union[str, pathlib.Path, None] = None,
+    ) -> int:
+        """
+        saves metadata of an analysis of symbol (the analysis text stays in its report file
+        or the analysis cache), returns its id
+        Params:
+            source: what ran the analysis (e.g. "agents", "analyze_company")
+            fingerprint: of the analysis inputs (see utils/analysis_cache.py)
+            provider: LLM provider used, if not the default
+            peers: symbols used for peer comparison
+            changed_inputs: inputs changed since the previous analysis
+            cached: True if the analysis was re-used (no LLM run)
+            report_path: where the report was written, if anywhere
+        """
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (symbol, industry, period, source, fingerprint, provider, "
+                "peers, changed_inputs, cached, report_path, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    symbol.upper(),
+                    self.industry(symbol),
+                    date.today().isoformat(),
+                    source,
+                    fingerprint,
+                    provider,
+                    json.dumps(list(peers)) if peers else None,
+                    json.dumps(list(changed_inputs)) if changed_inputs else None,
+                    int(cached),
+                    str(report_path) if report_path else None,
+                    _now(),
+                ),
+            )
+        if peers:
+            self.save_peers(symbol, peers, source)
+        return cursor.lastrowid
+
+    def save_llm_calls(self, rows: Sequence[dict]) -> int:
+        """
+        saves per model call metrics of agent runs (see utils/run_metrics.py) - calls of a
+        run already saved are ignored (e.g. a team member's last run, saved again with a
+        later run of its leader)
+        Params:
+            rows: dicts with the llm_calls columns (created defaults to now)
+        Returns:
+            number of rows saved
+        """
+        columns = (
+            "run_id", "call", "symbol", "agent", "prompts_file", "model", "input_tokens",
+            "output_tokens", "total_tokens", "seconds", "time_to_first_token", "created",
+        )
+        return self._insert_new("llm_calls", columns, rows)
+
+    def save_tool_calls(self, rows: Sequence[dict]) -> int:
+        """saves tool calls of agent runs (dicts with the tool_calls columns, see save_llm_calls)"""
+        columns = ("run_id", "call", "symbol", "agent", "tool", "seconds", "error", "created")
+        return self._insert_new("tool_calls", columns, rows)
+
+    def _insert_new(self, table: str, columns: Sequence[str], rows: Sequence[dict]) -> int:
+        created = _now()
+        values = [
+            tuple(row.get(c, created if c == "created" else None) for c in columns) for row in rows
+        ]
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                values,
+            )
+            return conn.total_changes - before
+
+    def ingest(self, symbol: str, ticker=None) -> Dict[str, int]:
+        """
+        downloads company info, financial statements & ratio tables of symbol and saves them
+        Params:
+            symbol: valid ticker symbol (as used by Yahoo Finance!)
+            ticker: yf.Ticker(symbol), if already created by the caller
+        Returns:
+            dict of table -> number of values saved (ratios a company doesn't report the
+            line items of, e.g. inventory ratios of a bank, are left out)
+        """
+        import yfinance as yf
+        from tools.arrow_ratios import (
+            RATIO_CATEGORIES,
+            calculate_ratio_table,
+            ratio_frame,
+            statement_table,
+        )
+
+        ticker = ticker or yf.Ticker(symbol)
+        info = ticker.info
+        self.save_company(symbol, info)
+        statements = {statement: getattr(ticker, statement) for statement in STATEMENTS}
+        saved = {}
+        for statement, df in statements.items():
+            saved[statement] = self.save_statement(symbol, statement, df)
+        # all ratio tables from the statements fetched above (tools/arrow_ratios.py calculates
+        # the ratios of tools/ratios.py, whose calculate_X functions refetch them per table)
+        try:
+            panel = statement_table(symbol, ticker, statements, info)
+            ratio_table = calculate_ratio_table(panel)
+        except Exception as e:
+            logger.warning(f"Unable to calculate ratios of {symbol}: {e}")
+            return saved
+        for category in RATIO_CATEGORIES:
+            df = ratio_frame(ratio_table, symbol, category, panel=panel)
+            saved[f"ratios.{category}"] = self.save_ratios(symbol, category, df)
+        return saved
+
+    # -------------------------------------------------------------------------
+    # queries
+    # -------------------------------------------------------------------------
+
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """results of any (read) SQL query on the store"""
+        return pd.read_sql_query(sql, self.connection(), params=list(params))
+
+    def statement_history(self, symbol: str, statement: str) -> pd.DataFrame:
+        """saved statement of symbol with line items as rows & periods as columns (like yfinance)"""
+        df = self.query(
+            "SELECT period, item, value FROM statements WHERE symbol = ? AND statement = ?",
+            (symbol.upper(), statement),
+        )
+        return df.pivot(index="item", columns="period", values="value")
+
+    def ratio_history(self, symbol: str, category: Optional[str] = None) -> pd.DataFrame:
+        """saved ratios of symbol with periods as rows & ratios as columns (all categories if None)"""
+        sql = "SELECT period, ratio, value FROM ratios WHERE symbol = ?"
+        params = [symbol.upper()]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        df = self.query(sql, params)
+        return df.pivot_table(index="period", columns="ratio", values="value", aggfunc="last")
+
+    def industry_ratio(
+        self, industry: str, ratio: str, since: Optional[str] = None
+    ) -> pd.DataFrame:
+        """a ratio of all saved companies in industry, with symbols as rows & periods as columns"""
+        sql = "SELECT symbol, period, value FROM ratios WHERE industry = ? AND ratio = ?"
+        params = [industry, ratio]
+        if since is not None:
+            sql += " AND period >= ?"
+            params.append(since)
+        df = self.query(sql, params)
+        return df.pivot_table(index="symbol", columns="period", values="value", aggfunc="last")
+
+    def latest_peers(self, symbol: str) -> Optional[List[str]]:
+        """peers last saved for symbol (None if none saved)"""
+        row = (
+            self.connection()
+            .execute(
+                "SELECT peers FROM peer_sets WHERE symbol = ? ORDER BY created DESC LIMIT 1",
+                (symbol.upper(),),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+
+_store: Optional[AnalyticsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_analytics_store() -> AnalyticsStore:
+    """the (process-wide) store at the default path, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AnalyticsStore()
+    return _store
+
+
+if __name__ == "__main__":
+    from tools.arrow_ratios import RATIO_CATEGORIES
+
+    parser = argparse.ArgumentParser(description="Query & fill the analytics store")
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="download & save symbols")
+    ingest_parser.add_argument("symbols", nargs="+")
+    history_parser = commands.add_parser("history", help="ratio history of a symbol")
+    history_parser.add_argument("symbol")
+    history_parser.add_argument("--category", choices=list(RATIO_CATEGORIES))
+    industry_parser = commands.add_parser("industry", help="a ratio across an industry")
+    industry_parser.add_argument("industry")
+    industry_parser.add_argument("ratio")
+    industry_parser.add_argument("--since", help="first period (YYYY-MM-DD)")
+    query_parser = commands.add_parser("query", help="run an SQL query")
+    query_parser.add_argument("sql")
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.db)
+    if args.command == "ingest":
+        for symbol in args.symbols:
+            saved = store.ingest(symbol.upper())
+            print(f"{symbol.upper()}: saved {sum(saved.values())} values ({', '.join(saved)})")
+    elif args.command == "history":
+        print(store.ratio_history(args.symbol, args.category).transpose().to_markdown())
+    elif args.command == "industry":
+        print(store.industry_ratio(args.industry, args.ratio, args.since).to_markdown())
+    else:
+        print(store.query(args.sql).to_markdown(index=False))
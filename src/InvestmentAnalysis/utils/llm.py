@@ -2,6 +2,9 @@
 llm.py - module where we load our API keys and crete our LLM
     (you can add more LLMs here if you want)
 
+    Nothing is loaded at import time: API keys are loaded by configure_api_keys()
+    and the LLM is created by get_gemini_llm(), on first use.
+
 Author: Manish Bhobe
 My experiments with Python, ML and Generative AI.
 Code is meant for illustration purposes ONLY. Use at your own risk!
@@ -9,23 +12,53 @@ Author is not liable for any damages arising from direct/indirect use of this co
 """
 
 import os
-from dotenv import load_dotenv
+import threading
 
-from agno.models.google import Gemini
-import google.generativeai as genai
+ONE_K = 1024
 
-# load API key from st.secrets or .env file
-if os.environ.get("STREAMLIT_CLOUD"):
-    # when deploying to streamlit, read from st.secrets
-    os.environ["GOOGLE_API_KEY"] = st.secrets("GOOGLE_API_KEY")
-else:
-    # running locally - load from .env file
-    load_dotenv()
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+_api_keys_configured = False
+_lock = threading.Lock()
+
+
+def configure_api_keys():
+    """load API key from st.secrets or .env file (once per process)"""
+    global _api_keys_configured
+
+    if _api_keys_configured:
+        return
+    with _lock:
+        if _api_keys_configured:
+            return
+        if os.environ.get("STREAMLIT_CLOUD"):
+            # when deploying to streamlit, read from st.secrets
+            import streamlit as st
+
+            os.environ["GOOGLE_API_KEY"] = st.secrets["GOOGLE_API_KEY"]
+        else:
+            # running locally - load from .env file
+            from dotenv import load_dotenv
+
+            load_dotenv()
+        _api_keys_configured = True
+
+
+def get_gemini_llm(**kwargs):
+    """
+    creates the LLM we use across our agents - kwargs override the defaults
+    NOTE: agno's Gemini model reads GOOGLE_API_KEY from the environment
+    """
+    from agno.models.google import Gemini
+
+    configure_api_keys()
+    params = dict(id="gemini-2.0-flash", temperature=0.0, max_output_tokens=5 * ONE_K)
+    params.update(kwargs)
+    return Gemini(**params)
 
-ONE_K = 1024
 
-# this is the LLM we'll use across all our agents
-google_gemini_llm = Gemini(
-    id="gemini-2.0-flash", temperature=0.0, max_output_tokens=5 * ONE_K
-)
+def __getattr__(name: str):
+    # google_gemini_llm used to be created at import time
+    if name == "google_gemini_llm":
+        global google_gemini_llm
+        google_gemini_llm = get_gemini_llm()
+        return google_gemini_llm
+    raise AttributeError(f"module {__name__} has no attribute {name}")
@@ -0,0 +1,330 @@
+"""
+network_accounting.py - counts the Yahoo! Finance requests an analysis makes. While a
+    NetworkAccount is active in a thread, every HTTP request yfinance makes from that
+    thread is recorded with its endpoint, symbol, the tool (Toolkit function) that made
+    it, response bytes & time. Requests repeating one already made in the same account
+    are counted as redundant - the fetch amplification we want to catch.
+
+    An account can also enforce a budget (max. calls and/or bytes per analysis) - once
+    it is exceeded, further requests either
+        - fail: raise NetworkBudgetExceeded, which also aborts the agent run at the end
+          of the tool call (our tools turn errors into text, so the run would go on)
+        - cache: are served from the responses recorded earlier in this process (by any
+          account), and raise NetworkBudgetExceeded only if there is none
+    Budget defaults come from the NETWORK_BUDGET_CALLS, NETWORK_BUDGET_BYTES &
+    NETWORK_BUDGET_MODE env variables (no budget if unset). Each account is appended to
+    <trace dir>/network.jsonl when it ends (see utils/tracing.py for the trace dir).
+
+    NOTE: yfinance's cookie & crumb requests don't go through the instrumented method
+    and are not counted.
+
+    Usage:
+        with NetworkAccount(symbol="TCS.NS", max_calls=50) as network:
+            agent.run("Generate investment analysis for TCS.NS")
+        print(network.summary())
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import json
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from utils.tracing import current_trace, default_trace_dir, yfinance_endpoint
+
+BUDGET_MODES = ("fail", "cache")
+# responses kept for serving over-budget requests (cache mode)
+MAX_CACHED_RESPONSES = 512
+
+_local = threading.local()
+_instrument_lock = threading.Lock()
+_instrumented = False
+_responses: "OrderedDict[str, object]" = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+class NetworkBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class NetworkCall:
+    endpoint: str
+    symbol: Optional[str]
+    # Toolkit function that made the call (None = outside a tool call)
+    tool: Optional[str]
+    bytes: int
+    seconds: float
+    status: Optional[int] = None
+    # same request already made in this account
+    redundant: bool = False
+    # served from recorded responses (over budget, cache mode)
+    cached: bool = False
+    # not sent (over budget)
+    refused: bool = False
+    error: Optional[str] = None
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class NetworkAccount:
+    """
+    network calls of one analysis (see module docstring)
+        max_calls, max_bytes: budget (default: NETWORK_BUDGET_CALLS & NETWORK_BUDGET_BYTES
+            env variables, None = unlimited)
+        mode: fail or cache, what happens to requests over budget (default:
+            NETWORK_BUDGET_MODE env variable, else fail)
+        export: append the account to <trace dir>/network.jsonl when it ends
+        attributes: of the analysis (e.g. symbol="TCS.NS")
+    """
+
+    def __init__(
+        self,
+        max_calls: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        mode: Optional[str] = None,
+        export: bool = True,
+        **attributes,
+    ):
+        self.max_calls = max_calls if max_calls is not None else _env_int("NETWORK_BUDGET_CALLS")
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("NETWORK_BUDGET_BYTES")
+        self.mode = mode or os.environ.get("NETWORK_BUDGET_MODE", "fail")
+        if self.mode not in BUDGET_MODES:
+            raise ValueError(f"FATAL ERROR: budget mode must be one of {BUDGET_MODES}, got {self.mode}")
+        self.export_on_exit = export
+        self.attributes = attributes
+        self.calls: List[NetworkCall] = []
+        # set once a request is refused (fail mode, or cache mode without a recorded response)
+        self.exceeded: Optional[NetworkBudgetExceeded] = None
+        self._requests_seen = set()
+        self._lock = threading.Lock()
+        self._outer = None
+
+    def __enter__(self) -> "NetworkAccount":
+        instrument()
+        self._outer = getattr(_local, "account", None)
+        _local.account = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.account = self._outer
+        if self.export_on_exit:
+            try:
+                self.export()
+            except OSError as e:
+                from agno.utils.log import logger
+
+                logger.warning(f"Unable to export network calls: {e}")
+
+    @property
+    def sent(self) -> List[NetworkCall]:
+        """requests sent (i.e. not served from recorded responses or refused)"""
+        return [c for c in self.calls if not (c.cached or c.refused)]
+
+    @property
+    def total_calls(self) -> int:
+        return len(self.sent)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(c.bytes for c in self.sent)
+
+    def over_budget(self) -> bool:
+        return (self.max_calls is not None and self.total_calls >= self.max_calls) or (
+            self.max_bytes is not None and self.total_bytes >= self.max_bytes
+        )
+
+    def add(self, call: NetworkCall, request_key: str):
+        with self._lock:
+            call.redundant = request_key in self._requests_seen
+            self._requests_seen.add(request_key)
+            self.calls.append(call)
+
+    def totals(self) -> dict:
+        sent = self.sent
+        return {
+            "calls": len(sent),
+            "bytes": sum(c.bytes for c in sent),
+            "seconds": round(sum(c.seconds for c in sent), 3),
+            "redundant": sum(1 for c in sent if c.redundant),
+            "errors": sum(1 for c in sent if c.error is not None),
+            "cached": sum(1 for c in self.calls if c.cached),
+            "refused": sum(1 for c in self.calls if c.refused),
+        }
+
+    def summary(self, by: Tuple[str, ...] = ("endpoint", "symbol", "tool")) -> pd.DataFrame:
+        """sent, redundant, cached & refused calls, bytes & seconds grouped by (a subset of) by"""
+        by = list(by)
+        columns = by + ["calls", "bytes", "seconds", "redundant", "cached", "refused"]
+        if not self.calls:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame([asdict(c) for c in self.calls]).fillna({"symbol": "-", "tool": "-"})
+        df["calls"] = ~(df["cached"] | df["refused"])
+        df["redundant"] &= df["calls"]
+        df = df.groupby(by, as_index=False).agg(
+            calls=("calls", "sum"),
+            bytes=("bytes", "sum"),
+            seconds=("seconds", "sum"),
+            redundant=("redundant", "sum"),
+            cached=("cached", "sum"),
+            refused=("refused", "sum"),
+        )
+        return df.sort_values("calls", ascending=False).reset_index(drop=True)[columns]
+
+    def export(self):
+        trace = current_trace()
+        trace_dir = trace.trace_dir if trace is not None else default_trace_dir()
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        record = {
+            "time": time.time(),
+            "trace_id": trace.trace_id if trace is not None else None,
+            **self.attributes,
+            **self.totals(),
+            "budget_exceeded": self.exceeded is not None,
+            "by_endpoint": self.summary(("endpoint",)).to_dict(orient="records"),
+            "by_tool": self.summary(("tool",)).to_dict(orient="records"),
+        }
+        with open(trace_dir / "network.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def current_account() -> Optional[NetworkAccount]:
+    return getattr(_local, "account", None)
+
+
+def request_symbol(url: str, params: Optional[dict]) -> Optional[str]:
+    """symbol a Yahoo! Finance request is for - from the url path or the symbols param"""
+    endpoint = yfinance_endpoint(url)
+    if endpoint.endswith("/{symbol}"):
+        return url.rstrip("/").rsplit("/", 1)[-1].split("?")[0]
+    for key in ("symbols", "symbol", "q"):
+        if params and params.get(key):
+            return str(params[key])
+    return None
+
+
+def _request_key(request_method, url: str, params, body, data) -> str:
+    return json.dumps(
+        [getattr(request_method, "__name__", ""), url, params, body, data],
+        sort_keys=True,
+        default=str,
+    )
+
+
+def _record_response(request_key: str, response):
+    with _responses_lock:
+        _responses[request_key] = response
+        _responses.move_to_end(request_key)
+        while len(_responses) > MAX_CACHED_RESPONSES:
+            _responses.popitem(last=False)
+
+
+def _accounted_make_request(original):
+    # the arguments of _make_request differ across yfinance versions - they are forwarded
+    # unchanged, the ones identifying a request are looked up by name
+    signature = inspect.signature(original)
+
+    @functools.wraps(original)
+    def make_request(self, url, request_method, *args, **kwargs):
+        account = getattr(_local, "account", None)
+        if account is None:
+            return original(self, url, request_method, *args, **kwargs)
+
+        arguments = signature.bind_partial(self, url, request_method, *args, **kwargs).arguments
+        params = arguments.get("params")
+        request_key = _request_key(
+            request_method, url, params, arguments.get("body"), arguments.get("data")
+        )
+        call = NetworkCall(
+            endpoint=yfinance_endpoint(url),
+            symbol=request_symbol(url, params),
+            tool=(getattr(_local, "tools", None) or [None])[-1],
+            bytes=0,
+            seconds=0.0,
+        )
+        if account.over_budget() or account.exceeded is not None:
+            with _responses_lock:
+                response = _responses.get(request_key)
+            if account.mode == "cache" and response is not None:
+                call.cached = True
+                account.add(call, request_key)
+                return response
+            if account.exceeded is None:
+                account.exceeded = NetworkBudgetExceeded(
+                    f"network budget exceeded ({account.total_calls} calls, "
+                    f"{account.total_bytes} bytes) - refused {call.endpoint} for {call.symbol}"
+                )
+            call.refused, call.error = True, str(account.exceeded)
+            account.add(call, request_key)
+            raise account.exceeded
+
+        start = time.perf_counter()
+        try:
+            response = original(self, url, request_method, *args, **kwargs)
+        except Exception as e:
+            call.seconds, call.error = time.perf_counter() - start, f"{type(e).__name__}: {e}"
+            account.add(call, request_key)
+            raise
+        call.seconds = time.perf_counter() - start
+        call.status = getattr(response, "status_code", None)
+        call.bytes = len(getattr(response, "content", b"") or b"")
+        account.add(call, request_key)
+        if call.status is not None and call.status < 400:
+            _record_response(request_key, response)
+        return response
+
+    make_request._accounted = True
+    return make_request
+
+
+def _accounted_function_call_execute(original):
+    @functools.wraps(original)
+    def execute(self) -> bool:
+        account = getattr(_local, "account", None)
+        if account is None:
+            return original(self)
+        tools = _local.__dict__.setdefault("tools", [])
+        tools.append(self.function.name)
+        try:
+            success = original(self)
+        finally:
+            tools.pop()
+        if account.exceeded is not None:
+            # our tools return errors as text - stop the agent run instead
+            raise account.exceeded
+        return success
+
+    execute._accounted = True
+    return execute
+
+
+def instrument():
+    """counts the requests of yfinance & attributes them to agno tool calls (once per process)"""
+    global _instrumented
+    if _instrumented:
+        return
+    with _instrument_lock:
+        if _instrumented:
+            return
+        from yfinance.data import YfData
+        from agno.tools.function import FunctionCall
+
+        if not getattr(YfData._make_request, "_accounted", False):
+            YfData._make_request = _accounted_make_request(YfData._make_request)
+        if not getattr(FunctionCall.execute, "_accounted", False):
+            FunctionCall.execute = _accounted_function_call_execute(FunctionCall.execute)
+        _instrumented = True
@@ -0,0 +1,374 @@
+"""
+price_store.py - local, memory-mapped store of the daily (adjusted) OHLCV price history
+    of a universe of symbols, so indicator, risk & correlation computations run over the
+    whole universe without downloading it again or holding a DataFrame per symbol in RAM.
+
+    Layout (in the PRICE_STORE_DIR env variable folder, else cache/prices):
+        meta.json               symbols (symbol -> column offset = position in the list),
+                                rows used, capacities & file generation
+        dates.<gen>.bin         int64 (datetime64[D]) trading dates, one per row
+        <column>.<gen>.bin      float64 matrix (row capacity x symbol capacity) per OHLCV
+                                column - row-major, so a trading day is one contiguous row
+    Rows are appended (in date order) as new trading days arrive: a daily update writes
+    the new rows at the end of each file & then meta.json, and never moves existing data
+    (plain memmaps rather than Arrow IPC files, which can't be appended to in place).
+    A symbol seen for the first time gets the next free column and its history is written
+    into the existing rows. Bars on dates the store doesn't have before its last date (a
+    longer history than the stored symbols', another exchange calendar) are merged in:
+    the files are rewritten (as a new generation) with rows for those dates. Files grow by
+    ROW_GROWTH rows at a time; running out of symbol columns also rewrites the files, with
+    twice the capacity.
+
+    Reads are zero-copy NumPy views of the memory-mapped files (only the pages touched are
+    read from disk): column() is the (dates x symbols) matrix of a column - the input of
+    tools/indicators.py (via drop_missing_bars() if symbols trade on different calendars) -
+    and prices() is one symbol's column (a strided view). One process
+    writes; readers (any number of processes) open the store with readonly=True & call
+    refresh() to see new rows.
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python -m utils.price_store ingest TCS.NS INFY.NS WIPRO.NS --period 10y
+        python -m utils.price_store update
+        python -m utils.price_store info
+        python -m utils.price_store indicators
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import json
+import pathlib
+import argparse
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from agno.utils.log import logger
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+# rows the files grow by (~4 years of trading days)
+ROW_GROWTH = 1024
+MIN_SYMBOL_CAPACITY = 64
+# price history downloaded for symbols seen for the first time & for updates
+HISTORY_PERIOD = "10y"
+UPDATE_PERIOD = "1mo"
+
+
+def default_price_store_dir() -> pathlib.Path:
+    return pathlib.Path(
+        os.environ.get("PRICE_STORE_DIR", pathlib.Path(__file__).parent.parent / "cache" / "prices")
+    )
+
+
+def _bar_dates(history: pd.DataFrame) -> np.ndarray:
+    """trading dates (local to the exchange) of the bars of a ticker.history DataFrame"""
+    index = pd.DatetimeIndex(history.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype("datetime64[D]")
+
+
+class PriceStore:
+    """
+    memory-mapped daily OHLCV store (see module docstring)
+        store_dir: folder of the store (default: default_price_store_dir())
+        readonly: open for reading only (e.g. from worker processes)
+    """
+
+    def __init__(self, store_dir: Union[str, pathlib.Path, None] = None, readonly: bool = False):
+        self.store_dir = pathlib.Path(store_dir or default_price_store_dir())
+        self.readonly = readonly
+        if not readonly:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.refresh()
+
+    # -------------------------------------------------------------------------
+    # files
+    # -------------------------------------------------------------------------
+
+    def refresh(self):
+        """re-reads meta.json, e.g. to see rows appended by another process"""
+        meta_path = self.store_dir / "meta.json"
+        if meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+        else:
+            self._meta = {
+                "symbols": [],
+                "rows": 0,
+                "row_capacity": 0,
+                "symbol_capacity": 0,
+                "generation": 0,
+            }
+        self._index = {symbol: i for i, symbol in enumerate(self._meta["symbols"])}
+        self._maps: Dict[str, np.memmap] = {}
+
+    def _write_meta(self):
+        # readers only ever see a complete meta.json
+        path = self.store_dir / "meta.json"
+        with open(path.with_suffix(".tmp"), "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(path.with_suffix(".tmp"), path)
+
+    def _path(self, name: str, generation: Optional[int] = None) -> pathlib.Path:
+        generation = self._meta["generation"] if generation is None else generation
+        return self.store_dir / f"{name.lower()}.{generation}.bin"
+
+    def _shape(self, name: str) -> tuple:
+        rows = self._meta["row_capacity"]
+        return (rows,) if name == "dates" else (rows, self._meta["symbol_capacity"])
+
+    def _map(self, name: str) -> np.ndarray:
+        if self._meta["row_capacity"] == 0:
+            return np.empty(self._shape(name), dtype=np.int64 if name == "dates" else np.float64)
+        if name not in self._maps:
+            self._maps[name] = np.memmap(
+                self._path(name),
+                dtype=np.int64 if name == "dates" else np.float64,
+                mode="r" if self.readonly else "r+",
+                shape=self._shape(name),
+            )
+        return self._maps[name]
+
+    def _rewrite(self, symbol_capacity: int, dates: Optional[np.ndarray] = None):
+        """
+        copies the data into files (of a new generation) with symbol_capacity columns
+        Params:
+            dates: trading dates (sorted datetime64[D], including all stored ones) of the
+                rows of the new files - stored rows move to their dates, others are NaN
+        """
+        old, generation = dict(self._meta), self._meta["generation"] + 1
+        rows, symbols = old["rows"], len(old["symbols"])
+        old_dates = self.dates
+        if dates is None:
+            dates, positions = old_dates, np.arange(rows)
+        else:
+            positions = np.searchsorted(dates, old_dates)
+        row_capacity = max(old["row_capacity"], -(-len(dates) // ROW_GROWTH) * ROW_GROWTH, ROW_GROWTH)
+        for name in ("dates",) + COLUMNS:
+            shape = (row_capacity,) if name == "dates" else (row_capacity, symbol_capacity)
+            new = np.memmap(
+                self._path(name, generation),
+                dtype=np.int64 if name == "dates" else np.float64,
+                mode="w+",
+                shape=shape,
+            )
+            if name == "dates":
+                new[: len(dates)] = dates.astype(np.int64)
+            else:
+                new[:] = np.nan
+                new[positions, :symbols] = self._map(name)[:rows, :symbols]
+            new.flush()
+        self._meta.update(
+            generation=generation,
+            rows=len(dates),
+            row_capacity=row_capacity,
+            symbol_capacity=symbol_capacity,
+        )
+        self._maps = {}
+        self._write_meta()
+        if old["row_capacity"]:
+            # readers still mapping the old files keep them until they refresh (POSIX)
+            for name in ("dates",) + COLUMNS:
+                self._path(name, old["generation"]).unlink(missing_ok=True)
+
+    def _reserve_rows(self, rows: int):
+        """grows the files (at the end) to hold at least rows rows"""
+        if rows <= self._meta["row_capacity"]:
+            return
+        row_capacity = -(-rows // ROW_GROWTH) * ROW_GROWTH
+        for name in ("dates",) + COLUMNS:
+            width = 1 if name == "dates" else self._meta["symbol_capacity"]
+            with open(self._path(name), "r+b") as f:
+                f.truncate(row_capacity * width * 8)
+        self._meta["row_capacity"] = row_capacity
+        self._maps = {}
+
+    # -------------------------------------------------------------------------
+    # writes
+    # -------------------------------------------------------------------------
+
+    def append(self, histories: Dict[str, pd.DataFrame]) -> int:
+        """
+        saves price histories (as returned by yf.Ticker.history) - bars after the last
+        stored date are appended as new rows, bars on stored dates overwrite them and bars
+        on dates missing before the last stored date are merged in (see module docstring)
+        Params:
+            histories: price history (with Open, High, Low, Close & Volume columns) by symbol
+        Returns:
+            number of rows (trading dates) added
+        """
+        if self.readonly:
+            raise RuntimeError("FATAL ERROR: price store was opened readonly")
+        histories = {s.upper(): h for s, h in histories.items() if h is not None and len(h)}
+        if not histories:
+            return 0
+        with self._lock:
+            meta = self._meta
+            bar_dates = {symbol: _bar_dates(h) for symbol, h in histories.items()}
+            stored_dates = np.array(self.dates)
+            new_dates = np.setdiff1d(np.concatenate(list(bar_dates.values())), stored_dates)
+            # dates before the last stored one can't be appended
+            merge = meta["rows"] > 0 and len(new_dates) > 0 and new_dates[0] < stored_dates[-1]
+
+            new_symbols = [s for s in histories if s not in self._index]
+            capacity = max(MIN_SYMBOL_CAPACITY, meta["symbol_capacity"])
+            while capacity < len(meta["symbols"]) + len(new_symbols):
+                capacity *= 2
+            if merge:
+                logger.info(f"Merging {len(new_dates)} trading days into the price store")
+                self._rewrite(capacity, np.union1d(stored_dates, new_dates))
+            elif capacity > meta["symbol_capacity"]:
+                self._rewrite(capacity)
+            for symbol in new_symbols:
+                self._index[symbol] = len(meta["symbols"])
+                meta["symbols"].append(symbol)
+
+            rows = meta["rows"]
+            if not merge:
+                self._reserve_rows(rows + len(new_dates))
+                self._map("dates")[rows : rows + len(new_dates)] = new_dates.astype(np.int64)
+            columns = {column: self._map(column) for column in COLUMNS}
+            if not merge:
+                for column in columns.values():
+                    column[rows : rows + len(new_dates)] = np.nan
+                rows += len(new_dates)
+
+            # every bar's date is stored now
+            stored_dates = self._map("dates")[:rows].view("datetime64[D]")
+            for symbol, history in histories.items():
+                positions = np.searchsorted(stored_dates, bar_dates[symbol])
+                offset = self._index[symbol]
+                for name, column in columns.items():
+                    column[positions, offset] = history[name].to_numpy(dtype=np.float64)
+
+            for name in ("dates",) + COLUMNS:
+                self._map(name).flush()
+            meta["rows"] = rows
+            self._write_meta()
+        return len(new_dates)
+
+    def ingest(self, symbols: Sequence[str], period: Optional[str] = None) -> int:
+        """
+        downloads & saves the price history of symbols
+        Params:
+            period: of price history to download (default: HISTORY_PERIOD for symbols not
+                in the store, UPDATE_PERIOD for the others) - use the full period to re-adjust
+                stored prices after splits & dividends
+        Returns:
+            number of rows (trading dates) added
+        """
+        import yfinance as yf
+
+        histories = {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            symbol_period = period or (UPDATE_PERIOD if symbol in self._index else HISTORY_PERIOD)
+            try:
+                histories[symbol] = yf.Ticker(symbol).history(period=symbol_period)
+            except Exception as e:
+                logger.warning(f"Unable to download price history of {symbol}: {e}")
+        return self.append(histories)
+
+    def update(self) -> int:
+        """downloads the latest bars of every symbol in the store"""
+        return self.ingest(self.symbols)
+
+    # -------------------------------------------------------------------------
+    # reads (zero-copy views - copy them to keep them past the next write)
+    # -------------------------------------------------------------------------
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._meta["symbols"])
+
+    @property
+    def rows(self) -> int:
+        return self._meta["rows"]
+
+    @property
+    def dates(self) -> np.ndarray:
+        """trading dates (datetime64[D]) of the rows"""
+        return self._map("dates")[: self.rows].view("datetime64[D]")
+
+    def offset(self, symbol: str) -> int:
+        """column of symbol in the matrices returned by column()"""
+        try:
+            return self._index[symbol.upper()]
+        except KeyError:
+            raise ValueError(f"FATAL ERROR: {symbol} is not in the price store") from None
+
+    def _rows(self, start=None, end=None) -> slice:
+        dates = self.dates
+        first = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"))
+        last = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        return slice(int(first), int(last))
+
+    def column(self, name: str = "Close", start=None, end=None) -> np.ndarray:
+        """
+        a column of every symbol as a (dates x symbols) view, in the order of symbols
+        (NaN where a symbol has no bar)
+        Params:
+            start, end: first & last date (inclusive, e.g. "2024-01-01"), None = all rows
+        """
+        if name not in COLUMNS:
+            raise ValueError(f"FATAL ERROR: column must be one of {COLUMNS}, got {name}")
+        return self._map(name)[self._rows(start, end), : len(self._meta["symbols"])]
+
+    def prices(self, symbol: str, name: str = "Close", start=None, end=None) -> np.ndarray:
+        """a column of symbol, as a (strided) view (see column())"""
+        offset = self.offset(symbol)
+        if name not in COLUMNS:
+            raise ValueError(f"FATAL ERROR: column must be one of {COLUMNS}, got {name}")
+        return self._map(name)[self._rows(start, end), offset]
+
+    def history(self, symbol: str, start=None, end=None) -> pd.DataFrame:
+        """price history of symbol like yf.Ticker.history (a copy, without dates it has no bar)"""
+        rows = self._rows(start, end)
+        df = pd.DataFrame(
+            {name: self.prices(symbol, name, start, end) for name in COLUMNS},
+            index=pd.DatetimeIndex(self.dates[rows], name="Date"),
+        )
+        return df.dropna(how="all")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory-mapped daily price store")
+    parser.add_argument("--dir", type=pathlib.Path, default=None, help="store folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="download & save symbols")
+    ingest_parser.add_argument("symbols", nargs="+")
+    ingest_parser.add_argument("--period", help=f"e.g. 10y (default: {HISTORY_PERIOD} for new symbols)")
+    commands.add_parser("update", help="download the latest bars of all symbols")
+    commands.add_parser("info", help="symbols, dates & size of the store")
+    indicators_parser = commands.add_parser("indicators", help="latest indicators of all symbols")
+    indicators_parser.add_argument("--since", default=None, help="first date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    store = PriceStore(args.dir, readonly=args.command in ("info", "indicators"))
+    if args.command == "ingest":
+        print(f"Appended {store.ingest(args.symbols, args.period)} trading days")
+    elif args.command == "update":
+        print(f"Appended {store.update()} trading days for {len(store.symbols)} symbols")
+    elif args.command == "info":
+        dates = store.dates
+        size = sum(f.stat().st_size for f in store.store_dir.glob("*.bin"))
+        print(
+            f"{len(store.symbols)} symbols, {store.rows} trading days "
+            f"({dates[0] if len(dates) else '-'} to {dates[-1] if len(dates) else '-'}), "
+            f"{size / 2**20:.1f} MB in {store.store_dir}"
+        )
+    else:
+        from tools.indicators import compute_indicators, drop_missing_bars, latest_indicators
+
+        close, high, low = drop_missing_bars(
+            *[store.column(name, args.since) for name in ("Close", "High", "Low")]
+        )
+        indicators, _ = compute_indicators(close, high, low)
+        print(latest_indicators(store.symbols, indicators).round(2).to_markdown())
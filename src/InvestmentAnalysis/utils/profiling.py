@@ -0,0 +1,224 @@
+"""
+profiling.py - on-demand profiling of a single analysis, to find out where the time &
+    memory goes before tuning anything. profile_analysis() runs its with block under
+        - a sampling profiler: the stack of the calling (analysis) thread is sampled every
+          few ms and written as folded stacks (stacks.folded - one "frame;frame;frame count"
+          line per unique stack), the input format of flamegraph.pl, speedscope & inferno.
+          The top-N functions by total & by own time (top_functions.txt) are computed from
+          the same samples.
+        - tracemalloc: peak traced memory and the top allocation sites at the end (memory.txt)
+    Outputs go to <profile dir>/<name>-<timestamp>/, where the profile dir is the
+    PROFILE_DIR env variable, else cache/profiles.
+
+    NOTE: sampling (unlike cProfile, which since Python 3.12 sees every thread & mixes up
+    their callers) only looks at the analysis thread, so other analyses running at the same
+    time don't show up in its stacks. tracemalloc does see every thread though, so only one
+    analysis can be profiled at a time - profile_analysis() raises RuntimeError if another
+    one is already being profiled. tracemalloc roughly doubles the time of an analysis, so
+    treat absolute times with care (or use memory=False).
+
+    Usage:
+        with profile_analysis("TCS.NS") as profile:
+            agent.run("Generate investment analysis for TCS.NS")
+        print(profile.summary())
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import sys
+import time
+import pathlib
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import CodeType
+from typing import Dict, Iterator, List, Tuple, Union
+
+import pandas as pd
+
+# seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+# functions listed in top_functions.txt (per sort order)
+TOP_N = 30
+# frames kept per allocation site in memory.txt
+MEMORY_TOP_N = 15
+
+_profiling_lock = threading.Lock()
+
+
+def default_profile_dir() -> pathlib.Path:
+    return pathlib.Path(
+        os.environ.get("PROFILE_DIR", pathlib.Path(__file__).parent.parent / "cache" / "profiles")
+    )
+
+
+class StackSampler:
+    """samples the stack of a thread every interval seconds, counting unique (folded) stacks"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        # samples by stack (tuple of frame labels, root first)
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        # frame labels by code object
+        self._labels: Dict[CodeType, str] = {}
+        # held while sampling, released to stop
+        self._running = threading.Lock()
+        self._running.acquire()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._running.release()
+        self._thread.join()
+
+    def _run(self):
+        labels, stacks = self._labels, self.stacks
+        while not self._running.acquire(timeout=self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    filename = os.path.basename(code.co_filename)
+                    label = labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+                frames.append(label)
+                frame = frame.f_back
+            if frames:
+                stack = tuple(reversed(frames))
+                stacks[stack] = stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def write_folded(self, path: pathlib.Path):
+        """writes the stacks in folded format (root first, ; separated, then the count)"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def top_functions(self, seconds: float, sort_by: str = "total", top: int = TOP_N) -> pd.DataFrame:
+        """
+        top functions by the time (estimated from the samples) spent in them
+        Params:
+            seconds: time sampled, spread evenly over the samples
+            sort_by: total (incl. the functions they call) or own
+        """
+        total: Dict[str, int] = {}
+        own: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            # count recursive functions once per stack
+            for label in set(stack):
+                total[label] = total.get(label, 0) + count
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+        per_sample = seconds / max(self.samples, 1)
+        df = pd.DataFrame(
+            {
+                "function": list(total),
+                "samples": list(total.values()),
+                "own (s)": [own.get(label, 0) * per_sample for label in total],
+                "total (s)": [count * per_sample for count in total.values()],
+            }
+        )
+        df["total %"] = 100 * df["samples"] / max(self.samples, 1)
+        column = "total (s)" if sort_by == "total" else "own (s)"
+        return df.sort_values(column, ascending=False).head(top).reset_index(drop=True)
+
+
+@dataclass
+class ProfileReport:
+    name: str
+    output_dir: pathlib.Path
+    seconds: float = 0.0
+    samples: int = 0
+    # peak traced memory (bytes) while the with block ran
+    peak_memory: int = 0
+    top_functions: pd.DataFrame = field(default_factory=pd.DataFrame)
+    top_allocations: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"Profiled {self.name} in {self.seconds:.2f}s ({self.samples} stack samples), "
+            f"peak memory {self.peak_memory / 2**20:.1f} MB - outputs in {self.output_dir}"
+        )
+
+
+@contextmanager
+def profile_analysis(
+    name: str,
+    profile_dir: Union[str, pathlib.Path, None] = None,
+    memory: bool = True,
+) -> Iterator[ProfileReport]:
+    """
+    profiles the with block (see module docstring)
+    Params:
+        name: of the analysis (e.g. the symbol), used in the output folder name
+        profile_dir: parent folder of the outputs (default: default_profile_dir())
+        memory: trace memory allocations with tracemalloc (slower)
+    Returns:
+        ProfileReport, filled in when the with block ends
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        raise RuntimeError("FATAL ERROR: another analysis is being profiled, try again later")
+    try:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_dir = pathlib.Path(profile_dir or default_profile_dir()) / f"{name}-{stamp}"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        report = ProfileReport(name, output_dir)
+
+        sampler = StackSampler(threading.get_ident())
+        # leave tracemalloc running if someone else started it
+        tracing_memory = memory and not tracemalloc.is_tracing()
+        if tracing_memory:
+            tracemalloc.start(MEMORY_TOP_N)
+        elif tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield report
+        finally:
+            sampler.stop()
+            report.seconds = time.perf_counter() - start
+            report.samples = sampler.samples
+            if tracemalloc.is_tracing():
+                report.peak_memory = tracemalloc.get_traced_memory()[1]
+                # (leaving out the sampler's own stacks)
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, __file__)]
+                )
+                if tracing_memory:
+                    tracemalloc.stop()
+                report.top_allocations = [
+                    str(stat) for stat in snapshot.statistics("lineno")[:MEMORY_TOP_N]
+                ]
+            report.top_functions = sampler.top_functions(report.seconds)
+            _write_outputs(report, sampler)
+    finally:
+        _profiling_lock.release()
+
+
+def _write_outputs(report: ProfileReport, sampler: StackSampler):
+    output_dir = report.output_dir
+    sampler.write_folded(output_dir / "stacks.folded")
+
+    with open(output_dir / "top_functions.txt", "w", encoding="utf-8") as f:
+        f.write(f"{report.summary()}\n\n")
+        f.write(f"## Top {TOP_N} functions by total time\n\n")
+        f.write(report.top_functions.round(3).to_markdown(index=False) + "\n\n")
+        f.write(f"## Top {TOP_N} functions by own time\n\n")
+        own = sampler.top_functions(report.seconds, sort_by="own")
+        f.write(own.round(3).to_markdown(index=False) + "\n")
+
+    with open(output_dir / "memory.txt", "w", encoding="utf-8") as f:
+        f.write(f"Peak traced memory: {report.peak_memory / 2**20:.1f} MB\n\n")
+        f.write(f"Top {MEMORY_TOP_N} allocation sites (still allocated at the end):\n")
+        f.write("\n".join(report.top_allocations) + "\n")
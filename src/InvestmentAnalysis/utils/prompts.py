@@ -1,5 +1,5 @@
 """
-llm.py - module with helper function to load prompts from external
+prompts.py - module with helper function to load prompts from external
     YAML files. All YAML files are in the config folder
 
 Author: Manish Bhobe
@@ -8,12 +8,17 @@ Code is meant for illustration purposes ONLY. Use at your own risk!
 Author is not liable for any damages arising from direct/indirect use of this code.
 """
 import pathlib
+import functools
+from typing import Union
+
 import yaml
 
-def load_prompts_from_config(prompts_file_path: pathlib.Path):
-    if not prompts_file_path.exists():
-        raise RuntimeError(f"FATAL ERROR: prompts file {str(prompts_file_path)} does not exist!")
-    
+CONFIG_DIR = pathlib.Path(__file__).parent.parent / "config"
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_prompts_file(prompts_file_path: pathlib.Path, mtime_ns: int) -> dict:
+    # mtime_ns is part of the cache key, so edited prompt files are re-read
     config = None
     with open(str(prompts_file_path), "r") as f:
         config = yaml.safe_load(f)
@@ -22,7 +27,22 @@ def load_prompts_from_config(prompts_file_path: pathlib.Path):
         raise RuntimeError(
             f"FATAL ERROR: unable to read from configuration file at {prompts_file_path}"
         )
-
     return config
 
 
+def load_prompts_from_config(prompts_file_path: Union[str, pathlib.Path]) -> dict:
+    """
+    loads (and caches, process-wide) the prompts from a YAML file
+    Params:
+        prompts_file_path: path to YAML file, or just its name if it is in the config folder
+    Returns:
+        the parsed configuration (shared between callers, so don't modify it!)
+    """
+    prompts_file_path = pathlib.Path(prompts_file_path)
+    if not prompts_file_path.is_absolute() and not prompts_file_path.exists():
+        prompts_file_path = CONFIG_DIR / prompts_file_path
+    if not prompts_file_path.exists():
+        raise RuntimeError(f"FATAL ERROR: prompts file {str(prompts_file_path)} does not exist!")
+
+    prompts_file_path = prompts_file_path.resolve()
+    return _parse_prompts_file(prompts_file_path, prompts_file_path.stat().st_mtime_ns)
@@ -0,0 +1,170 @@
+"""
+report_builder.py - builds a report once, as a list of structured sections, and renders
+    each section lazily to every sink that needs it:
+        - MarkdownFileSink: streams each section to a markdown file as it is added
+        - StreamlitSink: shows each section in a streamlit app as it is added
+        - to_markdown(prompt_only=True): the report as text for an LLM prompt
+    Every section is converted to markdown at most once (tables are the expensive part),
+    so adding a section costs the same, however long the report already is.
+
+    Usage:
+        with ReportBuilder(MarkdownFileSink(path), StreamlitSink(st)) as report:
+            report.text(f"#### Basic Info for {symbol}")
+            report.table(financials)
+            prompt = f"Analyze this report:\\n\\n{report.to_markdown(prompt_only=True)}"
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import pathlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+NL2 = "\n\n"
+
+
+class Section(ABC):
+    """
+    a part of a report
+        in_prompt: include in the LLM prompt (see ReportBuilder.to_markdown)
+        in_ui: show in the UI (e.g. streamlit), else only written to files
+    """
+
+    def __init__(self, in_prompt: bool = True, in_ui: bool = True):
+        self.in_prompt = in_prompt
+        self.in_ui = in_ui
+        self._markdown: Optional[str] = None
+
+    def markdown(self) -> str:
+        """the section as markdown (rendered on first call only)"""
+        if self._markdown is None:
+            self._markdown = self.render_markdown()
+        return self._markdown
+
+    @abstractmethod
+    def render_markdown(self) -> str:
+        """the section as markdown"""
+
+    def show(self, st):
+        """shows the section in a streamlit app"""
+        st.markdown(self.markdown())
+
+
+class Text(Section):
+    """markdown text (headings, paragraphs...)"""
+
+    def __init__(self, text: str, **kwargs):
+        super().__init__(**kwargs)
+        self.text = text
+
+    def render_markdown(self) -> str:
+        return self.text
+
+
+class Table(Section):
+    """a DataFrame - a markdown table in files & prompts, an interactive table in the UI"""
+
+    def __init__(self, df: pd.DataFrame, **kwargs):
+        super().__init__(**kwargs)
+        self.df = df
+
+    def render_markdown(self) -> str:
+        return self.df.to_markdown()
+
+    def show(self, st):
+        st.dataframe(self.df)
+
+
+class KeyValues(Section):
+    """key -> value pairs - a 2 column markdown table in files & prompts, a bullet list in the UI"""
+
+    def __init__(self, items: Dict[str, str], headers: Tuple[str, str], **kwargs):
+        super().__init__(**kwargs)
+        self.items = items
+        self.headers = headers
+
+    def render_markdown(self) -> str:
+        lines = [f"| {self.headers[0]} | {self.headers[1]}|", "|--------|-------------|"]
+        lines += [f"|{key}|{value}|" for key, value in self.items.items()]
+        return "\n".join(lines) + "\n"
+
+    def show(self, st):
+        st.markdown("\n".join(f"- {value} ({key})" for key, value in self.items.items()))
+
+
+class MarkdownFileSink:
+    """writes sections to a markdown file as they are added"""
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = pathlib.Path(path)
+        self.file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, section: Section):
+        self.file.write(section.markdown() + NL2)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class StreamlitSink:
+    """shows sections (other than those with in_ui=False) in a streamlit app as they are added"""
+
+    def __init__(self, st):
+        self.st = st
+
+    def write(self, section: Section):
+        if section.in_ui:
+            section.show(self.st)
+
+    def close(self):
+        pass
+
+
+class ReportBuilder:
+    """
+    list of report sections, each passed to all sinks as it is added (see module docstring)
+        sinks: objects with write(section) & close() methods
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+        self.sections: List[Section] = []
+
+    def add(self, section: Section) -> Section:
+        self.sections.append(section)
+        for sink in self.sinks:
+            sink.write(section)
+        return section
+
+    def text(self, text: str, **kwargs) -> Section:
+        return self.add(Text(text, **kwargs))
+
+    def table(self, df: pd.DataFrame, **kwargs) -> Section:
+        return self.add(Table(df, **kwargs))
+
+    def key_values(self, items: Dict[str, str], headers: Tuple[str, str], **kwargs) -> Section:
+        return self.add(KeyValues(items, headers, **kwargs))
+
+    def to_markdown(self, prompt_only: bool = False) -> str:
+        """the report as markdown - only sections with in_prompt=True if prompt_only"""
+        return "".join(
+            section.markdown() + NL2
+            for section in self.sections
+            if section.in_prompt or not prompt_only
+        )
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self) -> "ReportBuilder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
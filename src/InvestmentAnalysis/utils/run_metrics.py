@@ -0,0 +1,224 @@
+"""
+run_metrics.py - per agent latency & token metrics of analyses, kept over time. After
+    each analysis run, record_run_metrics() saves one row per model call (tokens, time,
+    time to first token - from the run_response.metrics of the team leader & each member
+    agent) and one row per tool call to the llm_calls & tool_calls tables of the analytics
+    store (see utils/analytics_store.py). Each row carries the agent, the prompts file of
+    the agent (agents/*_agent.py set it in extra_data) & the symbol analyzed.
+
+    The report command aggregates them into p50/p95/p99 latency & token histograms per
+    agent, prompts file or tool, optionally per day/week/month, and shows which of them
+    drive the tail - the share of the calls (or runs) at or above the overall p95 that
+    each one accounts for.
+        --level call: one sample per model call (tool calls for --by tool)
+        --level run: one sample per agent run (sum of its model calls), with the number
+          of model & tool calls per run
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python -m utils.run_metrics report --by agent
+        python -m utils.run_metrics report --by prompts_file --level run --period week
+        python -m utils.run_metrics report --by tool --since 2025-01-01
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import argparse
+import pathlib
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from utils.analytics_store import AnalyticsStore, get_analytics_store
+
+GROUP_BY = ("agent", "prompts_file", "tool")
+LEVELS = ("call", "run")
+PERIODS = {"day": "D", "week": "W", "month": "M"}
+PERCENTILES = (0.50, 0.95, 0.99)
+# calls of the tools handing a task to a team member - their time is the member's run
+TRANSFER_TOOL_PREFIX = "transfer_task_to_"
+
+
+def _call_value(values, call: int):
+    """value of a model call in a run_response.metrics list (None if not measured)"""
+    return values[call] if values is not None and call < len(values) else None
+
+
+def collect_run_metrics(agent, symbol: Optional[str] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    model & tool calls of the last run of agent and of its team members
+    Params:
+        agent: agent (team leader) after a run
+        symbol: analyzed, saved with each row
+    Returns:
+        (llm_calls rows, tool_calls rows) - see AnalyticsStore.save_llm_calls()
+    """
+    llm_calls, tool_calls = [], []
+    for member in [agent] + list(agent.team or []):
+        run_response = getattr(member, "run_response", None)
+        if run_response is None or run_response.run_id is None:
+            continue
+        name = member.name or "agent"
+        prompts_file = (member.extra_data or {}).get("prompts_file")
+        metrics = run_response.metrics or {}
+        # one entry per model call
+        for call in range(len(metrics.get("time") or metrics.get("total_tokens") or [])):
+            llm_calls.append(
+                {
+                    "run_id": run_response.run_id,
+                    "call": call,
+                    "symbol": symbol,
+                    "agent": name,
+                    "prompts_file": prompts_file,
+                    "model": run_response.model,
+                    "input_tokens": _call_value(metrics.get("input_tokens"), call),
+                    "output_tokens": _call_value(metrics.get("output_tokens"), call),
+                    "total_tokens": _call_value(metrics.get("total_tokens"), call),
+                    "seconds": _call_value(metrics.get("time"), call),
+                    "time_to_first_token": _call_value(metrics.get("time_to_first_token"), call),
+                }
+            )
+        for call, tool in enumerate(run_response.tools or []):
+            tool_name = tool.get("tool_name") or "?"
+            if tool_name.startswith(TRANSFER_TOOL_PREFIX):
+                continue
+            tool_metrics = tool.get("metrics")
+            tool_calls.append(
+                {
+                    "run_id": run_response.run_id,
+                    "call": call,
+                    "symbol": symbol,
+                    "agent": name,
+                    "tool": tool_name,
+                    "seconds": getattr(tool_metrics, "time", None),
+                    "error": int(bool(tool.get("tool_call_error"))),
+                }
+            )
+    return llm_calls, tool_calls
+
+
+def record_run_metrics(
+    agent, symbol: Optional[str] = None, store: Optional[AnalyticsStore] = None
+) -> Tuple[int, int]:
+    """
+    saves the model & tool calls of the last run of agent (see collect_run_metrics)
+    Returns:
+        (model calls saved, tool calls saved)
+    """
+    store = store or get_analytics_store()
+    llm_calls, tool_calls = collect_run_metrics(agent, symbol)
+    return store.save_llm_calls(llm_calls), store.save_tool_calls(tool_calls)
+
+
+def load_calls(
+    store: AnalyticsStore, by: str = "agent", level: str = "call", since: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    samples to aggregate - model calls (tool calls if by is tool) or agent runs
+    Returns:
+        DataFrame with by, created, seconds & (except for tool calls) tokens columns
+    """
+    where, params = ("WHERE created >= ?", [since]) if since else ("", [])
+    if by == "tool":
+        df = store.query(f"SELECT run_id, tool, seconds, error, created FROM tool_calls {where}", params)
+        if level == "run":
+            df = df.groupby(["run_id", "tool"], as_index=False).agg(
+                created=("created", "min"),
+                seconds=("seconds", "sum"),
+                tool_calls=("tool", "size"),
+                errors=("error", "sum"),
+            )
+        return df
+
+    df = store.query(
+        "SELECT run_id, agent, prompts_file, input_tokens, output_tokens, total_tokens, "
+        f"seconds, time_to_first_token, created FROM llm_calls {where}",
+        params,
+    )
+    df["prompts_file"] = df["prompts_file"].fillna("-")
+    if level == "run":
+        tools = store.query(
+            f"SELECT run_id, COUNT(*) AS tool_calls FROM tool_calls {where} GROUP BY run_id", params
+        )
+        df = (
+            df.groupby(["run_id", "agent", "prompts_file"], as_index=False)
+            .agg(
+                created=("created", "min"),
+                seconds=("seconds", "sum"),
+                input_tokens=("input_tokens", "sum"),
+                output_tokens=("output_tokens", "sum"),
+                total_tokens=("total_tokens", "sum"),
+                time_to_first_token=("time_to_first_token", "first"),
+                llm_calls=("seconds", "size"),
+            )
+            .merge(tools, on="run_id", how="left")
+            .fillna({"tool_calls": 0})
+        )
+    return df
+
+
+def latency_report(
+    df: pd.DataFrame, by: str = "agent", period: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    p50/p95/p99 of seconds & tokens of the samples in df (see load_calls) per by (& period),
+    plus the share of the samples (and of their seconds) at or above the overall p95
+    """
+    if df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    keys = [by]
+    if period is not None:
+        df["period"] = (
+            pd.to_datetime(df["created"]).dt.to_period(PERIODS[period]).dt.start_time.dt.date
+        )
+        keys = ["period", by]
+    measures = [c for c in ("seconds", "total_tokens", "output_tokens") if c in df.columns]
+    tail_threshold = df["seconds"].quantile(0.95)
+    df["in_tail"] = df["seconds"] >= tail_threshold
+    df["tail_seconds"] = df["seconds"].where(df["in_tail"], 0.0)
+
+    groups = df.groupby(keys)
+    report = groups.size().rename("samples").to_frame()
+    for counter in ("llm_calls", "tool_calls", "errors"):
+        if counter in df.columns:
+            report[f"{counter}/sample"] = groups[counter].mean()
+    for measure in measures:
+        for q in PERCENTILES:
+            report[f"{measure} p{round(q * 100)}"] = groups[measure].quantile(q)
+    report["total seconds"] = groups["seconds"].sum()
+    if "total_tokens" in df.columns:
+        report["total tokens"] = groups["total_tokens"].sum()
+    report["tail samples %"] = 100 * groups["in_tail"].sum() / max(df["in_tail"].sum(), 1)
+    report["tail seconds %"] = 100 * groups["tail_seconds"].sum() / max(df["tail_seconds"].sum(), 1e-9)
+    sort_by = keys[:-1] + ["tail seconds %"]
+    return report.reset_index().sort_values(sort_by, ascending=[True] * (len(keys) - 1) + [False])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency & token metrics of agent runs")
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="analytics store path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="p50/p95/p99 & tail drivers")
+    report_parser.add_argument("--by", choices=GROUP_BY, default="agent")
+    report_parser.add_argument("--level", choices=LEVELS, default="call")
+    report_parser.add_argument("--period", choices=list(PERIODS.keys()))
+    report_parser.add_argument("--since", help="first date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.db) if args.db else get_analytics_store()
+    samples = load_calls(store, args.by, args.level, args.since)
+    if samples.empty:
+        print("No run metrics recorded yet - run some analyses first")
+    else:
+        samples_of = {
+            ("tool", "call"): "tool calls",
+            ("tool", "run"): "(agent run, tool) pairs",
+        }.get((args.by, args.level), "agent runs" if args.level == "run" else "model calls")
+        print(
+            f"{len(samples)} {samples_of}, overall p95 {samples['seconds'].quantile(0.95):.2f}s "
+            "- tail % = share of the samples (& their seconds) at or above it\n"
+        )
+        print(latency_report(samples, args.by, args.period).round(2).to_markdown(index=False))
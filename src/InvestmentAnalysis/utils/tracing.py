@@ -0,0 +1,390 @@
+"""
+tracing.py - per-analysis latency breakdown. A Trace collects timed spans (with parent
+    & child relationships) around the stages of an analysis:
+        - yfinance: every HTTP request made by yfinance (i.e. every Yahoo! Finance fetch)
+        - tool: every Toolkit function call (the self time of a tool span, i.e. minus its
+          yfinance children, is our own pandas ratio math or TextBlob scoring)
+        - agent: every agent run (member agents nest under the team leader's tool calls)
+        - prompt: assembly of the messages sent to the LLM for an agent run
+        - model: every LLM call (one per turn of an agent run)
+    Spans are recorded only while a trace is active in the calling thread - outside a trace
+    the instrumented functions cost one thread-local lookup. When a trace ends, its spans are
+    appended to <trace dir>/spans.jsonl and the running totals per (kind, name) are written
+    to <trace dir>/metrics.prom (Prometheus text format, e.g. for node_exporter's textfile
+    collector). The trace dir is the TRACE_DIR env variable, else cache/traces.
+
+    Usage:
+        with Trace("analysis", symbol="TCS.NS") as trace:
+            agent.run("Generate investment analysis for TCS.NS")
+        print(trace.waterfall())
+
+        # our own code can add spans too
+        with span("fingerprint", kind="cache"):
+            ...
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import os
+import re
+import json
+import time
+import types
+import uuid
+import pathlib
+import functools
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import pandas as pd
+
+_local = threading.local()
+_instrument_lock = threading.Lock()
+_instrumented = False
+# (kind, name) -> [count, total seconds, errors] across all traces of this process
+_totals: Dict[Tuple[str, str], List[float]] = {}
+_totals_lock = threading.Lock()
+
+
+def default_trace_dir() -> pathlib.Path:
+    return pathlib.Path(
+        os.environ.get("TRACE_DIR", pathlib.Path(__file__).parent.parent / "cache" / "traces")
+    )
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: str
+    # time.time() at start, seconds taken (None while running)
+    start: float
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """
+    spans of one analysis (see module docstring)
+        name: of the root span (e.g. "analysis")
+        trace_dir: where spans & metrics are exported (default: default_trace_dir())
+        export: export spans & metrics when the trace ends
+        attributes: of the root span (e.g. symbol="TCS.NS")
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_dir: Union[str, pathlib.Path, None] = None,
+        export: bool = True,
+        **attributes,
+    ):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.trace_dir = pathlib.Path(trace_dir) if trace_dir is not None else default_trace_dir()
+        self.export_on_exit = export
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._root = None
+        self._outer: Optional[tuple] = None
+
+    def __enter__(self) -> "Trace":
+        instrument()
+        # traces don't nest - an inner trace (e.g. a batch of analyses) takes over the thread
+        self._outer = (getattr(_local, "trace", None), getattr(_local, "stack", None))
+        _local.trace, _local.stack = self, []
+        self._root = _start_span(self.name, "analysis", self.attributes)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _end_span(self._root, exc)
+        _local.trace, _local.stack = self._outer
+        if self.export_on_exit:
+            try:
+                self.export(self.trace_dir)
+            except OSError as e:
+                from agno.utils.log import logger
+
+                logger.warning(f"Unable to export trace {self.trace_id}: {e}")
+
+    @property
+    def seconds(self) -> Optional[float]:
+        return self._root.seconds if self._root is not None else None
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self, trace_dir: pathlib.Path):
+        """appends spans to spans.jsonl & re-writes metrics.prom with updated totals"""
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        with open(trace_dir / "spans.jsonl", "a", encoding="utf-8") as f:
+            for span in self.spans:
+                f.write(json.dumps(asdict(span), default=str) + "\n")
+        with _totals_lock:
+            for span in self.spans:
+                totals = _totals.setdefault((span.kind, span.name), [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += span.seconds or 0.0
+                totals[2] += span.error is not None
+            write_prometheus_metrics(trace_dir / "metrics.prom", _totals)
+
+    def waterfall(self) -> pd.DataFrame:
+        """
+        spans in start order, with their depth, start (seconds since the trace started),
+        seconds & self seconds (minus time in child spans)
+        """
+        spans = sorted(self.spans, key=lambda s: s.start)
+        if not spans:
+            return pd.DataFrame(
+                columns=["name", "kind", "depth", "start", "seconds", "self_seconds", "error"]
+            )
+        by_id = {s.span_id: s for s in spans}
+        child_seconds: Dict[str, float] = {}
+        for s in spans:
+            if s.parent_id is not None:
+                child_seconds[s.parent_id] = child_seconds.get(s.parent_id, 0.0) + (s.seconds or 0.0)
+
+        def depth(s: Span) -> int:
+            d = 0
+            while s.parent_id is not None and s.parent_id in by_id:
+                s, d = by_id[s.parent_id], d + 1
+            return d
+
+        t0 = spans[0].start
+        return pd.DataFrame(
+            [
+                {
+                    "name": s.name,
+                    "kind": s.kind,
+                    "depth": depth(s),
+                    "start": s.start - t0,
+                    "seconds": s.seconds,
+                    "self_seconds": (s.seconds or 0.0) - child_seconds.get(s.span_id, 0.0),
+                    "error": s.error,
+                }
+                for s in spans
+            ]
+        )
+
+
+def current_trace() -> Optional[Trace]:
+    return getattr(_local, "trace", None)
+
+
+def _start_span(name: str, kind: str, attributes: Optional[dict] = None) -> Optional[Span]:
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return None
+    stack = _local.stack
+    s = Span(
+        trace_id=trace.trace_id,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=stack[-1].span_id if stack else None,
+        name=name,
+        kind=kind,
+        start=time.time(),
+        attributes=attributes or {},
+    )
+    stack.append(s)
+    trace.add(s)
+    return s
+
+
+def _end_span(s: Optional[Span], exc: Optional[BaseException] = None):
+    if s is None:
+        return
+    s.seconds = time.time() - s.start
+    if exc is not None:
+        s.error = f"{type(exc).__name__}: {exc}"
+    stack = getattr(_local, "stack", None)
+    # removed by identity - generator spans may end out of order
+    if stack and s in stack:
+        stack.remove(s)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+    """times the with block as a span of the active trace (does nothing without one)"""
+    s = _start_span(name, kind, attributes)
+    try:
+        yield s
+    except BaseException as e:
+        _end_span(s, e)
+        raise
+    else:
+        _end_span(s)
+
+
+def _traced_generator(generator, name: str, kind: str, attributes: Optional[dict] = None):
+    """generator yielding the items of generator, timed as a span (from first item to last)"""
+    yield from _continue_span(generator, _start_span(name, kind, attributes))
+
+
+def _continue_span(generator, s: Optional[Span]):
+    """generator yielding the items of generator, ending span s after the last one"""
+    try:
+        yield from generator
+    except GeneratorExit:
+        # consumer stopped early (e.g. a client disconnected)
+        _end_span(s)
+        raise
+    except BaseException as e:
+        _end_span(s, e)
+        raise
+    else:
+        _end_span(s)
+
+
+def write_prometheus_metrics(path: pathlib.Path, totals: Dict[Tuple[str, str], List[float]]):
+    """writes span totals in Prometheus text format (atomically, for textfile collectors)"""
+
+    def labels(kind: str, name: str) -> str:
+        name = name.replace("\\", "\\\\").replace('"', '\\"')
+        return f'{{kind="{kind}",name="{name}"}}'
+
+    lines = [
+        "# HELP analysis_span_seconds Time spent in spans of investment analyses",
+        "# TYPE analysis_span_seconds summary",
+    ]
+    for (kind, name), (count, seconds, _) in sorted(totals.items()):
+        lines.append(f"analysis_span_seconds_count{labels(kind, name)} {int(count)}")
+        lines.append(f"analysis_span_seconds_sum{labels(kind, name)} {seconds:.6f}")
+    lines += [
+        "# HELP analysis_span_errors_total Spans of investment analyses that raised an error",
+        "# TYPE analysis_span_errors_total counter",
+    ]
+    for (kind, name), (_, _, errors) in sorted(totals.items()):
+        lines.append(f"analysis_span_errors_total{labels(kind, name)} {int(errors)}")
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+# -----------------------------------------------------------------------------
+# instrumentation of yfinance & agno
+# -----------------------------------------------------------------------------
+
+
+def yfinance_endpoint(url: str) -> str:
+    """path of a Yahoo! Finance url, with the symbol replaced (e.g. /v8/finance/chart/{symbol})"""
+    return re.sub(r"/[A-Z0-9^=.\-]+$", "/{symbol}", urlparse(url).path)
+
+
+def _wrap(cls, method: str, make_span):
+    """
+    replaces cls.method with a version timed as a span - make_span(self, *args, **kwargs)
+    returns the (name, kind, attributes) of the span
+    """
+    original = getattr(cls, method)
+    if getattr(original, "_traced", False):
+        return
+
+    @functools.wraps(original)
+    def traced(self, *args, **kwargs):
+        if getattr(_local, "trace", None) is None:
+            return original(self, *args, **kwargs)
+        name, kind, attributes = make_span(self, *args, **kwargs)
+        if _is_generator_function(original):
+            return _traced_generator(original(self, *args, **kwargs), name, kind, attributes)
+        s = _start_span(name, kind, attributes)
+        try:
+            result = original(self, *args, **kwargs)
+        except BaseException as e:
+            _end_span(s, e)
+            raise
+        if isinstance(result, types.GeneratorType):
+            # streamed result (e.g. Agent.run(stream=True)) - the span lasts until it is consumed
+            return _continue_span(result, s)
+        _end_span(s)
+        return result
+
+    traced._traced = True
+    setattr(cls, method, traced)
+
+
+def _is_generator_function(function) -> bool:
+    return bool(getattr(function, "__code__", None) and function.__code__.co_flags & 0x20)
+
+
+def _traced_function_call_execute(original):
+    @functools.wraps(original)
+    def execute(self) -> bool:
+        if getattr(_local, "trace", None) is None:
+            return original(self)
+        s = _start_span(self.function.name, "tool", {"arguments": self.arguments})
+        try:
+            success = original(self)
+        except BaseException as e:
+            _end_span(s, e)
+            raise
+        if isinstance(self.result, types.GeneratorType):
+            # e.g. transfer_task_to_<member>: the work happens as the result is consumed
+            self.result = _continue_span(self.result, s)
+        else:
+            _end_span(s, None if success else RuntimeError(self.error))
+        return success
+
+    execute._traced = True
+    return execute
+
+
+def instrument():
+    """adds spans to yfinance & agno (once per process)"""
+    global _instrumented
+    if _instrumented:
+        return
+    with _instrument_lock:
+        if _instrumented:
+            return
+        from yfinance.data import YfData
+
+        _wrap(
+            YfData,
+            "_make_request",
+            lambda self, url, *args, **kwargs: (
+                f"yfinance {yfinance_endpoint(url)}", "yfinance", {"url": url}
+            ),
+        )
+
+        from agno.agent import Agent
+        from agno.models.base import Model
+        from agno.tools.function import FunctionCall
+
+        _wrap(Agent, "run", lambda self, *args, **kwargs: (self.name, "agent", {}))
+        _wrap(Agent, "get_run_messages", lambda self, *args, **kwargs: (self.name, "prompt", {}))
+        if not getattr(FunctionCall.execute, "_traced", False):
+            FunctionCall.execute = _traced_function_call_execute(FunctionCall.execute)
+
+        # LLM calls - invoke() & invoke_stream() of every model class loaded
+        try:
+            import agno.models.google  # noqa: F401 - our default model
+        except ImportError:
+            pass
+        model_classes, pending = [], [Model]
+        while pending:
+            cls = pending.pop()
+            model_classes.append(cls)
+            pending.extend(cls.__subclasses__())
+        for cls in model_classes:
+            for method in ("invoke", "invoke_stream"):
+                if method in vars(cls):
+                    _wrap(
+                        cls,
+                        method,
+                        lambda self, *args, **kwargs: (
+                            f"{type(self).__name__} {self.id}", "model", {"model": self.id}
+                        ),
+                    )
+        _instrumented = True
@@ -0,0 +1,382 @@
+"""
+watchlist_daemon.py - keeps the data & analyses of a watchlist fresh, without anyone
+    driving the console (e.g. so that everything is up-to-date before market open).
+
+    The daemon keeps a priority queue of (symbol, task) jobs, where task is one of
+        - statements: financial ratio tables & company info (FinancialAnalysisTools)
+        - sentiment: market sentiment of the latest news (SentimentAnalysisTools)
+        - peers: peer comparison table, for the peers picked in the last analysis (PeerComparisonTools)
+        - analysis: full investment analysis by the agent team (see investment_analysis_batch.py)
+    Tool outputs are saved to <data-dir>/<symbol>/<task>.md and analyses to <data-dir>/reports.
+    Statements, ratios & sentiment scores are also saved to the analytics store (see
+    utils/analytics_store.py), to build up their history for cross-company queries.
+
+    A job is due when its last successful run is older than the task's refresh interval.
+    A failed job is retried with exponential backoff (RETRY_DELAY, doubled per consecutive
+    failure, at most the task's interval) and a skipped one (e.g. peers of a symbol not
+    analyzed yet) after its interval.
+    Due jobs are prioritized by staleness (age / interval), boosted for statements & analysis
+    of companies whose earnings date is near. A job that is already queued or running is
+    never queued again (dedupe) and at most --concurrency jobs run at a time. Every job run
+    is appended to a persistent job log (<data-dir>/jobs.jsonl), which is also used to
+    compute staleness when the daemon restarts.
+
+    Usage (from the src/InvestmentAnalysis folder):
+        python watchlist_daemon.py watchlist.txt --concurrency 4
+        python watchlist_daemon.py watchlist.txt --once   # run due jobs & exit (e.g. from cron)
+
+Author: Manish Bhobe
+My experiments with Python, ML and Generative AI.
+Code is meant for illustration purposes ONLY. Use at your own risk!
+Author is not liable for any damages arising from direct/indirect use of this code.
+"""
+
+import json
+import time
+import queue
+import pathlib
+import argparse
+import threading
+import itertools
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yfinance as yf
+from agno.utils.log import logger
+
+from investment_analysis_batch import analyze_symbol, read_symbols
+from utils.analysis_cache import AnalysisCache
+from utils.analytics_store import get_analytics_store
+
+DEFAULT_DATA_DIR = pathlib.Path(__file__).parent / "cache" / "watchlist"
+
+# refresh interval (seconds) per task
+REFRESH_INTERVALS: Dict[str, float] = {
+    "statements": 24 * 3600.0,
+    "sentiment": 3600.0,
+    "peers": 24 * 3600.0,
+    "analysis": 24 * 3600.0,
+}
+# tasks whose results change when a company reports earnings
+EARNINGS_TASKS = ("statements", "analysis")
+# statements & analysis are boosted this many times when earnings are within EARNINGS_WINDOW
+EARNINGS_BOOST = 4.0
+EARNINGS_WINDOW = timedelta(days=3)
+# seconds before the first retry of a failed job (doubled per consecutive failure)
+RETRY_DELAY = 300.0
+
+
+@dataclass(order=True)
+class Job:
+    # lower sorts first in the PriorityQueue, so this is -urgency
+    priority: float
+    sequence: int
+    symbol: str = field(compare=False)
+    task: str = field(compare=False)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.symbol, self.task)
+
+
+class JobLog:
+    """
+    append-only JSON lines log of job runs, with the last success & attempt times and the
+    consecutive failures per (symbol, task)
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.last_success: Dict[Tuple[str, str], float] = {}
+        self.last_attempt: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._track(json.loads(line))
+
+    def _track(self, record: dict):
+        key = (record["symbol"], record["task"])
+        self.last_attempt[key] = (record["status"], record["finished"])
+        if record["status"] == "completed":
+            self.last_success[key] = record["finished"]
+        if record["status"] == "failed":
+            self.failures[key] = self.failures.get(key, 0) + 1
+        else:
+            self.failures.pop(key, None)
+
+    def append(self, record: dict):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._track(record)
+
+    def age(self, symbol: str, task: str, now: float) -> float:
+        """seconds since the last successful run of (symbol, task) - inf if never run"""
+        last = self.last_success.get((symbol, task))
+        return float("inf") if last is None else now - last
+
+    def retry_at(self, symbol: str, task: str, interval: float) -> float:
+        """
+        time (epoch seconds) before which (symbol, task) isn't run again after a failed
+        (exponential backoff) or skipped run, 0 if it can run when due
+        """
+        status, finished = self.last_attempt.get((symbol, task), ("", 0.0))
+        if status == "failed":
+            failures = self.failures[(symbol, task)]
+            return finished + min(RETRY_DELAY * 2 ** (failures - 1), interval)
+        if status == "skipped":
+            return finished + interval
+        return 0.0
+
+
+def next_earnings_date(symbol: str) -> Optional[date]:
+    """earnings date of symbol closest to today from Yahoo! Finance, if available"""
+    try:
+        earnings_dates = yf.Ticker(symbol).calendar.get("Earnings Date") or []
+        today = date.today()
+        return min(earnings_dates, key=lambda d: abs(d - today)) if earnings_dates else None
+    except Exception:
+        return None
+
+
+class WatchlistDaemon:
+    """
+    schedules & runs refresh jobs for a watchlist (see module docstring)
+        symbols: the watchlist
+        data_dir: folder for tool outputs, reports & the job log
+        concurrency: max. jobs running at the same time (global cap)
+        tasks: refresh interval per task to schedule (default: REFRESH_INTERVALS)
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        data_dir: pathlib.Path = DEFAULT_DATA_DIR,
+        concurrency: int = 4,
+        tasks: Optional[Dict[str, float]] = None,
+    ):
+        self.symbols = symbols
+        self.data_dir = data_dir
+        self.concurrency = concurrency
+        self.intervals = tasks or dict(REFRESH_INTERVALS)
+        self.job_log = JobLog(data_dir / "jobs.jsonl")
+        self.analysis_cache = AnalysisCache()
+        self.analytics_store = get_analytics_store()
+        # earnings dates are looked up once a day
+        self.earnings_dates: Dict[str, Optional[date]] = {}
+        self._earnings_day = date.today()
+
+        self._queue: "queue.PriorityQueue[Job]" = queue.PriorityQueue()
+        # (symbol, task) of queued & running jobs
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self.job_bodies: Dict[str, Callable[[str], str]] = {
+            "statements": self.refresh_statements,
+            "sentiment": self.refresh_sentiment,
+            "peers": self.refresh_peers,
+            "analysis": self.refresh_analysis,
+        }
+
+    # -------------------------------------------------------------------------
+    # job bodies - each returns "completed" or "skipped", or raises on failure
+    # -------------------------------------------------------------------------
+
+    def _save(self, symbol: str, task: str, output: str):
+        if output.startswith("Error"):
+            # our tools return errors as text (for the LLM)
+            raise RuntimeError(output)
+        symbol_dir = self.data_dir / symbol
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        with open(symbol_dir / f"{task}.md", "w", encoding="utf-8") as f:
+            f.write(output)
+
+    def refresh_statements(self, symbol: str) -> str:
+        from tools.financial_analysis_tools import FinancialAnalysisTools
+
+        toolkit = FinancialAnalysisTools(enable_all=True, company_info=True)
+        outputs = []
+        for name, function in toolkit.functions.items():
+            output = function.entrypoint(symbol)
+            if output.startswith("Error"):
+                raise RuntimeError(output)
+            outputs.append(f"## {name}\n{output}")
+        self._save(symbol, "statements", "\n\n".join(outputs))
+        # one ticker (& one fetch of each statement) for all tables saved to the store
+        self.analytics_store.ingest(symbol, yf.Ticker(symbol))
+        return "completed"
+
+    def refresh_sentiment(self, symbol: str) -> str:
+        from tools.formatting import format_record
+        from tools.sentiment_analysis_tools import SentimentAnalysisTools
+
+        tools = SentimentAnalysisTools()
+        sentiment = tools.score_market_sentiment(symbol)
+        self.analytics_store.save_sentiment(
+            symbol, sentiment["market_sentiment"], sentiment["avg_score"], sentiment["articles"]
+        )
+        del sentiment["articles"]
+        self._save(symbol, "sentiment", format_record(sentiment, tools.output_format))
+        return "completed"
+
+    def refresh_peers(self, symbol: str) -> str:
+        from tools.peer_comparison_tools import PeerComparisonTools
+
+        # peers are picked by the LLM during an analysis
+        latest = self.analysis_cache.latest(symbol)
+        if latest is None or not latest.peers:
+            return "skipped"
+        tools = PeerComparisonTools()
+        self._save(symbol, "peers", tools.get_peer_comparison_and_industry_benchmarks(latest.peers))
+        return "completed"
+
+    def refresh_analysis(self, symbol: str) -> str:
+        reports_dir = self.data_dir / "reports"
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        entry = analyze_symbol(symbol, reports_dir, self.analysis_cache)
+        if entry["status"] == "failed":
+            raise RuntimeError(entry["error"])
+        return "completed"
+
+    # -------------------------------------------------------------------------
+    # scheduling
+    # -------------------------------------------------------------------------
+
+    def urgency(self, symbol: str, task: str, now: float) -> float:
+        """
+        staleness (age / refresh interval) of (symbol, task), boosted near earnings - 0 while
+        a failed or skipped job waits for its retry
+        """
+        if now < self.job_log.retry_at(symbol, task, self.intervals[task]):
+            return 0.0
+        age = self.job_log.age(symbol, task, now)
+        if age == float("inf"):
+            # never run - most urgent, statements (needed by everything else) first
+            return 1e6 - list(self.intervals).index(task)
+        staleness = age / self.intervals[task]
+        if task in EARNINGS_TASKS:
+            if self._earnings_day != date.today():
+                self.earnings_dates, self._earnings_day = {}, date.today()
+            if symbol not in self.earnings_dates:
+                self.earnings_dates[symbol] = next_earnings_date(symbol)
+            earnings_date = self.earnings_dates[symbol]
+            if earnings_date is not None and abs(date.today() - earnings_date) <= EARNINGS_WINDOW:
+                staleness *= EARNINGS_BOOST
+        return staleness
+
+    def enqueue(self, symbol: str, task: str, urgency: float) -> bool:
+        """queues (symbol, task) unless it is already queued or running"""
+        with self._active_lock:
+            if (symbol, task) in self._active:
+                return False
+            self._active.add((symbol, task))
+        self._queue.put(Job(-urgency, next(self._sequence), symbol, task))
+        return True
+
+    def schedule_due_jobs(self) -> int:
+        """queues all due jobs, returns number of jobs queued"""
+        now = time.time()
+        queued = 0
+        for symbol in self.symbols:
+            for task in self.intervals:
+                urgency = self.urgency(symbol, task, now)
+                if urgency >= 1.0 and self.enqueue(symbol, task, urgency):
+                    queued += 1
+        return queued
+
+    def _run_job(self, job: Job):
+        started = time.time()
+        record = {"symbol": job.symbol, "task": job.task, "started": started}
+        try:
+            record["status"] = self.job_bodies[job.task](job.symbol)
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)[:1000]
+            logger.warning(f"Job {job.task} for {job.symbol} failed: {e}")
+        record["finished"] = time.time()
+        record["seconds"] = round(record["finished"] - started, 3)
+        self.job_log.append(record)
+        logger.info(f"Job {job.task} for {job.symbol}: {record['status']} in {record['seconds']}s")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._run_job(job)
+            finally:
+                with self._active_lock:
+                    self._active.discard(job.key)
+                self._queue.task_done()
+
+    def start(self):
+        """starts the (concurrency) worker threads"""
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._worker, name=f"watchlist-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+
+    def run_once(self):
+        """runs all due jobs & returns when they are done"""
+        self.start()
+        logger.info(f"Queued {self.schedule_due_jobs()} due jobs")
+        self._queue.join()
+        self.stop()
+
+    def run_forever(self, tick: float = 60.0):
+        """re-schedules due jobs every tick seconds, until interrupted"""
+        self.start()
+        try:
+            while True:
+                queued = self.schedule_due_jobs()
+                if queued:
+                    logger.info(f"Queued {queued} due jobs ({self._queue.qsize()} waiting)")
+                time.sleep(tick)
+        except KeyboardInterrupt:
+            logger.info("Stopping watchlist daemon...")
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keeps a watchlist's data & analyses fresh")
+    parser.add_argument("watchlist", help="file with one symbol per line")
+    parser.add_argument("--data-dir", type=pathlib.Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--concurrency", type=int, default=4, help="max. concurrent jobs")
+    parser.add_argument("--tick", type=float, default=60.0, help="seconds between scheduling")
+    parser.add_argument(
+        "--tasks",
+        nargs="+",
+        default=list(REFRESH_INTERVALS.keys()),
+        choices=list(REFRESH_INTERVALS.keys()),
+    )
+    parser.add_argument("--once", action="store_true", help="run due jobs once & exit")
+    args = parser.parse_args()
+
+    with open(args.watchlist, "r", encoding="utf-8") as f:
+        symbols = read_symbols(f)
+
+    daemon = WatchlistDaemon(
+        symbols,
+        data_dir=args.data_dir,
+        concurrency=args.concurrency,
+        tasks={task: REFRESH_INTERVALS[task] for task in args.tasks},
+    )
+    if args.once:
+        daemon.run_once()
+    else:
+        daemon.run_forever(args.tick)